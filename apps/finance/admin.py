@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
-    StudentDebt, StudentPayment, ExpenseCategory, Expense,
-    Salary, AdditionalIncome, FinancialReport
+    StudentDebt, StudentPayment, LedgerEntry, ExpenseCategory, Expense,
+    Salary, AdditionalIncome, DailyFinanceRollup, FinancialReport, PaymentWebhookEvent
 )
 
 @admin.register(StudentDebt)
@@ -16,6 +16,29 @@ class StudentPaymentAdmin(admin.ModelAdmin):
     list_filter = ('payment_date', 'payment_type', 'branch')
     search_fields = ('student_group__student__user__first_name', 'student_group__student__user__last_name', 'receipt_number')
 
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('student_group', 'entry_type', 'amount', 'date', 'period', 'payment')
+    list_filter = ('entry_type', 'date', 'period')
+    search_fields = ('student_group__student__user__first_name', 'student_group__student__user__last_name', 'note')
+    raw_id_fields = ('student_group', 'payment')
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('provider', 'transaction_id', 'status', 'payment', 'received_at', 'processed_at')
+    list_filter = ('provider', 'status')
+    search_fields = ('transaction_id',)
+    raw_id_fields = ('payment',)
+
+    def has_add_permission(self, request):
+        return False
+
 @admin.register(ExpenseCategory)
 class ExpenseCategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_salary')
@@ -40,6 +63,18 @@ class AdditionalIncomeAdmin(admin.ModelAdmin):
     list_filter = ('payment_type', 'date', 'branch')
     search_fields = ('title', 'description', 'receipt_number')
 
+@admin.register(DailyFinanceRollup)
+class DailyFinanceRollupAdmin(admin.ModelAdmin):
+    list_display = ('branch', 'date', 'payment_type', 'student_payments', 'additional_incomes', 'salary_expenses', 'other_expenses')
+    list_filter = ('branch', 'payment_type', 'date')
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 @admin.register(FinancialReport)
 class FinancialReportAdmin(admin.ModelAdmin):
     list_display = ('branch', 'period', 'start_date', 'end_date', 'total_income', 'salary_expenses')
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.db.models import Case, CharField, Count, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.finance.models import LedgerEntry, LedgerEntryType
+from apps.student.models import StudentGroup
+
+# (nomi, eng kam kun); oxirgisidan boshqa har biri keyingisigacha davom etadi
+AGING_BUCKETS = (
+    ('0-30', 0),
+    ('31-60', 31),
+    ('61-90', 61),
+    ('90+', 91),
+)
+BUCKET_NAMES = tuple(name for name, _ in AGING_BUCKETS)
+
+
+def _ledger_subquery(aggregate, output_field=None, **filters):
+    entries = (
+        LedgerEntry.objects.filter(student_group=OuterRef('pk'), **filters)
+        .order_by()
+        .values('student_group')
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    return Subquery(entries, output_field=output_field)
+
+
+def debtor_enrollments(today=None, queryset=None):
+    """
+    Enrollments that still owe money, annotated for aging.
+
+    ``outstanding`` is the enrollment's ledger balance; ``since`` is the last
+    payment date, or the first charge when nothing was ever paid; ``bucket``
+    places ``since`` in AGING_BUCKETS relative to ``today``. All of it is
+    evaluated by the database, so the queryset can be filtered, grouped and
+    paginated like any other.
+    """
+    today = today or timezone.localdate()
+    queryset = queryset if queryset is not None else StudentGroup.objects.all()
+
+    buckets = [
+        When(since__gte=today - timedelta(days=next_min_days - 1), then=Value(name))
+        for (name, _), (_, next_min_days) in zip(AGING_BUCKETS, AGING_BUCKETS[1:])
+    ]
+    return (
+        queryset.annotate(
+            outstanding=Coalesce(_ledger_subquery(Sum('amount'), output_field=IntegerField()), 0),
+            last_payment=_ledger_subquery(Max('date'), entry_type=LedgerEntryType.PAYMENT),
+            first_charge=_ledger_subquery(Min('date'), entry_type=LedgerEntryType.CHARGE),
+        )
+        .filter(outstanding__gt=0)
+        .annotate(
+            since=Coalesce('last_payment', 'first_charge'),
+            bucket=Case(*buckets, default=Value(AGING_BUCKETS[-1][0]), output_field=CharField()),
+        )
+    )
+
+
+def aging_totals(debtors, *group_by):
+    """
+    Grouped ``debtors``/``outstanding`` totals of a debtor_enrollments() queryset.
+
+    ``aging_totals(qs, 'group_id')`` gives one row per (group, bucket); with no
+    fields it gives one row per bucket. One query either way.
+    """
+    return (
+        debtors.order_by()
+        .values(*group_by, 'bucket')
+        .annotate(debtors=Count('id'), total=Sum('outstanding'))
+        .order_by(*group_by, 'bucket')
+    )
+
+
+def pivot_buckets(rows, *keys):
+    """Fold ``aging_totals`` rows into one dict per key with a column per bucket."""
+    pivot = {}
+    for row in rows:
+        key = tuple(row[field] for field in keys)
+        if key not in pivot:
+            pivot[key] = {
+                **{field: row[field] for field in keys},
+                'buckets': {name: {'debtors': 0, 'total': 0} for name in BUCKET_NAMES},
+                'debtors': 0,
+                'total': 0,
+            }
+        item = pivot[key]
+        item['buckets'][row['bucket']] = {'debtors': row['debtors'], 'total': row['total']}
+        item['debtors'] += row['debtors']
+        item['total'] += row['total']
+    return list(pivot.values())
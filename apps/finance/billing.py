@@ -0,0 +1,121 @@
+import calendar
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+
+import django
+from django.db import connection, connections, transaction
+from django.db.models import Exists, OuterRef
+
+from apps.finance.ledger import apply_to_debts
+from apps.finance.models import LedgerEntry, LedgerEntryType
+from apps.student.models import StudentGroup
+from apps.users.models import Branch, Status
+
+
+def month_bounds(value):
+    """First and last day of the month containing ``value``."""
+    days_in_month = calendar.monthrange(value.year, value.month)[1]
+    return value.replace(day=1), value.replace(day=days_in_month)
+
+
+def monthly_charge(price_per_month, joined_date, period):
+    """
+    Charge of one enrollment for the month starting at ``period``.
+
+    Same pro-rating as the old StudentPayment.save(): a student who joined
+    during this month pays for the remaining days only.
+    """
+    days_in_month = calendar.monthrange(period.year, period.month)[1]
+    amount = Decimal(price_per_month)
+    if (joined_date.year, joined_date.month) == (period.year, period.month) and joined_date.day > 1:
+        remaining_days = days_in_month - joined_date.day + 1
+        amount = amount * remaining_days / days_in_month
+    return int(amount.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def bill_branch(branch_id, period, batch_size=1000):
+    """
+    Create the monthly charges of every active enrollment in a branch.
+
+    Enrollments already charged for ``period`` are skipped, so a rerun after a
+    crash only fills the gaps; the unique_monthly_charge constraint backs this
+    up if two runs race. Returns the number of charges created.
+    """
+    period, period_end = month_bounds(period)
+
+    with transaction.atomic():
+        # Bir filial uchun parallel ishga tushirishlarni navbatga qo'yadi
+        list(Branch.objects.select_for_update().filter(pk=branch_id).values_list('pk', flat=True))
+
+        already_charged = LedgerEntry.objects.filter(
+            student_group=OuterRef('pk'),
+            entry_type=LedgerEntryType.CHARGE,
+            period=period,
+        )
+        enrollments = (
+            StudentGroup.objects.filter(
+                group__branch_id=branch_id,
+                status=Status.ACTIVE,
+                joined_date__lte=period_end,
+            )
+            .filter(~Exists(already_charged))
+            .values_list('id', 'student_id', 'joined_date', 'group__price_per_month')
+        )
+
+        entries, deltas = [], {}
+        for student_group_id, student_id, joined_date, price in enrollments.iterator(chunk_size=batch_size):
+            amount = monthly_charge(price, joined_date, period)
+            if amount <= 0:
+                continue
+            entries.append(LedgerEntry(
+                student_group_id=student_group_id,
+                entry_type=LedgerEntryType.CHARGE,
+                amount=amount,
+                date=period,
+                period=period,
+                note=f"{period.strftime('%Y-%m')} oylik to'lov",
+            ))
+            deltas[student_id] = deltas.get(student_id, 0) + amount
+
+        LedgerEntry.objects.bulk_create(entries, batch_size=batch_size)
+        apply_to_debts(deltas, batch_size=batch_size)
+
+    return len(entries)
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def _bill_branch_job(args):
+    branch_id, period, batch_size = args
+    try:
+        return branch_id, bill_branch(branch_id, period, batch_size=batch_size)
+    finally:
+        connections.close_all()
+
+
+def run_billing(period, branch_ids=None, workers=1, batch_size=1000):
+    """
+    Bill every (or the given) active branch for ``period``.
+
+    Each branch is an independent transaction, so with ``workers > 1`` the
+    branches are spread over a process pool. Returns ``{branch_id: created}``.
+    """
+    branches = Branch.objects.filter(status=Status.ACTIVE)
+    if branch_ids:
+        branches = branches.filter(pk__in=branch_ids)
+    branch_ids = list(branches.values_list('pk', flat=True))
+
+    # SQLite bir vaqtda faqat bitta yozuvchiga ruxsat beradi
+    if connection.vendor == 'sqlite':
+        workers = 1
+
+    if workers <= 1 or len(branch_ids) <= 1:
+        return {branch_id: bill_branch(branch_id, period, batch_size=batch_size) for branch_id in branch_ids}
+
+    # Bola jarayonlar ota jarayonning ulanishlarini meros qilib olmasligi kerak
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return dict(pool.map(_bill_branch_job, [(branch_id, period, batch_size) for branch_id in branch_ids]))
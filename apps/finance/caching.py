@@ -0,0 +1,25 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+FINANCE_VERSION_KEY = 'finance:version'
+
+
+def finance_version():
+    """
+    Stamp that changes whenever finance totals change.
+
+    Cached aggregates put it in their key, so a single bump invalidates all
+    of them at once without tracking individual keys.
+    """
+    version = cache.get(FINANCE_VERSION_KEY)
+    if version is None:
+        cache.add(FINANCE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(FINANCE_VERSION_KEY)
+    return version
+
+
+def bump_finance_version():
+    """Invalidate cached finance aggregates once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set(FINANCE_VERSION_KEY, uuid.uuid4().hex, None))
@@ -0,0 +1,192 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from apps.finance.aging import debtor_enrollments
+from apps.finance.billing import month_bounds
+from apps.finance.caching import finance_version
+from apps.finance.models import DailyFinanceRollup, LedgerEntry, LedgerEntryType
+from apps.student.models import StudentGroup
+from apps.users.models import Branch, Status
+
+FORECAST_TIMEOUT = 60 * 10
+
+
+def add_months(value, months):
+    """First day of the month ``months`` after the month of ``value``."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+
+
+def _ratio(part, whole):
+    return Decimal(part) / Decimal(whole) if whole else Decimal(0)
+
+
+def branch_history(branch_ids, first_month, last_month):
+    """
+    Per-branch monthly history from the ledger and the rollup.
+
+    ``{branch_id: {month: {'billed', 'enrolled', 'new', 'collected'}}}``, two
+    grouped queries. ``new`` counts enrollments whose first month it is, so
+    ``enrolled[m-1] + new[m] - enrolled[m]`` is how many stopped being billed,
+    i.e. were deactivated, between the two months.
+    """
+    history = defaultdict(lambda: defaultdict(lambda: {'billed': 0, 'enrolled': 0, 'new': 0, 'collected': Decimal(0)}))
+
+    charges = (
+        LedgerEntry.objects.filter(
+            entry_type=LedgerEntryType.CHARGE,
+            period__gte=first_month,
+            period__lte=last_month,
+            student_group__group__branch_id__in=branch_ids,
+        )
+        .values('student_group__group__branch_id', 'period')
+        .annotate(
+            billed=Sum('amount'),
+            enrolled=Count('id'),
+            new=Count('id', filter=Q(student_group__joined_date__gte=F('period'))),
+        )
+        .order_by()
+    )
+    for row in charges:
+        month = history[row['student_group__group__branch_id']][row['period']]
+        month.update(billed=row['billed'], enrolled=row['enrolled'], new=row['new'])
+
+    collected = (
+        DailyFinanceRollup.objects.filter(
+            branch_id__in=branch_ids,
+            date__gte=first_month,
+            date__lte=month_bounds(last_month)[1],
+        )
+        .annotate(month=TruncMonth('date'))
+        .values('branch_id', 'month')
+        .annotate(total=Sum('student_payments'))
+        .order_by()
+    )
+    for row in collected:
+        history[row['branch_id']][row['month']]['collected'] = row['total'] or Decimal(0)
+
+    return history
+
+
+def _rates(months, history):
+    """Pooled monthly churn, new enrollments per month and collection rate."""
+    churned = exposed = new = billed = collected = 0
+    for previous, current in zip(months, months[1:]):
+        before, after = history[previous], history[current]
+        if before['enrolled']:
+            churned += max(0, before['enrolled'] + after['new'] - after['enrolled'])
+            exposed += before['enrolled']
+    for month in months:
+        new += history[month]['new']
+        billed += history[month]['billed']
+        collected += history[month]['collected']
+    return {
+        'churn_rate': _ratio(churned, exposed),
+        'new_per_month': _ratio(new, len(months)),
+        # Hisob-kitob tarixi bo'lmasa hamma to'laydi deb olamiz
+        'collection_rate': _ratio(collected, billed) if billed else Decimal(1),
+    }
+
+
+def forecast_inflow(months_ahead=6, history_months=6, branch_ids=None, today=None):
+    """
+    Expected student payment inflow per branch for the next ``months_ahead`` months.
+
+    Active enrollments are grouped into (branch, price) cohorts by the
+    database; churn, new enrollments and the collection rate come from the
+    last ``history_months`` complete months. The projection then runs on the
+    per-branch totals, so the cost does not depend on the number of students.
+    ``history`` holds the matching actuals (the same rollup FinancialReport
+    uses) for comparison.
+    """
+    today = today or date.today()
+    current_month = today.replace(day=1)
+    first_history = add_months(current_month, -history_months)
+    last_history = add_months(current_month, -1)
+    history_range = [add_months(first_history, i) for i in range(history_months)]
+
+    branches = Branch.objects.filter(status=Status.ACTIVE).order_by('name')
+    if branch_ids:
+        branches = branches.filter(pk__in=branch_ids)
+    result = {
+        pk: {'branch_id': pk, 'branch_name': name, 'active_enrollments': 0,
+             'monthly_billing': Decimal(0), 'outstanding_debt': 0, 'cohorts': []}
+        for pk, name in branches.values_list('pk', 'name')
+    }
+
+    cohorts = (
+        StudentGroup.objects.filter(
+            status=Status.ACTIVE,
+            group__status=Status.ACTIVE,
+            group__branch_id__in=result,
+        )
+        .values('group__branch_id', 'group__price_per_month')
+        .annotate(enrollments=Count('id'))
+        .order_by('group__branch_id', 'group__price_per_month')
+    )
+    for row in cohorts:
+        branch = result[row['group__branch_id']]
+        branch['cohorts'].append({'price': row['group__price_per_month'], 'enrollments': row['enrollments']})
+        branch['active_enrollments'] += row['enrollments']
+        branch['monthly_billing'] += row['group__price_per_month'] * row['enrollments']
+
+    debts = (
+        debtor_enrollments(queryset=StudentGroup.objects.filter(group__branch_id__in=result))
+        .order_by()
+        .values('group__branch_id')
+        .annotate(debt=Sum('outstanding'))
+    )
+    for row in debts:
+        result[row['group__branch_id']]['outstanding_debt'] = row['debt']
+
+    history = branch_history(list(result), first_history, last_history)
+
+    for branch_id, branch in result.items():
+        months = history[branch_id]
+        rates = _rates(history_range, months)
+        average_price = _ratio(branch['monthly_billing'], branch['active_enrollments'])
+        retention = 1 - rates['churn_rate']
+        collection = min(rates['collection_rate'], Decimal(1))
+
+        expected, forecast = Decimal(branch['active_enrollments']), []
+        for step in range(months_ahead):
+            expected = expected * retention + rates['new_per_month']
+            billing = expected * average_price
+            forecast.append({
+                'month': add_months(current_month, step + 1),
+                'expected_enrollments': expected.quantize(Decimal('0.1')),
+                'expected_billing': _money(billing),
+                'expected_inflow': _money(billing * collection),
+            })
+
+        branch.update(
+            churn_rate=rates['churn_rate'].quantize(Decimal('0.0001')),
+            new_per_month=rates['new_per_month'].quantize(Decimal('0.1')),
+            collection_rate=rates['collection_rate'].quantize(Decimal('0.0001')),
+            history=[
+                {'month': month, 'billed': months[month]['billed'], 'collected': months[month]['collected']}
+                for month in history_range
+            ],
+            forecast=forecast,
+        )
+
+    return list(result.values())
+
+
+def get_forecast(months_ahead=6, history_months=6, branch_ids=None, today=None):
+    """forecast_inflow() cached until the next finance write (or the next day)."""
+    today = today or date.today()
+    branch_key = ','.join(str(pk) for pk in sorted(branch_ids)) if branch_ids else 'all'
+    key = f'finance-forecast:{finance_version()}:{today}:{months_ahead}:{history_months}:{branch_key}'
+    return cache.get_or_set(
+        key, lambda: forecast_inflow(months_ahead, history_months, branch_ids, today=today), FORECAST_TIMEOUT
+    )
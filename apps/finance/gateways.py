@@ -0,0 +1,120 @@
+import hashlib
+import hmac
+import json
+import uuid
+from collections import namedtuple
+from datetime import date, datetime
+
+from django.conf import settings
+
+from apps.finance.models import PaymentType, PaymentWebhookEvent
+
+WebhookPayment = namedtuple('WebhookPayment', 'transaction_id student_group_id amount payment_type paid_at')
+
+WEBHOOK_PAYMENT_TYPES = (PaymentType.CARD, PaymentType.TRANSFER)
+
+
+class InvalidSignature(Exception):
+    pass
+
+
+class HMACProvider:
+    """
+    Gateway whose callbacks are JSON signed with HMAC-SHA256 of the raw body.
+
+    Expected body::
+
+        {"transaction_id": "...", "account": <StudentGroup id>, "amount": 300000,
+         "method": "card" | "transfer", "paid_at": "2026-09-01T10:00:00+05:00"}
+    """
+    signature_header = 'X-Signature'
+
+    def __init__(self, name, secret):
+        self.name = name
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+
+    def sign(self, body):
+        return hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+
+    def verify(self, body, signature):
+        return bool(signature) and hmac.compare_digest(self.sign(body), signature)
+
+    def parse(self, payload):
+        """Normalize a callback payload; raises ValueError when it is unusable."""
+        if not isinstance(payload, dict):
+            raise ValueError("Payload must be a JSON object")
+
+        transaction_id = str(payload.get('transaction_id') or '').strip()
+        if not transaction_id or len(transaction_id) > 100:
+            raise ValueError("transaction_id is required (max 100 characters)")
+
+        try:
+            student_group_id = int(payload['account'])
+            amount = int(payload['amount'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("account and amount must be integers")
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+
+        payment_type = payload.get('method', PaymentType.CARD)
+        if payment_type not in WEBHOOK_PAYMENT_TYPES:
+            raise ValueError(f"method must be one of: {', '.join(WEBHOOK_PAYMENT_TYPES)}")
+
+        paid_at = payload.get('paid_at')
+        if paid_at:
+            try:
+                paid_at = datetime.fromisoformat(paid_at).date()
+            except (TypeError, ValueError):
+                raise ValueError("paid_at must be an ISO date or datetime")
+        else:
+            paid_at = date.today()
+
+        return WebhookPayment(transaction_id, student_group_id, amount, payment_type, paid_at)
+
+
+class FakeProvider(HMACProvider):
+    """Local provider that produces signed callbacks for development and benchmarks."""
+
+    def callback(self, student_group_id, amount, transaction_id=None, method=PaymentType.CARD, paid_at=None):
+        """``(body, signature)`` of one callback, as the gateway would send it."""
+        payload = {
+            'transaction_id': transaction_id or uuid.uuid4().hex,
+            'account': student_group_id,
+            'amount': amount,
+            'method': method,
+            'paid_at': (paid_at or date.today()).isoformat(),
+        }
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        return body, self.sign(body)
+
+
+def get_provider(name):
+    """Configured provider called ``name``, or None if it is unknown or has no secret."""
+    secret = getattr(settings, 'PAYMENT_WEBHOOK_SECRETS', {}).get(name)
+    if not secret:
+        return None
+    provider_class = FakeProvider if name == 'fake' else HMACProvider
+    return provider_class(name, secret)
+
+
+def ingest_webhook(provider, body, signature):
+    """
+    Verify a callback and put it in the inbox.
+
+    Only a single conflict-ignoring INSERT hits the database, so retries and
+    replays of the same transaction are absorbed by the unique constraint.
+    Returns the normalized payment; raises InvalidSignature or ValueError.
+    """
+    if not provider.verify(body, signature):
+        raise InvalidSignature("Invalid signature")
+    try:
+        payload = json.loads(body)
+    except (TypeError, ValueError):
+        raise ValueError("Body is not valid JSON")
+    payment = provider.parse(payload)
+
+    PaymentWebhookEvent.objects.bulk_create(
+        [PaymentWebhookEvent(provider=provider.name, transaction_id=payment.transaction_id, payload=payload)],
+        ignore_conflicts=True,
+    )
+    return payment
@@ -0,0 +1,190 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F, Max, Q, Sum, Value
+from django.db.models.functions import Greatest
+
+from apps.finance.caching import bump_finance_version
+from apps.finance.models import LedgerEntry, LedgerEntryType, StudentDebt
+
+
+def apply_to_debt(student_id, delta, last_payment_date=None):
+    """Shift a student's debt by ``delta`` with a single UPDATE (no recompute)."""
+    updates = {
+        'total_debt': Greatest(F('total_debt') - F('balance') + delta, Value(0)),
+        'balance': Greatest(F('balance') - F('total_debt') - delta, Value(0)),
+    }
+    if last_payment_date:
+        updates['last_payment_date'] = last_payment_date
+
+    if not StudentDebt.objects.filter(student_id=student_id).update(**updates):
+        StudentDebt.objects.get_or_create(student_id=student_id)
+        StudentDebt.objects.filter(student_id=student_id).update(**updates)
+    bump_finance_version()
+
+
+def apply_to_debts(deltas, last_payment_dates=None, batch_size=1000):
+    """
+    Set-based variant of apply_to_debt for ``{student_id: delta}``.
+
+    Missing StudentDebt rows are inserted first, then every row is shifted by
+    a single CASE UPDATE per batch that reads the current values in the
+    database, so concurrent payments are never overwritten.
+    """
+    deltas = {student_id: delta for student_id, delta in deltas.items() if delta}
+    last_payment_dates = last_payment_dates or {}
+    if not deltas and not last_payment_dates:
+        return
+
+    student_ids = set(deltas) | set(last_payment_dates)
+    StudentDebt.objects.bulk_create(
+        [StudentDebt(student_id=student_id) for student_id in student_ids],
+        ignore_conflicts=True,
+        batch_size=batch_size,
+    )
+
+    debts = []
+    for pk, student_id in StudentDebt.objects.filter(student_id__in=student_ids).values_list('pk', 'student_id'):
+        delta = deltas.get(student_id, 0)
+        debt = StudentDebt(
+            pk=pk,
+            total_debt=Greatest(F('total_debt') - F('balance') + delta, Value(0)),
+            balance=Greatest(F('balance') - F('total_debt') - delta, Value(0)),
+            last_payment_date=last_payment_dates.get(student_id, F('last_payment_date')),
+        )
+        debts.append(debt)
+    StudentDebt.objects.bulk_update(debts, ['total_debt', 'balance', 'last_payment_date'], batch_size=batch_size)
+    bump_finance_version()
+
+
+def _post(student_group_id, student_id, entry_type, amount, entry_date=None, period=None, payment=None, note=None):
+    entry_date = entry_date or date.today()
+    with transaction.atomic():
+        entry = LedgerEntry.objects.create(
+            student_group_id=student_group_id,
+            entry_type=entry_type,
+            amount=amount,
+            date=entry_date,
+            period=period,
+            payment=payment,
+            note=note,
+        )
+        apply_to_debt(
+            student_id,
+            amount,
+            last_payment_date=entry_date if entry_type == LedgerEntryType.PAYMENT else None,
+        )
+    return entry
+
+
+def post_entry(student_group, entry_type, amount, entry_date=None, period=None, payment=None, note=None):
+    """Append a ledger row and apply it to the student's debt in one transaction."""
+    return _post(
+        student_group.pk, student_group.student_id, entry_type, amount,
+        entry_date=entry_date, period=period, payment=payment, note=note,
+    )
+
+
+def record_charge(student_group, amount, period, entry_date=None, note=None):
+    return post_entry(student_group, LedgerEntryType.CHARGE, amount, entry_date=entry_date, period=period, note=note)
+
+
+def record_payment(payment, created=False):
+    """
+    Post a StudentPayment to the ledger.
+
+    A new payment is a single negative entry. An edited payment gets
+    adjustments so that its entries again sum to ``-payment.amount`` on its
+    current enrollment (and to zero on any enrollment it was moved away from).
+    """
+    if created:
+        post_entry(
+            payment.student_group, LedgerEntryType.PAYMENT, -payment.amount,
+            entry_date=payment.payment_date, payment=payment,
+        )
+        return
+
+    posted = _posted_by_enrollment(payment)
+    for (student_group_id, student_id), total in posted.items():
+        if student_group_id != payment.student_group_id:
+            _post(
+                student_group_id, student_id, LedgerEntryType.ADJUSTMENT, -total,
+                payment=payment, note="To'lov boshqa guruhga o'tkazildi",
+            )
+
+    current = (payment.student_group_id, payment.student_group.student_id)
+    delta = -payment.amount - posted.get(current, 0)
+    if delta:
+        post_entry(
+            payment.student_group, LedgerEntryType.ADJUSTMENT, delta,
+            entry_date=payment.payment_date, payment=payment, note="To'lov tahrirlandi",
+        )
+
+
+def reverse_payment(payment):
+    """Cancel every ledger effect of a payment that is being deleted."""
+    for (student_group_id, student_id), total in _posted_by_enrollment(payment).items():
+        _post(
+            student_group_id, student_id, LedgerEntryType.ADJUSTMENT, -total,
+            note=f"To'lov #{payment.pk} o'chirildi",
+        )
+
+
+def _posted_by_enrollment(payment):
+    rows = (
+        LedgerEntry.objects.filter(payment=payment)
+        .values_list('student_group_id', 'student_group__student_id')
+        .annotate(total=Sum('amount'))
+    )
+    return {(student_group_id, student_id): total for student_group_id, student_id, total in rows if total}
+
+
+def rebuild_balances(student_ids=None, commit=True, batch_size=1000):
+    """
+    Recompute StudentDebt rows from the ledger with one grouped query.
+
+    Returns ``{'checked', 'mismatched', 'created'}`` where ``mismatched`` lists
+    the students whose stored debt disagreed with the ledger. With
+    ``commit=False`` nothing is written, which makes it a consistency check.
+    """
+    entries = LedgerEntry.objects.all()
+    debts = StudentDebt.objects.all()
+    if student_ids is not None:
+        entries = entries.filter(student_group__student_id__in=student_ids)
+        debts = debts.filter(student_id__in=student_ids)
+
+    ledger = {
+        row['student_group__student_id']: (row['net'] or 0, row['last_payment'])
+        for row in entries.values('student_group__student_id').annotate(
+            net=Sum('amount'),
+            last_payment=Max('date', filter=Q(entry_type=LedgerEntryType.PAYMENT)),
+        )
+    }
+
+    checked, to_update, mismatched = 0, [], []
+    for debt in debts.only('id', 'student_id', 'total_debt', 'balance', 'last_payment_date').iterator(chunk_size=batch_size):
+        checked += 1
+        net, last_payment = ledger.pop(debt.student_id, (0, None))
+        total_debt, balance = max(0, net), max(0, -net)
+        if (debt.total_debt, debt.balance) != (total_debt, balance):
+            mismatched.append(debt.student_id)
+            debt.total_debt, debt.balance = total_debt, balance
+            debt.last_payment_date = last_payment or debt.last_payment_date
+            to_update.append(debt)
+
+    to_create = [
+        StudentDebt(student_id=student_id, total_debt=max(0, net), balance=max(0, -net), last_payment_date=last_payment)
+        for student_id, (net, last_payment) in ledger.items()
+    ]
+
+    if commit:
+        with transaction.atomic():
+            StudentDebt.objects.bulk_update(to_update, ['total_debt', 'balance', 'last_payment_date'], batch_size=batch_size)
+            StudentDebt.objects.bulk_create(to_create, batch_size=batch_size)
+            bump_finance_version()
+
+    return {
+        'checked': checked + len(to_create),
+        'mismatched': mismatched + [student_id for student_id, (net, _) in ledger.items() if net],
+        'created': len(to_create),
+    }
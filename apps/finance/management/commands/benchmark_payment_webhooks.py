@@ -0,0 +1,72 @@
+import random
+import secrets
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.finance.gateways import FakeProvider, ingest_webhook
+from apps.finance.models import PaymentWebhookEvent, StudentPayment, WebhookStatus
+from apps.finance.webhooks import drain_inbox
+from apps.student.models import StudentGroup
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Soxta provayder bilan webhook oqimini o'lchaydi va takrorlar bo'yicha kafolatni tekshiradi (hamma narsa bekor qilinadi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--callbacks', type=int, default=2000, help="Noyob tranzaksiyalar soni")
+        parser.add_argument('--duplicates', type=float, default=0.3, help="Qayta yuboriladigan callbacklar ulushi")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        enrollments = list(StudentGroup.objects.values_list('pk', flat=True)[:1000])
+        received_by = User.objects.filter(user_role__in=['owner', 'admin']).first()
+        if not enrollments or received_by is None:
+            raise CommandError("Need at least one StudentGroup and one owner/admin user")
+
+        provider = FakeProvider('fake-benchmark', secrets.token_bytes(32))
+        callbacks = [
+            provider.callback(rng.choice(enrollments), rng.randint(1, 100) * 10000)
+            for _ in range(options['callbacks'])
+        ]
+        replays = rng.choices(callbacks, k=int(len(callbacks) * options['duplicates']))
+        deliveries = callbacks + replays
+        rng.shuffle(deliveries)
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            for body, signature in deliveries:
+                ingest_webhook(provider, body, signature)
+            ingest_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            drain_inbox(received_by, batch_size=options['batch_size'])
+            # Ikkinchi yugurish: takroriy yetkazib berish va qayta ishga tushirishdan keyin hech narsa qo'shilmasligi kerak
+            for body, signature in replays:
+                ingest_webhook(provider, body, signature)
+            drain_inbox(received_by, batch_size=options['batch_size'])
+            drain_seconds = time.perf_counter() - started
+
+            events = PaymentWebhookEvent.objects.filter(provider=provider.name)
+            payments = StudentPayment.objects.filter(provider=provider.name).count()
+            processed = events.filter(status=WebhookStatus.PROCESSED).count()
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"Ingest: {len(deliveries)} callbacks in {ingest_seconds:.2f}s "
+            f"({len(deliveries) / ingest_seconds:.0f}/s)"
+        )
+        self.stdout.write(
+            f"Drain: {len(callbacks)} payments in {drain_seconds:.2f}s "
+            f"({len(callbacks) / drain_seconds:.0f}/s)"
+        )
+        if payments == processed == len(callbacks):
+            self.stdout.write(self.style.SUCCESS(f"Dedup OK: {payments} payments for {len(deliveries)} deliveries"))
+        else:
+            raise CommandError(
+                f"Dedup FAILED: {payments} payments, {processed} processed events, {len(callbacks)} transactions"
+            )
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.webhooks import drain_inbox
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Webhook inboxidagi to'lovlarni StudentPayment sifatida yozadi (bir nechta nusxada ishlatish mumkin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--received-by', default=getattr(settings, 'PAYMENT_WEBHOOK_USER', None),
+                            help="To'lovni qabul qilgan foydalanuvchi (standart: PAYMENT_WEBHOOK_USER)")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help="Navbat bo'shaganda to'xtamasdan kutib turadi")
+        parser.add_argument('--sleep', type=float, default=1.0, help="--loop rejimida tekshirish oralig'i (soniya)")
+
+    def handle(self, *args, **options):
+        if not options['received_by']:
+            raise CommandError("Pass --received-by or set PAYMENT_WEBHOOK_USER")
+        try:
+            received_by = User.objects.get(username=options['received_by'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['received_by']!r} does not exist")
+
+        while True:
+            totals = drain_inbox(received_by, batch_size=options['batch_size'])
+            if totals:
+                self.stdout.write(", ".join(f"{status}: {count}" for status, count in sorted(totals.items())))
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = "Kunlik moliyaviy yig'indilarni (DailyFinanceRollup) manba jadvallardan qayta quradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="Boshlanish sanasi, YYYY-MM-DD")
+        parser.add_argument('--end', help="Tugash sanasi, YYYY-MM-DD")
+        parser.add_argument('--branch', type=int, action='append', dest='branches', help="Faqat shu filial(lar)")
+
+    def parse_date(self, value):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Invalid date: {value}")
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollup(
+            start_date=self.parse_date(options['start']),
+            end_date=self.parse_date(options['end']),
+            branch_ids=options['branches'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily rollup rows"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.finance.ledger import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "StudentDebt qoldiqlarini ledger yozuvlaridan qayta hisoblaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Faqat tekshirish, hech narsa yozilmaydi")
+        parser.add_argument('--student', type=int, action='append', dest='students', help="Faqat shu o'quvchi(lar)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        result = rebuild_balances(
+            student_ids=options['students'],
+            commit=not options['check'],
+            batch_size=options['batch_size'],
+        )
+        mismatched = result['mismatched']
+
+        self.stdout.write(f"Checked: {result['checked']}, mismatched: {len(mismatched)}, created: {result['created']}")
+        if mismatched:
+            preview = ', '.join(str(student_id) for student_id in mismatched[:20])
+            self.stdout.write(f"Mismatched students: {preview}{' ...' if len(mismatched) > 20 else ''}")
+
+        if options['check'] and mismatched:
+            self.stderr.write(self.style.ERROR("Ledger and StudentDebt are out of sync"))
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS("Done" if not options['check'] else "Ledger is consistent"))
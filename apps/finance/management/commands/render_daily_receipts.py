@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.receipts import daily_archive
+from apps.users.models import Branch, Status
+
+
+class Command(BaseCommand):
+    help = "Filiallarning bir kunlik cheklarini PDF qilib bitta arxivga yig'adi (keshdan foydalanadi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Sana, YYYY-MM-DD (standart: bugun)")
+        parser.add_argument('--branch', type=int, action='append', dest='branches', help="Faqat shu filial(lar)")
+        parser.add_argument('--workers', type=int, default=None, help="Jarayonlar soni (standart: RECEIPT_WORKERS)")
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError("--date must look like YYYY-MM-DD")
+
+        branches = Branch.objects.filter(status=Status.ACTIVE)
+        if options['branches']:
+            branches = branches.filter(pk__in=options['branches'])
+
+        for branch_id in branches.values_list('pk', flat=True):
+            path = daily_archive(branch_id, day, workers=options['workers'])
+            if path:
+                self.stdout.write(f"Branch {branch_id}: {path}")
@@ -0,0 +1,36 @@
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.billing import run_billing
+
+
+class Command(BaseCommand):
+    help = "Faol o'quvchilar uchun oylik to'lovlarni hisoblaydi (qayta ishga tushirish xavfsiz)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="Hisob oyi, YYYY-MM (standart: joriy oy)")
+        parser.add_argument('--branch', type=int, action='append', dest='branches', help="Faqat shu filial(lar)")
+        parser.add_argument('--workers', type=int, default=1, help="Parallel jarayonlar soni")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                period = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("--month must look like YYYY-MM")
+        else:
+            period = date.today().replace(day=1)
+
+        results = run_billing(
+            period,
+            branch_ids=options['branches'],
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+        )
+        for branch_id, created in sorted(results.items()):
+            self.stdout.write(f"Branch {branch_id}: {created} charges")
+        self.stdout.write(self.style.SUCCESS(
+            f"Billed {period.strftime('%Y-%m')}: {sum(results.values())} charges in {len(results)} branches"
+        ))
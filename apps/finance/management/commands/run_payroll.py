@@ -0,0 +1,62 @@
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.models import PaymentType
+from apps.finance.payroll import compute_payroll, run_payroll
+from apps.users.models import Branch, Status, User
+
+
+class Command(BaseCommand):
+    help = "O'tilgan darslar bo'yicha o'qituvchilar oylik maoshini hisoblaydi (qayta ishga tushirish xavfsiz)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="Hisob oyi, YYYY-MM (standart: o'tgan oy)")
+        parser.add_argument('--branch', type=int, action='append', dest='branches', help="Faqat shu filial(lar)")
+        parser.add_argument('--paid-by', required=True, help="To'lovni amalga oshirgan foydalanuvchi (username)")
+        parser.add_argument('--paid-date', help="To'lov sanasi, YYYY-MM-DD (standart: oyning oxirgi kuni)")
+        parser.add_argument('--payment-type', choices=PaymentType.values, default=PaymentType.CASH)
+        parser.add_argument('--dry-run', action='store_true', help="Faqat hisoblab ko'rsatadi, yozmaydi")
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("--month must look like YYYY-MM")
+        else:
+            month = (date.today().replace(day=1) - date.resolution).replace(day=1)
+
+        paid_date = None
+        if options['paid_date']:
+            try:
+                paid_date = date.fromisoformat(options['paid_date'])
+            except ValueError:
+                raise CommandError("--paid-date must look like YYYY-MM-DD")
+
+        try:
+            paid_by = User.objects.get(username=options['paid_by'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['paid_by']!r} does not exist")
+
+        if options['dry_run']:
+            branches = Branch.objects.filter(status=Status.ACTIVE)
+            if options['branches']:
+                branches = branches.filter(pk__in=options['branches'])
+            for branch_id in branches.values_list('pk', flat=True):
+                for teacher, lessons, hours, amount in compute_payroll(branch_id, month):
+                    self.stdout.write(f"Branch {branch_id}: {teacher} - {lessons} lessons, {hours:.2f} h, {amount}")
+            return
+
+        results = run_payroll(
+            month,
+            paid_by,
+            branch_ids=options['branches'],
+            paid_date=paid_date,
+            payment_type=options['payment_type'],
+        )
+        for branch_id, salaries in sorted(results.items()):
+            self.stdout.write(f"Branch {branch_id}: {len(salaries)} salaries, {sum(s.amount for s in salaries)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Payroll {month.strftime('%Y-%m')}: {sum(len(s) for s in results.values())} salaries in {len(results)} branches"
+        ))
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:17
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_initial'),
+        ('student', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='expensecategory',
+            options={},
+        ),
+        migrations.AlterField(
+            model_name='additionalincome',
+            name='payment_type',
+            field=models.CharField(choices=[('cash', 'Naqd'), ('card', 'Karta'), ('transfer', 'Otkazma'), ('other', 'Boshqa')], default='cash', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='payment_type',
+            field=models.CharField(choices=[('cash', 'Naqd'), ('card', 'Karta'), ('transfer', 'Otkazma'), ('other', 'Boshqa')], default='cash', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='salary',
+            name='payment_type',
+            field=models.CharField(choices=[('cash', 'Naqd'), ('card', 'Karta'), ('transfer', 'Otkazma'), ('other', 'Boshqa')], default='cash', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='studentpayment',
+            name='payment_type',
+            field=models.CharField(choices=[('cash', 'Naqd'), ('card', 'Karta'), ('transfer', 'Otkazma'), ('other', 'Boshqa')], default='cash', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('charge', 'Hisoblangan'), ('payment', "To'lov"), ('adjustment', 'Tuzatish')], max_length=20)),
+                ('amount', models.IntegerField(help_text="Qarzga ta'siri: hisoblangan (+), to'lov (-)")),
+                ('date', models.DateField(default=datetime.date.today)),
+                ('period', models.DateField(blank=True, help_text='Hisob oyi (oyning birinchi kuni)', null=True)),
+                ('note', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='finance.studentpayment')),
+                ('student_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='student.studentgroup')),
+            ],
+            options={
+                'verbose_name_plural': 'Ledger entries',
+                'indexes': [models.Index(fields=['student_group', 'date'], name='finance_led_student_7329c1_idx')],
+            },
+        ),
+    ]
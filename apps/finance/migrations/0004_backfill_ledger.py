@@ -0,0 +1,60 @@
+from datetime import date
+
+from django.db import migrations
+from django.db.models import Min, Sum
+
+
+def backfill_ledger(apps, schema_editor):
+    """
+    Seed the ledger so it reproduces the debts computed by the old
+    StudentPayment.save(): every existing payment becomes a payment entry and
+    each student gets one opening adjustment for the remainder.
+    """
+    LedgerEntry = apps.get_model('finance', 'LedgerEntry')
+    StudentPayment = apps.get_model('finance', 'StudentPayment')
+    StudentDebt = apps.get_model('finance', 'StudentDebt')
+    StudentGroup = apps.get_model('student', 'StudentGroup')
+
+    entries = [
+        LedgerEntry(
+            student_group_id=student_group_id,
+            entry_type='payment',
+            amount=-amount,
+            date=payment_date,
+            payment_id=payment_id,
+        )
+        for payment_id, student_group_id, amount, payment_date in StudentPayment.objects.values_list(
+            'id', 'student_group_id', 'amount', 'payment_date'
+        ).iterator()
+    ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+    paid = dict(
+        StudentPayment.objects.values_list('student_group__student_id').annotate(total=Sum('amount'))
+    )
+    first_enrollment = dict(
+        StudentGroup.objects.values_list('student_id').annotate(first=Min('id'))
+    )
+    openings = []
+    for student_id, total_debt, balance in StudentDebt.objects.values_list('student_id', 'total_debt', 'balance'):
+        opening = total_debt - balance + (paid.get(student_id) or 0)
+        if opening and student_id in first_enrollment:
+            openings.append(LedgerEntry(
+                student_group_id=first_enrollment[student_id],
+                entry_type='adjustment',
+                amount=opening,
+                date=date.today(),
+                note="Boshlang'ich qoldiq",
+            ))
+    LedgerEntry.objects.bulk_create(openings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_ledgerentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
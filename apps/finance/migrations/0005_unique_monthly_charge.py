@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_backfill_ledger'),
+        ('student', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='ledgerentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('entry_type', 'charge')), fields=('student_group', 'period'), name='unique_monthly_charge'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_unique_monthly_charge'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFinanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_type', models.CharField(choices=[('cash', 'Naqd'), ('card', 'Karta'), ('transfer', 'Otkazma'), ('other', 'Boshqa')], max_length=20)),
+                ('student_payments', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('additional_incomes', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('salary_expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('other_expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='finance_rollups', to='users.branch')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('branch', 'date', 'payment_type'), name='unique_daily_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Sum
+
+FIELDS = ('student_payments', 'additional_incomes', 'salary_expenses', 'other_expenses')
+
+
+def backfill_rollup(apps, schema_editor):
+    DailyFinanceRollup = apps.get_model('finance', 'DailyFinanceRollup')
+    StudentPayment = apps.get_model('finance', 'StudentPayment')
+    AdditionalIncome = apps.get_model('finance', 'AdditionalIncome')
+    Expense = apps.get_model('finance', 'Expense')
+
+    totals = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+    for branch_id, day, payment_type, total in StudentPayment.objects.values_list(
+        'branch_id', 'payment_date', 'payment_type'
+    ).annotate(total=Sum('amount')):
+        totals[branch_id, day, payment_type]['student_payments'] += total
+
+    for branch_id, day, payment_type, total in AdditionalIncome.objects.values_list(
+        'branch_id', 'date', 'payment_type'
+    ).annotate(total=Sum('amount')):
+        totals[branch_id, day, payment_type]['additional_incomes'] += total
+
+    for branch_id, day, payment_type, is_salary, total in Expense.objects.values_list(
+        'branch_id', 'date', 'payment_type', 'category__is_salary'
+    ).annotate(total=Sum('amount')):
+        totals[branch_id, day, payment_type]['salary_expenses' if is_salary else 'other_expenses'] += total
+
+    DailyFinanceRollup.objects.bulk_create(
+        [
+            DailyFinanceRollup(branch_id=branch_id, date=day, payment_type=payment_type, **values)
+            for (branch_id, day, payment_type), values in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_dailyfinancerollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
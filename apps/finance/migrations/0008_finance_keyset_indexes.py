@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_backfill_dailyfinancerollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='additionalincome',
+            index=models.Index(fields=['branch', 'date', 'id'], name='finance_add_branch__6e6d60_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['branch', 'date', 'id'], name='finance_exp_branch__d123fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salary',
+            index=models.Index(fields=['branch', 'paid_date', 'id'], name='finance_sal_branch__a0e8a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentpayment',
+            index=models.Index(fields=['branch', 'payment_date', 'id'], name='finance_stu_branch__ac92f9_idx'),
+        ),
+    ]
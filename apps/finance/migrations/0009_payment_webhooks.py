@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_finance_keyset_indexes'),
+        ('student', '0002_initial'),
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=30)),
+                ('transaction_id', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Kutilmoqda'), ('processed', 'Qayta ishlangan'), ('duplicate', 'Takroriy'), ('failed', 'Xato')], default='pending', max_length=20)),
+                ('error', models.CharField(blank=True, max_length=255, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='studentpayment',
+            name='provider',
+            field=models.CharField(blank=True, help_text="To'lov tizimi (webhook orqali kelgan to'lovlar uchun)", max_length=30, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentpayment',
+            name='provider_transaction_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='studentpayment',
+            constraint=models.UniqueConstraint(condition=models.Q(('provider_transaction_id__isnull', False)), fields=('provider', 'provider_transaction_id'), name='unique_provider_transaction'),
+        ),
+        migrations.AddField(
+            model_name='paymentwebhookevent',
+            name='payment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='webhook_events', to='finance.studentpayment'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentwebhookevent',
+            index=models.Index(fields=['status', 'id'], name='finance_pay_status_714da6_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentwebhookevent',
+            constraint=models.UniqueConstraint(fields=('provider', 'transaction_id'), name='unique_webhook_event'),
+        ),
+    ]
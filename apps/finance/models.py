@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Sum
 from datetime import date
 
@@ -38,116 +38,109 @@ class StudentPayment(models.Model):
     note = models.TextField(blank=True, null=True)
     received_by = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='received_payments')
     branch = models.ForeignKey('users.Branch', on_delete=models.CASCADE, related_name='student_payments')
+    provider = models.CharField(max_length=30, blank=True, null=True, help_text="To'lov tizimi (webhook orqali kelgan to'lovlar uchun)")
+    provider_transaction_id = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'payment_date', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['provider', 'provider_transaction_id'],
+                condition=models.Q(provider_transaction_id__isnull=False),
+                name='unique_provider_transaction',
+            ),
+        ]
+
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)  
-        
-        debt, created = StudentDebt.objects.get_or_create(student=self.student_group.student)
-        debt.last_payment_date = self.payment_date
-        
-        # Qarzni qayta hisoblash
-        from apps.student.models import StudentGroup
-        from django.utils import timezone
-        import calendar
-        from datetime import datetime
-        
-        student_groups = StudentGroup.objects.filter(student=self.student_group.student, status='active')
-        
-        total_required = 0
-        total_paid = 0
-        total_remaining = 0
-        
-        for sg in student_groups:
-            payments = StudentPayment.objects.filter(student_group=sg)
-            paid = payments.aggregate(Sum('amount'))['amount__sum'] or 0
-            total_paid += paid
-            
-            joined_date = sg.joined_date
-            today = timezone.now().date()
-            
-            from apps.student.models import Attendance
-            attended_lessons = Attendance.objects.filter(
-                student=sg.student,
-                group=sg.group,
-                date__gte=joined_date,
-                date__lte=today,
-                status='present'
-            ).count()
-            lessons_per_week = sg.group.lessons_per_week if hasattr(sg.group, 'lessons_per_week') else 3
-            lessons_per_month = lessons_per_week * 4  
-            price_per_lesson = sg.group.price_per_month / lessons_per_month
-            
-            current_month_start = datetime(today.year, today.month, 1).date()
-            days_in_month = calendar.monthrange(today.year, today.month)[1]
-            current_month_end = datetime(today.year, today.month, days_in_month).date()
-            
-            if joined_date.month == today.month and joined_date.year == today.year:
-                remaining_days = days_in_month - joined_date.day + 1
-                first_month_payment = (sg.group.price_per_month * remaining_days) / days_in_month
-                
-                expected_lessons = (lessons_per_month * remaining_days / days_in_month)
-                
-                lessons_remaining = expected_lessons - attended_lessons
-                remaining_payment = max(0, price_per_lesson * lessons_remaining)
-                
-                total_required += first_month_payment
-                total_remaining += remaining_payment
-                
-            else:
-                months_passed = (today.year - joined_date.year) * 12 + today.month - joined_date.month
-                
-                if joined_date.day > 1 and months_passed > 0:
-                    days_in_first_month = calendar.monthrange(joined_date.year, joined_date.month)[1]
-                    remaining_days = days_in_first_month - joined_date.day + 1
-                    first_month_payment = (sg.group.price_per_month * remaining_days) / days_in_first_month
-                    full_months_payment = sg.group.price_per_month * (months_passed - 1)
-                    
-                    current_month_attended = Attendance.objects.filter(
-                        student=sg.student,
-                        group=sg.group,
-                        date__gte=current_month_start,
-                        date__lte=today,
-                        status='present'
-                    ).count()
-                    
-                    remaining_lessons = lessons_per_month - current_month_attended
-                    current_month_remaining = max(0, price_per_lesson * remaining_lessons)
-                    
-                    total_required += first_month_payment + full_months_payment + sg.group.price_per_month
-                    total_remaining += current_month_remaining
-                else:
-                    required = sg.group.price_per_month * months_passed
-                    
-                    current_month_attended = Attendance.objects.filter(
-                        student=sg.student,
-                        group=sg.group,
-                        date__gte=current_month_start,
-                        date__lte=today,
-                        status='present'
-                    ).count()
-                    
-                    remaining_lessons = lessons_per_month - current_month_attended
-                    current_month_remaining = max(0, price_per_lesson * remaining_lessons)
-                    
-                    total_required += required
-                    total_remaining += current_month_remaining
-        
-        debt.total_debt = max(0, total_required - total_paid)
-        debt.current_month_remaining = total_remaining
-        debt.balance = max(0, total_paid - total_required)
-        debt.save()
+        from apps.finance.ledger import record_payment
+
+        created = self.pk is None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            record_payment(self, created=created)
 
     def __str__(self):
         return f"{self.student_group.student.get_full_name()} - {self.payment_date} - {self.amount}"
 
+class WebhookStatus(models.TextChoices):
+    PENDING = 'pending', 'Kutilmoqda'
+    PROCESSED = 'processed', 'Qayta ishlangan'
+    DUPLICATE = 'duplicate', 'Takroriy'
+    FAILED = 'failed', 'Xato'
+
+class PaymentWebhookEvent(models.Model):
+    """Inbox row of a verified gateway callback; the drainer turns it into a StudentPayment."""
+    provider = models.CharField(max_length=30)
+    transaction_id = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=WebhookStatus.choices, default=WebhookStatus.PENDING)
+    error = models.CharField(max_length=255, blank=True, null=True)
+    payment = models.ForeignKey(StudentPayment, on_delete=models.SET_NULL, null=True, blank=True, related_name='webhook_events')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'transaction_id'], name='unique_webhook_event'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} - {self.transaction_id} - {self.get_status_display()}"
+
+class LedgerEntryType(models.TextChoices):
+    CHARGE = 'charge', 'Hisoblangan'
+    PAYMENT = 'payment', "To'lov"
+    ADJUSTMENT = 'adjustment', 'Tuzatish'
+
+class LedgerEntry(models.Model):
+    """Append-only charge/payment record of an enrollment; StudentDebt is the running sum."""
+    student_group = models.ForeignKey('student.StudentGroup', on_delete=models.CASCADE, related_name='ledger_entries')
+    entry_type = models.CharField(max_length=20, choices=LedgerEntryType.choices)
+    amount = models.IntegerField(help_text="Qarzga ta'siri: hisoblangan (+), to'lov (-)")
+    date = models.DateField(default=date.today)
+    period = models.DateField(null=True, blank=True, help_text="Hisob oyi (oyning birinchi kuni)")
+    payment = models.ForeignKey(StudentPayment, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries')
+    note = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Ledger entries"
+        indexes = [
+            models.Index(fields=['student_group', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student_group', 'period'],
+                condition=models.Q(entry_type='charge'),
+                name='unique_monthly_charge',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.student_group} - {self.get_entry_type_display()} - {self.amount}"
+
 class ExpenseCategory(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
     is_salary = models.BooleanField(default=False)  
     
-    
+    SALARY_CATEGORY_NAME = "oqituvchi maoshi"
+
+    @classmethod
+    def salary_category(cls):
+        category, _ = cls.objects.get_or_create(
+            name=cls.SALARY_CATEGORY_NAME,
+            defaults={'is_salary': True}
+        )
+        return category
+
     def __str__(self):
         return self.name
 
@@ -163,6 +156,11 @@ class Expense(models.Model):
     created_by = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='created_expenses')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'date', 'id']),
+        ]
+
     def __str__(self):
         return f"{self.category.name} - {self.amount} so'm ({self.date})"
     
@@ -179,31 +177,34 @@ class Salary(models.Model):
 
     class Meta:
         verbose_name_plural = "Salaries"
+        indexes = [
+            models.Index(fields=['branch', 'paid_date', 'id']),
+        ]
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         super().save(*args, **kwargs)
         
         if is_new and not self.expense:
-            salary_category, _ = ExpenseCategory.objects.get_or_create(
-                name="oqituvchi maoshi",
-                defaults={'is_salary': True}
-            )
-            
-            expense = Expense.objects.create(
-                category=salary_category,
-                branch=self.branch,
-                amount=self.amount,
-                payment_type=self.payment_type,
-                date=self.paid_date,
-                description=f"{self.teacher.get_full_name()} uchun {self.month.strftime('%B %Y')} oylik maoshi",
-                recipient=self.teacher.get_full_name(),
-                created_by=self.paid_by
-            )
+            expense = self.build_expense(ExpenseCategory.salary_category())
+            expense.save()
             
             self.expense = expense
             super().save(update_fields=['expense'])
 
+    def build_expense(self, salary_category):
+        """Unsaved Expense that books this salary in the branch expenses."""
+        return Expense(
+            category=salary_category,
+            branch=self.branch,
+            amount=self.amount,
+            payment_type=self.payment_type,
+            date=self.paid_date,
+            description=f"{self.teacher.get_full_name()} uchun {self.month.strftime('%B %Y')} oylik maoshi",
+            recipient=self.teacher.get_full_name(),
+            created_by=self.paid_by
+        )
+
     def __str__(self):
         return f'{self.teacher.get_full_name()} - {self.month.strftime("%B %Y")}'
 
@@ -217,10 +218,34 @@ class AdditionalIncome(models.Model):
     receipt_number = models.CharField(max_length=50, blank=True, null=True)
     created_by = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='created_incomes')
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'date', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.amount} so'm ({self.date})"
 
+class DailyFinanceRollup(models.Model):
+    """Per-branch, per-day, per-payment_type totals kept in step with finance writes."""
+    branch = models.ForeignKey('users.Branch', on_delete=models.CASCADE, related_name='finance_rollups')
+    date = models.DateField()
+    payment_type = models.CharField(max_length=20, choices=PaymentType.choices)
+    student_payments = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    additional_incomes = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    salary_expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    other_expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'date', 'payment_type'], name='unique_daily_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.branch.name} - {self.date} ({self.get_payment_type_display()})"
+
 class FinancialReport(models.Model):
     REPORT_PERIOD = (
         ('daily', 'Daily'),
@@ -244,32 +269,20 @@ class FinancialReport(models.Model):
     created_by = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='created_financial_reports')
     
     def calculate_report(self):
-        from apps.finance.models import StudentPayment
-        student_payments = StudentPayment.objects.filter(
-            branch=self.branch,
-            payment_date__gte=self.start_date,
-            payment_date__lte=self.end_date
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        additional = AdditionalIncome.objects.filter(
+        totals = DailyFinanceRollup.objects.filter(
             branch=self.branch,
             date__gte=self.start_date,
             date__lte=self.end_date
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        salaries = Expense.objects.filter(
-            branch=self.branch,
-            date__gte=self.start_date,
-            date__lte=self.end_date,
-            category__is_salary=True
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        other_exp = Expense.objects.filter(
-            branch=self.branch,
-            date__gte=self.start_date,
-            date__lte=self.end_date,
-            category__is_salary=False
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
+        ).aggregate(
+            student_payments=Sum('student_payments'),
+            additional_incomes=Sum('additional_incomes'),
+            salary_expenses=Sum('salary_expenses'),
+            other_expenses=Sum('other_expenses'),
+        )
+        student_payments = totals['student_payments'] or 0
+        additional = totals['additional_incomes'] or 0
+        salaries = totals['salary_expenses'] or 0
+        other_exp = totals['other_expenses'] or 0
         
         self.student_payments = student_payments
         self.additional_incomes = additional
@@ -0,0 +1,115 @@
+import base64
+from datetime import date
+
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Newest-first pagination on ``(date, id)``.
+
+    The cursor carries the last row's date and id, so every page is an index
+    range scan and nothing is ever counted. The date column comes from the
+    view's ``keyset_date_field``.
+    """
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.date_field = getattr(view, 'keyset_date_field', 'date')
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(f'-{self.date_field}', '-id')
+        cursor = self.decode_cursor(request)
+        if cursor:
+            cursor_date, cursor_id = cursor
+            queryset = queryset.filter(
+                Q(**{f'{self.date_field}__lt': cursor_date})
+                | Q(**{self.date_field: cursor_date, 'id__lt': cursor_id})
+            )
+
+        results = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            last = results[-1]
+            self.next_cursor = self.encode_cursor(getattr(last, self.date_field), last.pk)
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, cursor_date, cursor_id):
+        raw = f'{cursor_date.isoformat()}:{cursor_id}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode()).decode()
+            cursor_date, cursor_id = raw.split(':')
+            return date.fromisoformat(cursor_date), int(cursor_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        url = self.request.build_absolute_uri()
+        if not self.next_cursor:
+            return None
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'links': {
+                'next': self.get_next_link(),
+                'first': self.get_first_link()
+            },
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'links': {
+                    'type': 'object',
+                    'properties': {
+                        'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                        'first': {'type': 'string', 'format': 'uri'},
+                    },
+                },
+                'results': schema,
+            },
+        }
+
+
+class CustomPagination(pagination.PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_paginated_response(self, data):
+        return Response({
+            'links': {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link()
+            },
+            'count': self.page.paginator.count,
+            'results': data
+        })
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+
+from apps.finance.billing import month_bounds
+from apps.finance.models import Expense, ExpenseCategory, PaymentType, Salary
+from apps.finance.rollup import apply_deltas, collect_deltas
+from apps.student.models import Attendance
+from apps.teacher.models import Group, Schedule, Teacher
+from apps.users.models import Branch, Status
+
+HOUR = Decimal(3600)
+
+
+def _hours(start_time, end_time):
+    start = datetime.combine(datetime.min, start_time)
+    end = datetime.combine(datetime.min, end_time)
+    return Decimal((end - start).total_seconds()) / HOUR
+
+
+def held_lessons(branch_id, month):
+    """
+    ``{teacher_id: [(group_id, date, hours), ...]}`` for lessons held in a branch.
+
+    A lesson counts as held when attendance was marked for the group on a day
+    its schedule has a slot. Groups without any Schedule rows fall back to
+    the group's own teacher and hours. Three queries whatever the size.
+    """
+    month, month_end = month_bounds(month)
+
+    held_dates = defaultdict(set)
+    attendance = Attendance.objects.filter(
+        student_group__group__branch_id=branch_id,
+        date__range=(month, month_end),
+    ).values_list('student_group__group_id', 'date').distinct()
+    for group_id, day in attendance:
+        held_dates[group_id].add(day)
+    if not held_dates:
+        return {}
+
+    slots = defaultdict(list)
+    schedules = Schedule.objects.filter(group_id__in=held_dates).values_list(
+        'group_id', 'teacher_id', 'day_of_week', 'start_time', 'end_time'
+    )
+    for group_id, teacher_id, day_of_week, start_time, end_time in schedules:
+        slots[group_id, int(day_of_week)].append((teacher_id, _hours(start_time, end_time)))
+    scheduled_groups = {group_id for group_id, _ in slots}
+
+    fallback = {
+        group_id: (teacher_id, _hours(start_time, end_time))
+        for group_id, teacher_id, start_time, end_time in Group.objects.filter(
+            pk__in=set(held_dates) - scheduled_groups
+        ).values_list('pk', 'teacher_id', 'start_time', 'end_time')
+    }
+
+    lessons = defaultdict(list)
+    for group_id, days in held_dates.items():
+        for day in sorted(days):
+            if group_id in scheduled_groups:
+                day_slots = slots.get((group_id, day.isoweekday()), ())
+            else:
+                day_slots = [fallback[group_id]]
+            for teacher_id, hours in day_slots:
+                lessons[teacher_id].append((group_id, day, hours))
+    return lessons
+
+
+def compute_payroll(branch_id, month):
+    """
+    Salary lines of a branch for ``month`` as ``[(teacher, lessons, hours, amount)]``.
+
+    Teachers who already have a Salary for this branch and month are left out,
+    so a rerun only pays whoever was missed.
+    """
+    month = month.replace(day=1)
+    lessons = held_lessons(branch_id, month)
+    already_paid = set(
+        Salary.objects.filter(branch_id=branch_id, month=month, teacher_id__in=lessons)
+        .values_list('teacher_id', flat=True)
+    )
+    teachers = Teacher.objects.select_related('user').in_bulk(set(lessons) - already_paid)
+
+    lines = []
+    for teacher_id, teacher in sorted(teachers.items()):
+        hours = sum((hours for _, _, hours in lessons[teacher_id]), Decimal(0))
+        amount = (hours * teacher.hourly_rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        if amount > 0:
+            lines.append((teacher, len(lessons[teacher_id]), hours, amount))
+    return lines
+
+
+def pay_branch(branch_id, month, paid_by, paid_date=None, payment_type=PaymentType.CASH, batch_size=1000):
+    """
+    Create the Salary/Expense pairs of one branch in a single transaction.
+
+    Salary.save() is bypassed: expenses and salaries are bulk inserted and the
+    finance rollup is shifted once. Returns the created Salary objects.
+    """
+    month = month.replace(day=1)
+    paid_date = paid_date or month_bounds(month)[1]
+
+    with transaction.atomic():
+        # Bir filial uchun parallel ishga tushirishlarni navbatga qo'yadi
+        branch = Branch.objects.select_for_update().get(pk=branch_id)
+        lines = compute_payroll(branch_id, month)
+        if not lines:
+            return []
+
+        salary_category = ExpenseCategory.salary_category()
+        salaries = [
+            Salary(
+                teacher=teacher,
+                amount=amount,
+                month=month,
+                paid_date=paid_date,
+                payment_type=payment_type,
+                paid_by=paid_by,
+                branch=branch,
+                note=f"{lessons} dars, {hours.normalize():f} soat",
+            )
+            for teacher, lessons, hours, amount in lines
+        ]
+        expenses = Expense.objects.bulk_create(
+            [salary.build_expense(salary_category) for salary in salaries],
+            batch_size=batch_size,
+        )
+        for salary, expense in zip(salaries, expenses):
+            salary.expense = expense
+        Salary.objects.bulk_create(salaries, batch_size=batch_size)
+        apply_deltas(collect_deltas(expenses), batch_size=batch_size)
+
+    return salaries
+
+
+def run_payroll(month, paid_by, branch_ids=None, **kwargs):
+    """Pay every (or the given) active branch. Returns ``{branch_id: salaries}``."""
+    branches = Branch.objects.filter(status=Status.ACTIVE)
+    if branch_ids:
+        branches = branches.filter(pk__in=branch_ids)
+    return {
+        branch_id: pay_branch(branch_id, month, paid_by, **kwargs)
+        for branch_id in branches.values_list('pk', flat=True)
+    }
@@ -0,0 +1,77 @@
+"""
+Minimal single-page PDF writer for receipts.
+
+Kept free of Django imports so that it can run in worker processes. The
+output is deterministic: the same document always gives the same bytes.
+"""
+
+PAGE_WIDTH = 298  # A6, pt
+PAGE_HEIGHT = 420
+MARGIN = 24
+
+
+def _text(value):
+    # Standart Helvetica shrifti faqat WinAnsi (cp1252) belgilarini biladi
+    raw = str(value).replace('ʻ', "'").replace('ʼ', "'").encode('cp1252', errors='replace')
+    return raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _line(x, y, value, font='F1', size=10):
+    return b'BT /%s %d Tf %d %d Td (%s) Tj ET\n' % (font.encode(), size, x, y, _text(value))
+
+
+def _content(document):
+    y = PAGE_HEIGHT - MARGIN - 14
+    parts = [_line(MARGIN, y, document['title'], font='F2', size=14)]
+    y -= 18
+    if document.get('subtitle'):
+        parts.append(_line(MARGIN, y, document['subtitle'], size=9))
+        y -= 14
+    parts.append(b'%d %d m %d %d l S\n' % (MARGIN, y, PAGE_WIDTH - MARGIN, y))
+    y -= 20
+
+    for label, value in document['rows']:
+        parts.append(_line(MARGIN, y, label, size=9))
+        parts.append(_line(MARGIN + 100, y, value, font='F2', size=10))
+        y -= 18
+
+    y -= 6
+    parts.append(b'%d %d m %d %d l S\n' % (MARGIN, y, PAGE_WIDTH - MARGIN, y))
+    y -= 22
+    parts.append(_line(MARGIN, y, document['total_label'], font='F2', size=12))
+    parts.append(_line(MARGIN + 100, y, document['total'], font='F2', size=12))
+    if document.get('footer'):
+        parts.append(_line(MARGIN, MARGIN, document['footer'], size=8))
+    return b''.join(parts)
+
+
+def render_receipt(document):
+    """
+    Render ``document`` as PDF bytes.
+
+    ``document`` is a plain dict: ``title``, optional ``subtitle``, ``rows`` as
+    ``[(label, value), ...]``, ``total_label``, ``total`` and optional ``footer``.
+    """
+    content = _content(document)
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+        b'/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>' % (PAGE_WIDTH, PAGE_HEIGHT),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d >>\nstream\n%sendstream' % (len(content), content),
+    ]
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
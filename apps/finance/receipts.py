@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.finance.models import StudentPayment
+from apps.finance.pdf import render_receipt
+
+# Shablon o'zgarsa oshiring: eski keshdagi fayllar avtomatik eskiradi
+RECEIPT_TEMPLATE_VERSION = 1
+
+_executor = None
+
+
+def receipts_root():
+    return os.path.join(settings.MEDIA_ROOT, 'receipts')
+
+
+def get_executor():
+    """Process pool shared by the receipt renders of this process (None = inline)."""
+    global _executor
+    workers = getattr(settings, 'RECEIPT_WORKERS', min(4, os.cpu_count() or 1))
+    if workers <= 0:
+        return None
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+def _money(amount):
+    return f"{int(amount):,}".replace(',', ' ') + " so'm"
+
+
+def student_payment_document(payment):
+    student_group = payment.student_group
+    period = ''
+    if payment.period_start and payment.period_end:
+        period = f"{payment.period_start:%d.%m.%Y} - {payment.period_end:%d.%m.%Y}"
+    return {
+        'title': payment.branch.name,
+        'subtitle': f"To'lov cheki No {payment.receipt_number or f'SP-{payment.pk}'}",
+        'rows': [
+            ("Sana", payment.payment_date.strftime('%d.%m.%Y')),
+            ("O'quvchi", student_group.student.get_full_name()),
+            ("Guruh", student_group.group.title),
+            ("Davr", period or payment.get_period_display()),
+            ("To'lov turi", payment.get_payment_type_display()),
+            ("Qabul qildi", payment.received_by.get_full_name() or payment.received_by.username),
+        ],
+        'total_label': "Jami",
+        'total': _money(payment.amount),
+        'footer': payment.branch.address or '',
+    }
+
+
+def subscription_payment_document(payment):
+    subscription = payment.subscription
+    return {
+        'title': "Obuna to'lovi",
+        'subtitle': f"Chek No {payment.receipt_number or f'SUB-{payment.pk}'}",
+        'rows': [
+            ("Sana", timezone.localtime(payment.payment_date).strftime('%d.%m.%Y %H:%M')),
+            ("Filial", subscription.branch.name),
+            ("Tarif", subscription.plan.name),
+            ("Muddat", f"{subscription.start_date:%d.%m.%Y} - {subscription.end_date:%d.%m.%Y}"),
+            ("To'lov usuli", payment.payment_method),
+            ("Tranzaksiya", payment.transaction_id or '-'),
+        ],
+        'total_label': "Jami",
+        'total': _money(payment.amount),
+        'footer': '',
+    }
+
+
+def receipt_document(payment):
+    from apps.owner.models import SubscriptionPayment
+
+    if isinstance(payment, StudentPayment):
+        return student_payment_document(payment)
+    if isinstance(payment, SubscriptionPayment):
+        return subscription_payment_document(payment)
+    raise TypeError(f"No receipt for {type(payment).__name__}")
+
+
+def content_hash(document):
+    raw = json.dumps([RECEIPT_TEMPLATE_VERSION, document], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def cache_path(digest):
+    return os.path.join(receipts_root(), digest[:2], f'{digest}.pdf')
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(data)
+    os.replace(tmp_path, path)
+
+
+def render_documents(documents, workers=None):
+    """
+    Make sure every document has a cached PDF; returns their cache paths.
+
+    The cache key is the hash of what is printed, so editing a payment gives
+    a new file and reprints of an unchanged one never re-render. Misses are
+    rendered in worker processes: the shared pool when ``workers`` is None,
+    inline when it is 0, otherwise a dedicated pool of that size.
+    """
+    digests = [content_hash(document) for document in documents]
+    missing = {}
+    for digest, document in zip(digests, documents):
+        if digest not in missing and not os.path.exists(cache_path(digest)):
+            missing[digest] = document
+    if not missing:
+        return [cache_path(digest) for digest in digests]
+
+    if workers == 0:
+        executor, owned = None, False
+    elif workers is None:
+        executor, owned = get_executor(), False
+    else:
+        executor, owned = ProcessPoolExecutor(max_workers=workers), True
+
+    try:
+        if executor is None:
+            rendered = map(render_receipt, missing.values())
+        else:
+            rendered = executor.map(render_receipt, missing.values(), chunksize=16)
+        for digest, pdf in zip(missing, rendered):
+            _write_atomic(cache_path(digest), pdf)
+    finally:
+        if owned:
+            executor.shutdown()
+
+    return [cache_path(digest) for digest in digests]
+
+
+def receipt_pdf(payment):
+    """``(filename, path)`` of a payment's receipt, rendering it only on a cache miss."""
+    document = receipt_document(payment)
+    path, = render_documents([document])
+    number = (payment.receipt_number or str(payment.pk)).replace('/', '-')
+    return f"receipt-{number}.pdf", path
+
+
+def daily_archive(branch_id, day, workers=None):
+    """
+    Zip of every receipt a branch issued on ``day`` (student and subscription
+    payments). The archive itself is cached by the hashes of its members.
+    Returns the archive path, or None when there was nothing to print.
+    """
+    from apps.owner.models import SubscriptionPayment
+
+    payments = list(
+        StudentPayment.objects.filter(branch_id=branch_id, payment_date=day)
+        .select_related('student_group__student__user', 'student_group__group', 'received_by', 'branch')
+        .order_by('id')
+    )
+    day_start = timezone.make_aware(datetime.combine(day, time.min))
+    subscriptions = list(
+        SubscriptionPayment.objects.filter(
+            subscription__branch_id=branch_id,
+            payment_date__gte=day_start,
+            payment_date__lt=day_start + timedelta(days=1),
+        ).select_related('subscription__branch', 'subscription__plan').order_by('id')
+    )
+    if not payments and not subscriptions:
+        return None
+
+    members = [
+        (f"SP-{payment.pk}-{payment.receipt_number or ''}".rstrip('-'), student_payment_document(payment))
+        for payment in payments
+    ] + [
+        (f"SUB-{payment.pk}-{payment.receipt_number or ''}".rstrip('-'), subscription_payment_document(payment))
+        for payment in subscriptions
+    ]
+
+    paths = render_documents([document for _, document in members], workers=workers)
+
+    archive_key = hashlib.sha256(''.join(
+        name + os.path.basename(path) for (name, _), path in zip(members, paths)
+    ).encode()).hexdigest()
+    archive_path = os.path.join(receipts_root(), 'archives', f'branch-{branch_id}-{day.isoformat()}-{archive_key[:16]}.zip')
+    if os.path.exists(archive_path):
+        return archive_path
+
+    os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(archive_path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp, zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for (name, _), path in zip(members, paths):
+            archive.write(path, arcname=f"{name.replace('/', '-')}.pdf")
+    os.replace(tmp_path, archive_path)
+    return archive_path
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from apps.finance.caching import bump_finance_version
+from apps.finance.models import (
+    AdditionalIncome, DailyFinanceRollup, Expense, ExpenseCategory, StudentPayment
+)
+
+ROLLUP_FIELDS = ('student_payments', 'additional_incomes', 'salary_expenses', 'other_expenses')
+
+
+def apply_deltas(deltas, batch_size=1000):
+    """
+    Add ``{(branch_id, date, payment_type): {field: amount}}`` to the rollup.
+
+    Missing day rows are inserted first, then all of them are shifted with a
+    batched CASE UPDATE relative to the stored values, so concurrent writers
+    never overwrite each other.
+    """
+    deltas = {
+        key: {field: amount for field, amount in values.items() if amount}
+        for key, values in deltas.items()
+    }
+    deltas = {key: values for key, values in deltas.items() if values}
+    if not deltas:
+        return
+
+    DailyFinanceRollup.objects.bulk_create(
+        [
+            DailyFinanceRollup(branch_id=branch_id, date=day, payment_type=payment_type)
+            for branch_id, day, payment_type in deltas
+        ],
+        ignore_conflicts=True,
+        batch_size=batch_size,
+    )
+
+    fields = sorted({field for values in deltas.values() for field in values})
+    rows = DailyFinanceRollup.objects.filter(
+        branch_id__in={key[0] for key in deltas},
+        date__in={key[1] for key in deltas},
+    ).values_list('pk', 'branch_id', 'date', 'payment_type')
+
+    changed = []
+    for pk, branch_id, day, payment_type in rows:
+        values = deltas.get((branch_id, day, payment_type))
+        if values:
+            changed.append(DailyFinanceRollup(
+                pk=pk, **{field: F(field) + values.get(field, 0) for field in fields}
+            ))
+    DailyFinanceRollup.objects.bulk_update(changed, fields, batch_size=batch_size)
+    bump_finance_version()
+
+
+def contribution(instance, is_salary=None):
+    """``(key, field, amount)`` that a finance row adds to the rollup."""
+    if isinstance(instance, StudentPayment):
+        return (instance.branch_id, instance.payment_date, instance.payment_type), 'student_payments', instance.amount
+    if isinstance(instance, AdditionalIncome):
+        return (instance.branch_id, instance.date, instance.payment_type), 'additional_incomes', instance.amount
+    if isinstance(instance, Expense):
+        if is_salary is None:
+            is_salary = ExpenseCategory.objects.filter(pk=instance.category_id, is_salary=True).exists()
+        field = 'salary_expenses' if is_salary else 'other_expenses'
+        return (instance.branch_id, instance.date, instance.payment_type), field, instance.amount
+    raise TypeError(f"{type(instance).__name__} is not tracked by the finance rollup")
+
+
+def collect_deltas(instances, sign=1, deltas=None):
+    """Accumulate the contribution of many rows (e.g. after bulk_create)."""
+    deltas = deltas if deltas is not None else defaultdict(dict)
+    salary_categories = None
+    for instance in instances:
+        is_salary = None
+        if isinstance(instance, Expense):
+            if salary_categories is None:
+                salary_categories = set(ExpenseCategory.objects.filter(is_salary=True).values_list('pk', flat=True))
+            is_salary = instance.category_id in salary_categories
+        key, field, amount = contribution(instance, is_salary=is_salary)
+        deltas[key][field] = deltas[key].get(field, 0) + sign * Decimal(amount)
+    return deltas
+
+
+def rebuild_rollup(start_date=None, end_date=None, branch_ids=None, batch_size=1000):
+    """
+    Rebuild rollup rows from the source tables with three grouped queries.
+
+    Returns the number of day rows written.
+    """
+    def scoped(queryset, date_field):
+        if start_date:
+            queryset = queryset.filter(**{f'{date_field}__gte': start_date})
+        if end_date:
+            queryset = queryset.filter(**{f'{date_field}__lte': end_date})
+        if branch_ids:
+            queryset = queryset.filter(branch_id__in=branch_ids)
+        return queryset
+
+    with transaction.atomic():
+        totals = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+        payments = scoped(StudentPayment.objects.all(), 'payment_date').values_list(
+            'branch_id', 'payment_date', 'payment_type'
+        ).annotate(total=Sum('amount'))
+        for branch_id, day, payment_type, total in payments:
+            totals[branch_id, day, payment_type]['student_payments'] += total
+
+        incomes = scoped(AdditionalIncome.objects.all(), 'date').values_list(
+            'branch_id', 'date', 'payment_type'
+        ).annotate(total=Sum('amount'))
+        for branch_id, day, payment_type, total in incomes:
+            totals[branch_id, day, payment_type]['additional_incomes'] += total
+
+        expenses = scoped(Expense.objects.all(), 'date').values_list(
+            'branch_id', 'date', 'payment_type', 'category__is_salary'
+        ).annotate(total=Sum('amount'))
+        for branch_id, day, payment_type, is_salary, total in expenses:
+            field = 'salary_expenses' if is_salary else 'other_expenses'
+            totals[branch_id, day, payment_type][field] += total
+
+        scoped(DailyFinanceRollup.objects.all(), 'date').delete()
+        DailyFinanceRollup.objects.bulk_create(
+            [
+                DailyFinanceRollup(branch_id=branch_id, date=day, payment_type=payment_type, **values)
+                for (branch_id, day, payment_type), values in totals.items()
+            ],
+            batch_size=batch_size,
+        )
+        bump_finance_version()
+        return len(totals)
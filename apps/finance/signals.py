@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+from django.db.models import Max, Min
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.finance.models import AdditionalIncome, Expense, ExpenseCategory, StudentPayment
+from apps.finance import rollup
+
+ROLLUP_MODELS = (StudentPayment, AdditionalIncome, Expense)
+
+
+@receiver(pre_delete, sender=StudentPayment)
+def reverse_deleted_payment(sender, instance=None, **kwargs):
+    from apps.finance.ledger import reverse_payment
+    reverse_payment(instance)
+
+
+def remember_rollup_contribution(sender, instance=None, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._rollup_previous = rollup.contribution(previous)
+
+
+def update_rollup_on_save(sender, instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = defaultdict(dict)
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        key, field, amount = previous
+        deltas[key][field] = deltas[key].get(field, 0) - amount
+    key, field, amount = rollup.contribution(instance)
+    deltas[key][field] = deltas[key].get(field, 0) + amount
+    rollup.apply_deltas(deltas)
+
+
+def update_rollup_on_delete(sender, instance=None, **kwargs):
+    rollup.apply_deltas(rollup.collect_deltas([instance], sign=-1))
+
+
+for model in ROLLUP_MODELS:
+    pre_save.connect(remember_rollup_contribution, sender=model, dispatch_uid=f'rollup_pre_save_{model.__name__}')
+    post_save.connect(update_rollup_on_save, sender=model, dispatch_uid=f'rollup_post_save_{model.__name__}')
+    post_delete.connect(update_rollup_on_delete, sender=model, dispatch_uid=f'rollup_post_delete_{model.__name__}')
+
+
+@receiver(pre_save, sender=ExpenseCategory)
+def remember_salary_flag(sender, instance=None, raw=False, **kwargs):
+    instance._salary_flag_changed = bool(
+        not raw and instance.pk
+        and ExpenseCategory.objects.filter(pk=instance.pk).exclude(is_salary=instance.is_salary).exists()
+    )
+
+
+@receiver(post_save, sender=ExpenseCategory)
+def rebucket_category_expenses(sender, instance=None, **kwargs):
+    """Moving a category between salary/other re-buckets the days it touches."""
+    if not getattr(instance, '_salary_flag_changed', False):
+        return
+    expenses = Expense.objects.filter(category=instance)
+    bounds = expenses.aggregate(start=Min('date'), end=Max('date'))
+    if bounds['start']:
+        rollup.rebuild_rollup(
+            bounds['start'], bounds['end'],
+            branch_ids=list(expenses.values_list('branch_id', flat=True).distinct()),
+        )
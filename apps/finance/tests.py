@@ -1,3 +1,101 @@
+from datetime import date, time
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from apps.finance.billing import bill_branch, monthly_charge
+from apps.finance.ledger import rebuild_balances, record_charge
+from apps.finance.models import LedgerEntry, LedgerEntryType, StudentDebt, StudentPayment
+from apps.student.models import StudentGroup
+from apps.teacher.models import Group, Sciences
+from apps.users.models import Branch, User
+
+
+class FinanceTestCase(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Filial')
+        self.admin = User.objects.create(username='admin', phone_number='1', user_role='admin')
+        teacher = User.objects.create(username='teacher', phone_number='2', user_role='teacher').teacher
+        self.group = Group.objects.create(
+            title='Guruh', teacher=teacher, science=Sciences.objects.create(name='Matematika'), branch=self.branch,
+            start_time=time(9), end_time=time(10), price_per_month=Decimal('300000'),
+        )
+        self.enrollment = self.enroll('student', date(2026, 9, 1))
+
+    def enroll(self, username, joined_date):
+        student = User.objects.create(username=username, phone_number='3', user_role='student').student
+        return StudentGroup.objects.create(student=student, group=self.group, joined_date=joined_date)
+
+    def pay(self, amount, enrollment=None):
+        return StudentPayment.objects.create(
+            student_group=enrollment or self.enrollment, amount=amount, received_by=self.admin, branch=self.branch,
+        )
+
+    def debt(self, enrollment=None):
+        debt = StudentDebt.objects.get(student_id=(enrollment or self.enrollment).student_id)
+        return debt.total_debt, debt.balance
+
+
+class StudentPaymentLedgerTests(FinanceTestCase):
+    def test_create_edit_and_delete_move_the_debt(self):
+        record_charge(self.enrollment, 300000, date(2026, 9, 1))
+        payment = self.pay(100000)
+        self.assertEqual(self.debt(), (200000, 0))
+
+        payment.amount = 150000
+        payment.save()
+        self.assertEqual(self.debt(), (150000, 0))
+
+        payment.delete()
+        self.assertEqual(self.debt(), (300000, 0))
+        self.assertEqual(sum(LedgerEntry.objects.values_list('amount', flat=True)), 300000)
+
+    def test_overpayment_becomes_balance(self):
+        record_charge(self.enrollment, 100000, date(2026, 9, 1))
+        self.pay(150000)
+        self.assertEqual(self.debt(), (0, 50000))
+
+        record_charge(self.enrollment, 100000, date(2026, 10, 1))
+        self.assertEqual(self.debt(), (50000, 0))
+
+    def test_deleting_enrollment_removes_its_ledger(self):
+        record_charge(self.enrollment, 300000, date(2026, 9, 1))
+        self.pay(100000)
+        enrollment_id = self.enrollment.pk
+
+        self.enrollment.delete()
+        self.assertFalse(LedgerEntry.objects.filter(student_group_id=enrollment_id).exists())
+        self.assertFalse(StudentPayment.objects.exists())
+
+    def test_rebuild_balances_is_idempotent(self):
+        record_charge(self.enrollment, 300000, date(2026, 9, 1))
+        self.pay(100000)
+        StudentDebt.objects.filter(student_id=self.enrollment.student_id).update(total_debt=1, balance=0)
+
+        first = rebuild_balances()
+        self.assertEqual(first['mismatched'], [self.enrollment.student_id])
+        self.assertEqual(self.debt(), (200000, 0))
+
+        second = rebuild_balances()
+        self.assertEqual(second['mismatched'], [])
+        self.assertEqual(second['created'], 0)
+        self.assertEqual(self.debt(), (200000, 0))
+
+
+class BillingTests(FinanceTestCase):
+    def test_monthly_charge_is_pro_rated_in_the_joining_month(self):
+        self.assertEqual(monthly_charge(Decimal('300000'), date(2026, 9, 1), date(2026, 9, 1)), 300000)
+        self.assertEqual(monthly_charge(Decimal('300000'), date(2026, 9, 16), date(2026, 9, 1)), 150000)
+        self.assertEqual(monthly_charge(Decimal('300000'), date(2026, 9, 16), date(2026, 10, 1)), 300000)
+
+    def test_bill_branch_skips_charged_enrollments(self):
+        late = self.enroll('late', date(2026, 9, 16))
+        self.enroll('future', date(2026, 10, 5))
+
+        self.assertEqual(bill_branch(self.branch.pk, date(2026, 9, 1)), 2)
+        self.assertEqual(self.debt(), (300000, 0))
+        self.assertEqual(self.debt(late), (150000, 0))
+
+        self.assertEqual(bill_branch(self.branch.pk, date(2026, 9, 20)), 0)
+        self.assertEqual(LedgerEntry.objects.filter(entry_type=LedgerEntryType.CHARGE).count(), 2)
+        self.assertEqual(self.debt(), (300000, 0))
@@ -1,16 +1,25 @@
-
 from django.urls import path,include
 from rest_framework.routers import DefaultRouter
+from apps.finance.v1.views.views import (
+    StudentPaymentViewSet, ExpenseViewSet, SalaryViewSet, AdditionalIncomeViewSet, DebtAgingViewSet,
+    PaymentWebhookView
+)
 
 
 router = DefaultRouter()
 router.include_root_view = False
 
+router.register('payments', StudentPaymentViewSet, basename='student-payment')
+router.register('expenses', ExpenseViewSet, basename='expense')
+router.register('salaries', SalaryViewSet, basename='salary')
+router.register('incomes', AdditionalIncomeViewSet, basename='additional-income')
+router.register('debt-aging', DebtAgingViewSet, basename='debt-aging')
 
 
 urlpatterns = [
    
    path('',include(router.urls)),
+   path('webhooks/<str:provider>/', PaymentWebhookView.as_view(), name='payment-webhook'),
 
 
-]
\ No newline at end of file
+]
@@ -0,0 +1,97 @@
+from rest_framework import serializers
+
+from apps.finance.models import StudentPayment, Expense, Salary, AdditionalIncome
+from apps.student.models import StudentGroup
+
+
+class BranchScopedSerializer(serializers.ModelSerializer):
+    """Admins may only write rows for the branches they belong to."""
+
+    def validate_branch(self, value):
+        request = self.context.get('request')
+        if request and request.user.user_role == 'admin' and not request.user.branch.filter(pk=value.pk).exists():
+            raise serializers.ValidationError("Siz faqat o'z filialingiz uchun yozuv qo'sha olasiz.")
+        return value
+
+
+class StudentPaymentSerializer(BranchScopedSerializer):
+    student_name = serializers.CharField(source='student_group.student.get_full_name', read_only=True)
+    group_title = serializers.CharField(source='student_group.group.title', read_only=True)
+    received_by_name = serializers.CharField(source='received_by.get_full_name', read_only=True)
+
+    class Meta:
+        model = StudentPayment
+        fields = ['id', 'student_group', 'student_name', 'group_title', 'payment_date',
+                 'period', 'period_start', 'period_end', 'amount', 'payment_type',
+                 'receipt_number', 'note', 'received_by', 'received_by_name', 'branch',
+                 'created_at', 'updated_at']
+        read_only_fields = ['received_by', 'created_at', 'updated_at']
+
+    def validate(self, data):
+        student_group = data.get('student_group', getattr(self.instance, 'student_group', None))
+        branch = data.get('branch', getattr(self.instance, 'branch', None))
+        if student_group and branch and student_group.group.branch_id != branch.pk:
+            raise serializers.ValidationError(
+                {"branch": "Student group does not belong to this branch"}
+            )
+        if data.get('amount') is not None and data['amount'] <= 0:
+            raise serializers.ValidationError({"amount": "Amount must be positive"})
+        return data
+
+
+class ExpenseSerializer(BranchScopedSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+
+    class Meta:
+        model = Expense
+        fields = ['id', 'category', 'category_name', 'branch', 'amount', 'payment_type',
+                 'date', 'description', 'recipient', 'receipt_number',
+                 'created_by', 'created_by_name', 'created_at']
+        read_only_fields = ['created_by', 'created_at']
+
+
+class SalarySerializer(BranchScopedSerializer):
+    teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
+    paid_by_name = serializers.CharField(source='paid_by.get_full_name', read_only=True)
+
+    class Meta:
+        model = Salary
+        fields = ['id', 'teacher', 'teacher_name', 'amount', 'month', 'paid_date',
+                 'payment_type', 'paid_by', 'paid_by_name', 'branch', 'note', 'expense']
+        read_only_fields = ['paid_by', 'expense']
+
+
+class AdditionalIncomeSerializer(BranchScopedSerializer):
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+
+    class Meta:
+        model = AdditionalIncome
+        fields = ['id', 'title', 'branch', 'amount', 'payment_type', 'date', 'description',
+                 'receipt_number', 'created_by', 'created_by_name', 'created_at']
+        read_only_fields = ['created_by', 'created_at']
+
+
+class DebtorSerializer(serializers.ModelSerializer):
+    student_name = serializers.CharField(source='student.get_full_name', read_only=True)
+    phone_number = serializers.CharField(source='student.user.phone_number', read_only=True)
+    group_title = serializers.CharField(source='group.title', read_only=True)
+    teacher = serializers.IntegerField(source='group.teacher_id', read_only=True)
+    teacher_name = serializers.CharField(source='group.teacher.get_full_name', read_only=True)
+    outstanding = serializers.IntegerField(read_only=True)
+    last_payment = serializers.DateField(read_only=True)
+    first_charge = serializers.DateField(read_only=True)
+    since = serializers.DateField(read_only=True)
+    days_overdue = serializers.SerializerMethodField()
+    bucket = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = StudentGroup
+        fields = ['id', 'student', 'student_name', 'phone_number', 'group', 'group_title',
+                 'teacher', 'teacher_name', 'outstanding', 'last_payment', 'first_charge',
+                 'since', 'days_overdue', 'bucket']
+
+    def get_days_overdue(self, obj):
+        if obj.since is None:
+            return None
+        return (self.context['today'] - obj.since).days
@@ -0,0 +1,349 @@
+from datetime import date
+
+from django.http import FileResponse
+from django.utils import timezone
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.finance.aging import BUCKET_NAMES, aging_totals, debtor_enrollments, pivot_buckets
+from apps.finance.exports import EXPORT_FORMATS, streaming_export
+from apps.finance.gateways import InvalidSignature, get_provider, ingest_webhook
+from apps.finance.models import StudentPayment, Expense, Salary, AdditionalIncome
+from apps.finance.paginations import CustomPagination, KeysetPagination
+from apps.finance.receipts import daily_archive, receipt_pdf
+from apps.finance.v1.serializers.serializers import (
+    StudentPaymentSerializer, ExpenseSerializer, SalarySerializer, AdditionalIncomeSerializer,
+    DebtorSerializer
+)
+from apps.student.models import StudentGroup
+from apps.users.permissions import IsAuthenticated, CanManagePayment
+
+
+class BranchFinanceViewSet(viewsets.ModelViewSet):
+    """
+    Base viewset for finance rows that belong to a branch.
+
+    Owners see every branch, admins only their own. Lists are keyset
+    paginated on (keyset_date_field, id) and ``export`` streams the same
+    filtered rows as CSV or XLSX.
+    """
+    permission_classes = [IsAuthenticated, CanManagePayment]
+    pagination_class = KeysetPagination
+    keyset_date_field = 'date'
+    created_by_field = 'created_by'
+    export_filename = 'export'
+    export_columns = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+
+        if user.user_role == 'admin':
+            queryset = queryset.filter(branch__in=user.branch.all())
+        elif user.user_role != 'owner':
+            return queryset.none()
+
+        branch_id = self.request.query_params.get('branch_id', None)
+        if branch_id:
+            queryset = queryset.filter(branch_id=branch_id)
+
+        start_date = self._date_param('start_date')
+        if start_date:
+            queryset = queryset.filter(**{f'{self.keyset_date_field}__gte': start_date})
+
+        end_date = self._date_param('end_date')
+        if end_date:
+            queryset = queryset.filter(**{f'{self.keyset_date_field}__lte': end_date})
+
+        payment_type = self.request.query_params.get('payment_type', None)
+        if payment_type:
+            queryset = queryset.filter(payment_type=payment_type)
+
+        return queryset
+
+    def _date_param(self, name):
+        value = self.request.query_params.get(name, None)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({name: "Must look like YYYY-MM-DD"})
+
+    def perform_create(self, serializer):
+        serializer.save(**{self.created_by_field: self.request.user})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered rows as CSV or XLSX (?file_format=csv|xlsx)"""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError({"file_format": f"Must be one of: {', '.join(EXPORT_FORMATS)}"})
+
+        header = [title for title, _ in self.export_columns]
+        lookups = [lookup for _, lookup in self.export_columns]
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .order_by(self.keyset_date_field, 'id')
+            .values_list(*lookups)
+            .iterator(chunk_size=2000)
+        )
+        return streaming_export(file_format, self.export_filename, header, rows)
+
+
+class StudentPaymentViewSet(BranchFinanceViewSet):
+    queryset = StudentPayment.objects.select_related(
+        'student_group__student__user', 'student_group__group', 'received_by', 'branch'
+    )
+    serializer_class = StudentPaymentSerializer
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['receipt_number', 'student_group__student__user__first_name', 'student_group__student__user__last_name']
+    keyset_date_field = 'payment_date'
+    created_by_field = 'received_by'
+    export_filename = 'student_payments'
+    export_columns = (
+        ('ID', 'id'),
+        ('Sana', 'payment_date'),
+        ('Ism', 'student_group__student__user__first_name'),
+        ('Familiya', 'student_group__student__user__last_name'),
+        ('Guruh', 'student_group__group__title'),
+        ('Summa', 'amount'),
+        ("To'lov turi", 'payment_type'),
+        ('Chek raqami', 'receipt_number'),
+        ('Filial', 'branch__name'),
+        ('Izoh', 'note'),
+    )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        student_group_id = self.request.query_params.get('student_group', None)
+        if student_group_id:
+            queryset = queryset.filter(student_group_id=student_group_id)
+
+        student_id = self.request.query_params.get('student_id', None)
+        if student_id:
+            queryset = queryset.filter(student_group__student_id=student_id)
+
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def receipt(self, request, pk=None):
+        """Receipt PDF; reprints are served from the disk cache"""
+        payment = self.get_object()
+        filename, path = receipt_pdf(payment)
+        return FileResponse(open(path, 'rb'), filename=filename, content_type='application/pdf')
+
+    @action(detail=False, methods=['get'])
+    def daily_receipts(self, request):
+        """Zip of all receipts of a branch for a day (?branch_id=&date=YYYY-MM-DD)"""
+        branch_id = request.query_params.get('branch_id')
+        if not branch_id:
+            raise ValidationError({"branch_id": "This parameter is required"})
+        try:
+            branch_id = int(branch_id)
+        except ValueError:
+            raise ValidationError({"branch_id": "Must be an integer"})
+        try:
+            day = date.fromisoformat(request.query_params.get('date', ''))
+        except ValueError:
+            day = timezone.localdate()
+        if request.user.user_role == 'admin' and not request.user.branch.filter(pk=branch_id).exists():
+            return Response({"detail": "Siz faqat o'z filialingiz cheklarini ola olasiz."}, status=status.HTTP_403_FORBIDDEN)
+
+        path = daily_archive(branch_id, day)
+        if path is None:
+            return Response({"detail": "Bu kunda to'lovlar yo'q"}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            open(path, 'rb'), as_attachment=True,
+            filename=f"receipts-{branch_id}-{day.isoformat()}.zip", content_type='application/zip'
+        )
+
+
+class ExpenseViewSet(BranchFinanceViewSet):
+    queryset = Expense.objects.select_related('category', 'created_by')
+    serializer_class = ExpenseSerializer
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['description', 'recipient', 'receipt_number']
+    export_filename = 'expenses'
+    export_columns = (
+        ('ID', 'id'),
+        ('Sana', 'date'),
+        ('Kategoriya', 'category__name'),
+        ('Summa', 'amount'),
+        ("To'lov turi", 'payment_type'),
+        ('Oluvchi', 'recipient'),
+        ('Chek raqami', 'receipt_number'),
+        ('Filial', 'branch__name'),
+        ('Izoh', 'description'),
+    )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        category_id = self.request.query_params.get('category_id', None)
+        if category_id:
+            queryset = queryset.filter(category_id=category_id)
+
+        is_salary = self.request.query_params.get('is_salary', None)
+        if is_salary is not None:
+            queryset = queryset.filter(category__is_salary=is_salary.lower() == 'true')
+
+        return queryset
+
+
+class SalaryViewSet(BranchFinanceViewSet):
+    queryset = Salary.objects.select_related('teacher__user', 'paid_by')
+    serializer_class = SalarySerializer
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['teacher__user__first_name', 'teacher__user__last_name']
+    keyset_date_field = 'paid_date'
+    created_by_field = 'paid_by'
+    export_filename = 'salaries'
+    export_columns = (
+        ('ID', 'id'),
+        ("To'langan sana", 'paid_date'),
+        ('Oy', 'month'),
+        ('Ism', 'teacher__user__first_name'),
+        ('Familiya', 'teacher__user__last_name'),
+        ('Summa', 'amount'),
+        ("To'lov turi", 'payment_type'),
+        ('Filial', 'branch__name'),
+        ('Izoh', 'note'),
+    )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        teacher_id = self.request.query_params.get('teacher_id', None)
+        if teacher_id:
+            queryset = queryset.filter(teacher_id=teacher_id)
+
+        month = self.request.query_params.get('month', None)
+        if month:
+            queryset = queryset.filter(month=month)
+
+        return queryset
+
+
+class AdditionalIncomeViewSet(BranchFinanceViewSet):
+    queryset = AdditionalIncome.objects.select_related('created_by')
+    serializer_class = AdditionalIncomeSerializer
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['title', 'description', 'receipt_number']
+    export_filename = 'additional_incomes'
+    export_columns = (
+        ('ID', 'id'),
+        ('Sana', 'date'),
+        ('Nomi', 'title'),
+        ('Summa', 'amount'),
+        ("To'lov turi", 'payment_type'),
+        ('Chek raqami', 'receipt_number'),
+        ('Filial', 'branch__name'),
+        ('Izoh', 'description'),
+    )
+
+
+class DebtAgingViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Debtors bucketed by how long ago they last paid.
+
+    ``list`` is the paginated drill-down (filter by branch_id, group_id,
+    teacher_id, bucket); ``summary`` gives the per-bucket, per-group and
+    per-teacher totals of the same filtered set.
+    """
+    serializer_class = DebtorSerializer
+    permission_classes = [IsAuthenticated, CanManagePayment]
+    pagination_class = CustomPagination
+
+    def get_today(self):
+        if not hasattr(self, '_today'):
+            self._today = timezone.localdate()
+        return self._today
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = StudentGroup.objects.all()
+
+        if user.user_role == 'admin':
+            queryset = queryset.filter(group__branch__in=user.branch.all())
+        elif user.user_role != 'owner':
+            return queryset.none()
+
+        branch_id = self.request.query_params.get('branch_id', None)
+        if branch_id:
+            queryset = queryset.filter(group__branch_id=branch_id)
+
+        group_id = self.request.query_params.get('group_id', None)
+        if group_id:
+            queryset = queryset.filter(group_id=group_id)
+
+        teacher_id = self.request.query_params.get('teacher_id', None)
+        if teacher_id:
+            queryset = queryset.filter(group__teacher_id=teacher_id)
+
+        queryset = debtor_enrollments(today=self.get_today(), queryset=queryset)
+
+        bucket = self.request.query_params.get('bucket', None)
+        if bucket:
+            if bucket not in BUCKET_NAMES:
+                raise ValidationError({"bucket": f"Must be one of: {', '.join(BUCKET_NAMES)}"})
+            queryset = queryset.filter(bucket=bucket)
+
+        return queryset.select_related(
+            'student__user', 'group__teacher__user'
+        ).order_by('-outstanding', 'id')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['today'] = self.get_today()
+        return context
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        debtors = self.get_queryset()
+        totals = pivot_buckets(aging_totals(debtors))
+        return Response({
+            'as_of': self.get_today(),
+            'totals': totals[0] if totals else None,
+            'groups': pivot_buckets(
+                aging_totals(debtors, 'group_id', 'group__title', 'group__teacher_id'),
+                'group_id', 'group__title', 'group__teacher_id'
+            ),
+            'teachers': pivot_buckets(
+                aging_totals(debtors, 'group__teacher_id', 'group__teacher__user__first_name',
+                             'group__teacher__user__last_name'),
+                'group__teacher_id', 'group__teacher__user__first_name', 'group__teacher__user__last_name'
+            ),
+        })
+
+
+class PaymentWebhookView(APIView):
+    """
+    Payment gateway callback.
+
+    The callback is only verified and stored in the inbox here; the
+    process_payment_webhooks command turns it into a StudentPayment. Repeated
+    deliveries of the same transaction are acknowledged and ignored.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request, provider):
+        gateway = get_provider(provider)
+        if gateway is None:
+            return Response({"detail": "Unknown provider"}, status=status.HTTP_404_NOT_FOUND)
+
+        body = request.body
+        try:
+            payment = ingest_webhook(gateway, body, request.headers.get(gateway.signature_header))
+        except InvalidSignature as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_403_FORBIDDEN)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"status": "accepted", "transaction_id": payment.transaction_id})
@@ -0,0 +1,164 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.finance import rollup
+from apps.finance.gateways import HMACProvider
+from apps.finance.ledger import apply_to_debts
+from apps.finance.models import (
+    LedgerEntry, LedgerEntryType, PaymentWebhookEvent, StudentPayment, WebhookStatus
+)
+from apps.student.models import StudentGroup
+
+# Payload allaqachon imzo bilan tekshirilgan, shuning uchun kalit kerak emas
+_parser = HMACProvider('inbox', b'')
+
+
+def _finish(event, status, payment_id=None, error=None):
+    event.status = status
+    event.payment_id = payment_id
+    event.error = error[:255] if error else None
+    event.processed_at = timezone.now()
+
+
+def _insert_payments(payments, batch_size):
+    """Bulk insert webhook payments with their ledger rows, debts and rollup."""
+    StudentPayment.objects.bulk_create(payments, batch_size=batch_size)
+    LedgerEntry.objects.bulk_create(
+        [
+            LedgerEntry(
+                student_group_id=payment.student_group_id,
+                entry_type=LedgerEntryType.PAYMENT,
+                amount=-payment.amount,
+                date=payment.payment_date,
+                payment=payment,
+            )
+            for payment in payments
+        ],
+        batch_size=batch_size,
+    )
+
+    deltas, last_payment_dates = defaultdict(int), {}
+    for payment in payments:
+        student_id = payment._student_id
+        deltas[student_id] -= payment.amount
+        last_payment_dates[student_id] = max(payment.payment_date, last_payment_dates.get(student_id, payment.payment_date))
+    apply_to_debts(deltas, last_payment_dates, batch_size=batch_size)
+    rollup.apply_deltas(rollup.collect_deltas(payments), batch_size=batch_size)
+
+
+def process_events(events, received_by, batch_size=500):
+    """
+    Turn claimed inbox events into StudentPayments in one set-based pass.
+
+    Events whose transaction already has a payment are marked duplicate,
+    unusable ones failed; the rest are bulk inserted. Must run inside the
+    transaction that claimed the events.
+    """
+    parsed = {}
+    for event in events:
+        try:
+            parsed[event.pk] = _parser.parse(event.payload)
+        except ValueError as exc:
+            _finish(event, WebhookStatus.FAILED, error=str(exc))
+
+    enrollments = {
+        pk: (student_id, branch_id)
+        for pk, student_id, branch_id in StudentGroup.objects.filter(
+            pk__in={item.student_group_id for item in parsed.values()}
+        ).values_list('pk', 'student_id', 'group__branch_id')
+    }
+    existing = {}
+    for provider in {event.provider for event in events}:
+        existing.update({
+            (provider, transaction_id): pk
+            for pk, transaction_id in StudentPayment.objects.filter(
+                provider=provider,
+                provider_transaction_id__in=[item.transaction_id for item in parsed.values()],
+            ).values_list('pk', 'provider_transaction_id')
+        })
+
+    new_payments = []
+    for event in events:
+        item = parsed.get(event.pk)
+        if item is None:
+            continue
+        if (event.provider, item.transaction_id) in existing:
+            _finish(event, WebhookStatus.DUPLICATE, payment_id=existing[event.provider, item.transaction_id])
+            continue
+        if item.student_group_id not in enrollments:
+            _finish(event, WebhookStatus.FAILED, error=f"StudentGroup {item.student_group_id} does not exist")
+            continue
+
+        student_id, branch_id = enrollments[item.student_group_id]
+        payment = StudentPayment(
+            student_group_id=item.student_group_id,
+            payment_date=item.paid_at,
+            amount=item.amount,
+            payment_type=item.payment_type,
+            receipt_number=item.transaction_id[:50],
+            note=f"{event.provider} orqali to'lov",
+            received_by=received_by,
+            branch_id=branch_id,
+            provider=event.provider,
+            provider_transaction_id=item.transaction_id,
+        )
+        payment._student_id = student_id
+        payment._event = event
+        new_payments.append(payment)
+
+    if new_payments:
+        try:
+            with transaction.atomic():
+                _insert_payments(new_payments, batch_size)
+        except IntegrityError:
+            # Boshqa yo'l bilan (masalan, qo'lda) yozilgan tranzaksiya: bittalab qayta urinamiz
+            for payment in new_payments:
+                payment.pk = None
+                try:
+                    with transaction.atomic():
+                        _insert_payments([payment], batch_size)
+                except IntegrityError as exc:
+                    payment.pk = None
+                    duplicate_of = StudentPayment.objects.filter(
+                        provider=payment.provider, provider_transaction_id=payment.provider_transaction_id
+                    ).values_list('pk', flat=True).first()
+                    if duplicate_of:
+                        _finish(payment._event, WebhookStatus.DUPLICATE, payment_id=duplicate_of)
+                    else:
+                        _finish(payment._event, WebhookStatus.FAILED, error=str(exc))
+        for payment in new_payments:
+            if payment.pk:
+                _finish(payment._event, WebhookStatus.PROCESSED, payment_id=payment.pk)
+
+    PaymentWebhookEvent.objects.bulk_update(
+        events, ['status', 'payment', 'error', 'processed_at'], batch_size=batch_size
+    )
+    counts = defaultdict(int)
+    for event in events:
+        counts[event.status] += 1
+    return dict(counts)
+
+
+def drain_inbox(received_by, batch_size=500, max_batches=None):
+    """
+    Process pending inbox events batch by batch until none are left.
+
+    Each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    drainers can run side by side. Returns the status counts.
+    """
+    totals, batches = defaultdict(int), 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            events = list(
+                PaymentWebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status=WebhookStatus.PENDING)
+                .order_by('id')[:batch_size]
+            )
+            if not events:
+                break
+            for status, count in process_events(events, received_by, batch_size=batch_size).items():
+                totals[status] += count
+        batches += 1
+    return dict(totals)
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from apps.finance.aging import debtor_enrollments
+from apps.finance.caching import finance_version
+from apps.finance.models import DailyFinanceRollup
+from apps.student.models import StudentGroup
+from apps.users.models import Branch
+
+DASHBOARD_TIMEOUT = 60 * 10
+AMOUNT_FIELDS = ('student_payments', 'additional_incomes', 'salary_expenses', 'other_expenses')
+
+
+def _percent(part, whole):
+    if not whole:
+        return Decimal(0)
+    return (Decimal(part) * 100 / Decimal(whole)).quantize(Decimal('0.01'))
+
+
+def _summarize(row):
+    row['total_income'] = row['student_payments'] + row['additional_incomes']
+    row['total_expenses'] = row['salary_expenses'] + row['other_expenses']
+    row['net_profit'] = row['total_income'] - row['total_expenses']
+    row['salary_share'] = _percent(row['salary_expenses'], row['total_expenses'])
+    return row
+
+
+def build_dashboard(start_date, end_date, branch_ids=None):
+    """
+    Finance figures of every branch for a date range, plus grand totals.
+
+    Three queries whatever the number of branches: the branch list, the
+    rollup grouped by branch and the current debt grouped by branch (debt is
+    a balance, so it ignores the date range).
+    """
+    branches = Branch.objects.order_by('name')
+    if branch_ids:
+        branches = branches.filter(pk__in=branch_ids)
+    rows = {
+        pk: {'branch_id': pk, 'branch_name': name, 'status': status,
+             **dict.fromkeys(AMOUNT_FIELDS, Decimal(0)), 'debt': 0, 'debtors': 0}
+        for pk, name, status in branches.values_list('pk', 'name', 'status')
+    }
+
+    totals = (
+        DailyFinanceRollup.objects.filter(branch_id__in=rows, date__gte=start_date, date__lte=end_date)
+        .values('branch_id')
+        .annotate(**{field: Sum(field) for field in AMOUNT_FIELDS})
+        .order_by()
+    )
+    for item in totals:
+        rows[item['branch_id']].update({field: item[field] or Decimal(0) for field in AMOUNT_FIELDS})
+
+    debts = (
+        debtor_enrollments(queryset=StudentGroup.objects.filter(group__branch_id__in=rows))
+        .order_by()
+        .values('group__branch_id')
+        .annotate(debt=Sum('outstanding'), debtors=Count('id'))
+    )
+    for item in debts:
+        rows[item['group__branch_id']].update(debt=item['debt'], debtors=item['debtors'])
+
+    branch_rows = [_summarize(row) for row in rows.values()]
+    grand_total = {field: sum((row[field] for row in branch_rows), Decimal(0)) for field in AMOUNT_FIELDS}
+    grand_total['debt'] = sum(row['debt'] for row in branch_rows)
+    grand_total['debtors'] = sum(row['debtors'] for row in branch_rows)
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'totals': _summarize(grand_total),
+        'branches': branch_rows,
+    }
+
+
+def get_dashboard(start_date, end_date, branch_ids=None):
+    """build_dashboard() cached until the next finance write."""
+    branch_key = ','.join(str(pk) for pk in sorted(branch_ids)) if branch_ids else 'all'
+    key = f'owner-dashboard:{finance_version()}:{start_date}:{end_date}:{branch_key}'
+    return cache.get_or_set(key, lambda: build_dashboard(start_date, end_date, branch_ids), DASHBOARD_TIMEOUT)
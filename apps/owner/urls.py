@@ -1,6 +1,7 @@
 
 from django.urls import path,include
 from rest_framework.routers import DefaultRouter
+from apps.owner.v1.views.views import SubscriptionPaymentReceiptView, OwnerDashboardView, OwnerForecastView
 
 
 router = DefaultRouter()
@@ -11,6 +12,9 @@ router.include_root_view = False
 urlpatterns = [
    
    path('',include(router.urls)),
+   path('dashboard/', OwnerDashboardView.as_view(), name='owner-dashboard'),
+   path('forecast/', OwnerForecastView.as_view(), name='owner-forecast'),
+   path('subscription-payments/<int:pk>/receipt/', SubscriptionPaymentReceiptView.as_view(), name='subscription-payment-receipt'),
 
 
 ]
\ No newline at end of file
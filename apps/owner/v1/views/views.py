@@ -0,0 +1,95 @@
+from datetime import date
+
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.finance.forecast import get_forecast
+from apps.finance.receipts import receipt_pdf
+from apps.owner.dashboard import get_dashboard
+from apps.owner.models import SubscriptionPayment
+from apps.users.permissions import IsAuthenticated, IsOwner
+
+
+class SubscriptionPaymentReceiptView(APIView):
+    """Obuna to'lovi cheki (PDF): platforma egasi yoki shu filial admini uchun"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        payment = get_object_or_404(
+            SubscriptionPayment.objects.select_related('subscription__branch', 'subscription__plan'), pk=pk
+        )
+        user = request.user
+        if not (user.user_role == 'owner' or
+                (user.user_role == 'admin' and user.branch.filter(pk=payment.subscription.branch_id).exists())):
+            raise PermissionDenied("Siz bu chekni ko'ra olmaysiz.")
+
+        filename, path = receipt_pdf(payment)
+        return FileResponse(open(path, 'rb'), filename=filename, content_type='application/pdf')
+
+
+class OwnerDashboardView(APIView):
+    """
+    Barcha filiallar bo'yicha moliyaviy ko'rsatkichlar.
+
+    ?start_date=&end_date= (standart: joriy oy boshidan bugungacha),
+    ?branch_id= bir necha marta berilishi mumkin.
+    """
+    permission_classes = [IsAuthenticated, IsOwner]
+
+    def _date_param(self, name, default):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({name: "Must look like YYYY-MM-DD"})
+
+    def get(self, request):
+        today = timezone.localdate()
+        start_date = self._date_param('start_date', today.replace(day=1))
+        end_date = self._date_param('end_date', today)
+        if start_date > end_date:
+            raise ValidationError({"end_date": "Must not be before start_date"})
+
+        try:
+            branch_ids = [int(pk) for pk in request.query_params.getlist('branch_id')]
+        except ValueError:
+            raise ValidationError({"branch_id": "Must be an integer"})
+
+        return Response(get_dashboard(start_date, end_date, branch_ids or None))
+
+
+class OwnerForecastView(APIView):
+    """
+    Filiallar bo'yicha kutilayotgan tushum prognozi.
+
+    ?months= (1-24, standart 6) oldinga, ?history= (2-24, standart 6) o'tgan
+    oylar asosida; ?branch_id= bir necha marta berilishi mumkin.
+    """
+    permission_classes = [IsAuthenticated, IsOwner]
+
+    def _int_param(self, name, default, low, high):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: "Must be an integer"})
+        if not low <= value <= high:
+            raise ValidationError({name: f"Must be between {low} and {high}"})
+        return value
+
+    def get(self, request):
+        months = self._int_param('months', 6, 1, 24)
+        history = self._int_param('history', 6, 2, 24)
+        try:
+            branch_ids = [int(pk) for pk in request.query_params.getlist('branch_id')]
+        except ValueError:
+            raise ValidationError({"branch_id": "Must be an integer"})
+
+        today = timezone.localdate()
+        branches = get_forecast(months, history, branch_ids or None, today=today)
+        return Response({'as_of': today, 'months': months, 'history_months': history, 'branches': branches})
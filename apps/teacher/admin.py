@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     Teacher, Sciences, Group, Schedule, LessonMaterial,
-    Category, Quiz, Question, Answer, QuizAssignment, QuizAttempt, UserAnswer
+    Category, Quiz, Question, Answer, QuizAssignment, QuizAttempt, UserAnswer,
+    RescoreJob, QuizGenerationJob
 )
 
 
@@ -104,10 +105,10 @@ class UserAnswerInline(admin.TabularInline):
 
 @admin.register(QuizAttempt)
 class QuizAttemptAdmin(admin.ModelAdmin):
-    list_display = ('student', 'quiz', 'score', 'started_at', 'completed_at', 'is_completed', 'passed')
+    list_display = ('student', 'quiz', 'attempt_number', 'score', 'started_at', 'completed_at', 'is_completed', 'passed')
     search_fields = ('student__user__first_name', 'student__user__last_name', 'quiz__title')
     list_filter = ('is_completed', 'quiz', 'started_at')
-    readonly_fields = ('student', 'quiz', 'quiz_assignment', 'score', 'started_at', 'completed_at', 'is_completed', 'passed', 'time_taken', 'score_percentage')
+    readonly_fields = ('student', 'quiz', 'quiz_assignment', 'attempt_number', 'score', 'started_at', 'completed_at', 'is_completed', 'passed', 'time_taken', 'score_percentage')
     date_hierarchy = 'started_at'
     inlines = [UserAnswerInline]
 
@@ -123,4 +124,23 @@ class UserAnswerAdmin(admin.ModelAdmin):
     readonly_fields = ('attempt', 'question', 'selected_answer', 'written_answer', 'is_correct')
 
     def has_add_permission(self, request):
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(RescoreJob)
+class RescoreJobAdmin(admin.ModelAdmin):
+    list_display = ('quiz', 'status', 'processed', 'total', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('quiz__title',)
+    readonly_fields = ('quiz', 'status', 'total', 'processed', 'error', 'created_at', 'started_at', 'finished_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(QuizGenerationJob)
+class QuizGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('quiz', 'topic', 'count', 'questions_created', 'provider', 'status', 'created_at')
+    list_filter = ('status', 'provider', 'difficulty')
+    search_fields = ('quiz__title', 'topic')
+    readonly_fields = ('questions_created', 'cached_batches', 'error', 'created_at', 'started_at', 'finished_at')
@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.teacher import ai_utls
+from apps.teacher.answer_keys import invalidate_answer_key
+from apps.teacher.models import GenerationStatus, Question, QuizGenerationJob
+from apps.teacher.quiz_io import clean_question, insert_questions
+
+logger = logging.getLogger(__name__)
+
+# Bitta so'rovda so'raladigan savollar soni
+BATCH_SIZE = 5
+MAX_QUESTIONS = 200
+PROMPT_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+Batch = namedtuple('Batch', 'topic difficulty count start prompt')
+
+_DIFFICULTY_NAMES = {'easy': 'oson', 'medium': "o'rta", 'hard': 'qiyin'}
+
+_SYSTEM_PROMPT = (
+    "Siz o'quv markazi uchun test savollarini tuzuvchi yordamchisiz. "
+    "Faqat JSON qaytaring: {\"questions\": [{\"text\": \"...\", \"explanation\": \"...\", "
+    "\"answers\": [{\"text\": \"...\", \"is_correct\": true}, ...]}]}. "
+    "Har bir savolda 4 ta javob va aynan bitta to'g'ri javob bo'lsin."
+)
+
+
+def build_batches(topic, difficulty, count, offset=0):
+    """
+    Split a request into BATCH_SIZE-question prompts.
+
+    Questions are numbered from ``offset`` (the quiz's current size), so a
+    repeated request asks for new questions instead of the cached ones.
+    """
+    batches = []
+    for start in range(offset, offset + count, BATCH_SIZE):
+        size = min(BATCH_SIZE, offset + count - start)
+        prompt = (
+            f"Mavzu: {topic}\n"
+            f"Qiyinlik: {_DIFFICULTY_NAMES.get(difficulty, difficulty)}\n"
+            f"Savollar soni: {size}\n"
+            f"Variant: {start + 1}-{start + size} (boshqa variantlardagi savollarni takrorlamang)"
+        )
+        batches.append(Batch(topic, difficulty, size, start, prompt))
+    return batches
+
+
+class OpenAIProvider:
+    """Chat completions in JSON mode through the lazily built client of ai_utls."""
+    name = 'openai'
+
+    def __init__(self, model=None):
+        self.model = model or settings.AI_QUIZ_MODEL
+        self.client = None
+
+    async def complete(self, batch):
+        if self.client is None:
+            self.client = ai_utls.make_async_client()
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {'role': 'system', 'content': _SYSTEM_PROMPT},
+                {'role': 'user', 'content': batch.prompt},
+            ],
+            response_format={'type': 'json_object'},
+            temperature=0.7,
+        )
+        return response.choices[0].message.content
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+
+class FakeProvider:
+    """
+    Offline provider for development and benchmarks.
+
+    Answers are derived from a hash of the prompt, so the same batch always
+    yields the same questions; ``latency`` simulates the round trip.
+    """
+    name = 'fake'
+    model = 'fake-v1'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    async def complete(self, batch):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        rng = random.Random(hashlib.sha256(batch.prompt.encode()).hexdigest())
+        questions = []
+        for index in range(1, batch.count + 1):
+            correct = rng.randrange(4)
+            number = batch.start + index
+            questions.append({
+                'text': f"{batch.topic}: {number}-savol ({batch.difficulty})",
+                'explanation': f"{correct + 1}-javob to'g'ri",
+                'answers': [
+                    {'text': f"{number}.{option + 1} javob", 'is_correct': option == correct}
+                    for option in range(4)
+                ],
+            })
+        return json.dumps({'questions': questions}, ensure_ascii=False)
+
+    async def aclose(self):
+        pass
+
+
+PROVIDERS = {'openai': OpenAIProvider, 'fake': FakeProvider}
+
+
+def get_provider(name, **options):
+    """Provider instance called ``name``, or None if it is unknown."""
+    provider_class = PROVIDERS.get(name)
+    return provider_class(**options) if provider_class else None
+
+
+def parse_completion(content):
+    """Question dicts of a completion; raises ValueError when it is not the expected JSON."""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        raise ValueError("Javob JSON emas")
+    questions = data.get('questions') if isinstance(data, dict) else data
+    if not isinstance(questions, list):
+        raise ValueError("Javobda 'questions' ro'yxati yo'q")
+    return questions
+
+
+def _prompt_key(provider, batch):
+    digest = hashlib.sha256(f'{provider.name}:{provider.model}:{_SYSTEM_PROMPT}:{batch.prompt}'.encode()).hexdigest()
+    return f'ai-quiz:{digest}'
+
+
+async def generate_batches(provider, batches, concurrency):
+    """
+    Run every batch through ``provider``, at most ``concurrency`` at a time.
+
+    Completions are cached by the hash of the prompt, so repeating a request
+    costs no calls. Returns one ``(questions, from_cache)`` tuple or the
+    raised exception per batch, in order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(batch):
+        key = _prompt_key(provider, batch)
+        questions = await cache.aget(key)
+        if questions is not None:
+            return questions, True
+        async with semaphore:
+            content = await provider.complete(batch)
+        questions = parse_completion(content)
+        await cache.aset(key, questions, PROMPT_CACHE_TIMEOUT)
+        return questions, False
+
+    try:
+        return await asyncio.gather(*(run(batch) for batch in batches), return_exceptions=True)
+    finally:
+        await provider.aclose()
+
+
+def generate_questions(job, provider, concurrency=None):
+    """
+    Generate ``job.count`` questions and add them to the job's quiz.
+
+    The LLM calls run concurrently in an event loop; the database work
+    happens afterwards in one transaction: invalid questions, repeats and
+    texts the quiz already has are dropped, the rest bulk-inserted. Returns
+    ``(created, cached_batches, errors)``.
+    """
+    # Testda allaqachon bor savollar qo'shilmaydi
+    seen = {text.lower() for text in Question.objects.filter(quiz_id=job.quiz_id).values_list('text', flat=True)}
+    batches = build_batches(job.topic, job.difficulty, job.count, offset=len(seen))
+    results = asyncio.run(generate_batches(provider, batches, concurrency or settings.AI_QUIZ_CONCURRENCY))
+
+    questions, errors, cached_batches = [], [], 0
+    for result in results:
+        if isinstance(result, Exception):
+            errors.append(str(result) or result.__class__.__name__)
+            continue
+        batch_questions, from_cache = result
+        cached_batches += from_cache
+        for data in batch_questions:
+            try:
+                question = clean_question(data)
+            except ValueError:
+                continue
+            if question['text'].lower() in seen:
+                continue
+            seen.add(question['text'].lower())
+            questions.append(question)
+    if errors and not questions:
+        raise RuntimeError(errors[0])
+
+    with transaction.atomic():
+        created, _ = insert_questions(job.quiz, questions[:job.count])
+        if created:
+            invalidate_answer_key(job.quiz_id)
+    return created, cached_batches, errors
+
+
+def enqueue_generation(quiz, topic, difficulty, count, provider=None):
+    return QuizGenerationJob.objects.create(
+        quiz=quiz,
+        topic=topic,
+        difficulty=difficulty,
+        count=count,
+        provider=provider or settings.AI_QUIZ_PROVIDER,
+    )
+
+
+def claim_generation_job():
+    """Take the oldest pending job and mark it running; None when the queue is empty."""
+    with transaction.atomic():
+        job = (
+            QuizGenerationJob.objects.select_for_update(skip_locked=True)
+            .filter(status=GenerationStatus.PENDING)
+            .select_related('quiz')
+            .order_by('id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = GenerationStatus.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def run_generation_jobs(max_jobs=None, concurrency=None, provider_options=None):
+    """
+    Run queued jobs one after another; returns ``(done, failed)`` counts.
+
+    ``provider_options`` maps a provider name to the keyword arguments it is
+    built with, e.g. ``{'fake': {'latency': 0.5}}``.
+    """
+    done = failed = 0
+    while max_jobs is None or done + failed < max_jobs:
+        job = claim_generation_job()
+        if job is None:
+            break
+        provider = get_provider(job.provider, **(provider_options or {}).get(job.provider, {}))
+        try:
+            if provider is None:
+                raise ValueError(f"Noma'lum provayder: {job.provider}")
+            created, cached_batches, errors = generate_questions(job, provider, concurrency=concurrency)
+            if created < job.count:
+                errors.insert(0, f"{job.count} ta savol o'rniga {created} ta qo'shildi")
+        except Exception as exc:
+            logger.exception("Quiz generation job %s failed", job.pk)
+            QuizGenerationJob.objects.filter(pk=job.pk).update(
+                status=GenerationStatus.FAILED, error=str(exc)[:255], finished_at=timezone.now()
+            )
+            failed += 1
+        else:
+            QuizGenerationJob.objects.filter(pk=job.pk).update(
+                status=GenerationStatus.DONE,
+                questions_created=created,
+                cached_batches=cached_batches,
+                error='; '.join(errors)[:255] or None,
+                finished_at=timezone.now(),
+            )
+            done += 1
+    return done, failed
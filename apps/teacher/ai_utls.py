@@ -1,14 +1,20 @@
 
 import os
-import json
-import random
-from openai import OpenAI
 from dotenv import load_dotenv
 load_dotenv()
 
-client = None
-api_key = os.getenv("OPENAI_API_KEY")
-if api_key:
-    client = OpenAI(api_key=api_key)
-else:
-    print(" DIQQAT: OPENAI_API_KEY topilmadi! AI generatsiyasi ishlamaydi. ")
+
+def get_api_key():
+    return os.getenv("OPENAI_API_KEY")
+
+
+def make_async_client():
+    """
+    New AsyncOpenAI client; built on demand so importing this module needs
+    neither the key nor a network connection.
+    """
+    api_key = get_api_key()
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY topilmadi! AI generatsiyasi ishlamaydi.")
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=api_key)
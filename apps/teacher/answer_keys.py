@@ -0,0 +1,90 @@
+import threading
+import uuid
+from collections import OrderedDict, namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.teacher.models import Question
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+LOCAL_KEYS = 256
+
+KeyedQuestion = namedtuple('KeyedQuestion', 'points answer_ids correct_ids')
+AnswerKey = namedtuple('AnswerKey', 'quiz_id version questions')
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _version_key(quiz_id):
+    return f'quiz:{quiz_id}:key-version'
+
+
+def _data_key(quiz_id, version):
+    return f'quiz:{quiz_id}:key:{version}'
+
+
+def load_answer_key(quiz_id):
+    """``{question_id: KeyedQuestion}`` of a quiz, read with a single query."""
+    questions = {}
+    rows = Question.objects.filter(quiz_id=quiz_id).values_list(
+        'id', 'points', 'answers__id', 'answers__is_correct'
+    ).order_by('id')
+    for question_id, points, answer_id, is_correct in rows:
+        _, answer_ids, correct_ids = questions.setdefault(question_id, (points, set(), set()))
+        if answer_id is not None:
+            answer_ids.add(answer_id)
+            if is_correct:
+                correct_ids.add(answer_id)
+    return {
+        question_id: KeyedQuestion(points, frozenset(answer_ids), frozenset(correct_ids))
+        for question_id, (points, answer_ids, correct_ids) in questions.items()
+    }
+
+
+def answer_key_version(quiz_id):
+    version = cache.get(_version_key(quiz_id))
+    if version is None:
+        cache.add(_version_key(quiz_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(quiz_id))
+    return version
+
+
+def get_answer_key(quiz_id):
+    """
+    Compiled answer key of a quiz.
+
+    Looked up in this process's LRU first, then in the shared cache, and only
+    then built from the database. Entries are stored under the quiz's version
+    stamp, so a hit costs one cache read for the stamp and an edit anywhere
+    makes every process rebuild on its next read.
+    """
+    version = answer_key_version(quiz_id)
+    with _local_lock:
+        key = _local.get(quiz_id)
+        if key is not None and key.version == version:
+            _local.move_to_end(quiz_id)
+            return key
+
+    key = cache.get(_data_key(quiz_id, version))
+    if key is None:
+        key = AnswerKey(quiz_id, version, load_answer_key(quiz_id))
+        cache.set(_data_key(quiz_id, version), key, ANSWER_KEY_TIMEOUT)
+
+    with _local_lock:
+        _local[quiz_id] = key
+        _local.move_to_end(quiz_id)
+        while len(_local) > LOCAL_KEYS:
+            _local.popitem(last=False)
+    return key
+
+
+def invalidate_answer_key(quiz_id):
+    """Give the quiz a new version stamp once the current transaction commits."""
+    def bump():
+        cache.set(_version_key(quiz_id), uuid.uuid4().hex, None)
+        with _local_lock:
+            _local.pop(quiz_id, None)
+
+    transaction.on_commit(bump)
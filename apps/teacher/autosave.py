@@ -0,0 +1,195 @@
+"""
+Write-behind autosave of in-progress quiz answers.
+
+Autosaves only touch the cache: each open attempt has a draft holding the
+latest answer per question. A flusher copies changed drafts into UserAnswer
+in batches, and submitting merges the draft under the submitted answers.
+"""
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.teacher.answer_keys import get_answer_key
+from apps.teacher.grading import AttemptExpired, attempt_deadline, grade_answers, submit_attempt, upsert_answers
+from apps.teacher.models import QuizAttempt
+
+DRAFT_TIMEOUT = 60 * 60 * 24
+DRAFT_LOCK_TIMEOUT = 5
+
+
+def _draft_key(attempt_id):
+    return f'attempt:{attempt_id}:draft'
+
+
+def _flushed_key(attempt_id):
+    return f'attempt:{attempt_id}:draft-flushed'
+
+
+@contextmanager
+def _draft_lock(attempt_id):
+    """
+    Hold the attempt's draft lock while the draft is read and written back.
+
+    Without it two overlapping saves both read the same draft and the later
+    write drops the other's answers. The lock expires by itself, so a
+    crashed holder blocks the attempt for at most DRAFT_LOCK_TIMEOUT seconds.
+    """
+    lock_key = f'{_draft_key(attempt_id)}:lock'
+    deadline = time.monotonic() + DRAFT_LOCK_TIMEOUT
+    while not cache.add(lock_key, 1, DRAFT_LOCK_TIMEOUT) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(lock_key)
+
+
+def save_draft(attempt_id, quiz_id, answers_data, seq, deadline):
+    """
+    Merge answer deltas into the attempt's draft; returns the draft version.
+
+    ``seq`` is the client's increasing save counter: a delta older than what
+    the draft already holds for a question is ignored, so retried or
+    reordered requests cannot roll answers back. Ids are validated against
+    the cached answer key, no query is made. Saves after ``deadline`` raise
+    AttemptExpired; every entry keeps its save time so late ones can be told
+    apart when the attempt is graded.
+    """
+    rows, _ = grade_answers(get_answer_key(quiz_id).questions, answers_data)
+
+    with _draft_lock(attempt_id):
+        saved_at = timezone.now()
+        if saved_at > deadline:
+            raise AttemptExpired()
+        draft = cache.get(_draft_key(attempt_id)) or {'version': 0, 'answers': {}}
+        changed = False
+        for question_id, selected_answer_id, written_answer, _ in rows:
+            current = draft['answers'].get(question_id)
+            if current is None or current[0] <= seq:
+                draft['answers'][question_id] = (seq, selected_answer_id, written_answer, saved_at)
+                changed = True
+        if changed:
+            draft['version'] += 1
+            cache.set(_draft_key(attempt_id), draft, DRAFT_TIMEOUT)
+    return draft['version']
+
+
+def get_drafts(attempt_ids):
+    """``{attempt_id: draft}`` of the attempts that have one, in one cache round trip."""
+    stored = cache.get_many([_draft_key(attempt_id) for attempt_id in attempt_ids])
+    return {
+        attempt_id: stored[_draft_key(attempt_id)]
+        for attempt_id in attempt_ids if _draft_key(attempt_id) in stored
+    }
+
+
+def clear_drafts(attempt_ids):
+    cache.delete_many([key for attempt_id in attempt_ids for key in (_draft_key(attempt_id), _flushed_key(attempt_id))])
+
+
+def entries_until(draft, deadline):
+    """The draft's ``{question_id: entry}`` saved no later than ``deadline``."""
+    return {question_id: entry for question_id, entry in draft['answers'].items() if entry[3] <= deadline}
+
+
+def draft_rows(key, draft):
+    """Graded ``(question_id, selected_answer_id, written_answer, is_correct)`` rows still valid for ``key``."""
+    rows = []
+    for question_id, (_, selected_answer_id, written_answer, _) in draft['answers'].items():
+        question = key.get(question_id)
+        # Savol yoki javob draft saqlangandan keyin o'chirilgan bo'lishi mumkin
+        if question is None or (selected_answer_id and selected_answer_id not in question.answer_ids):
+            continue
+        is_correct = bool(selected_answer_id) and selected_answer_id in question.correct_ids
+        rows.append((question_id, selected_answer_id, written_answer, is_correct))
+    return rows
+
+
+def draft_answers(attempt_id, key, deadline):
+    """The attempt's draft, as saved by ``deadline``, in the ``answers`` format submit_answers accepts."""
+    draft = cache.get(_draft_key(attempt_id))
+    if draft is None:
+        return []
+    return [
+        {'question': question_id, 'selected_answer': selected_answer_id, 'written_answer': written_answer}
+        for question_id, selected_answer_id, written_answer, _ in draft_rows(
+            key, {'answers': entries_until(draft, deadline)}
+        )
+    ]
+
+
+def submit_with_draft(attempt, answers_data=()):
+    """
+    submit_attempt() with the autosaved draft underneath the submitted answers.
+
+    A submission after the deadline grades only what was saved by then and
+    is closed at the deadline, exactly as the expiry sweep would close it.
+    """
+    key = get_answer_key(attempt.quiz_id).questions
+    time_limit_minutes, assignment_end_time = QuizAttempt.objects.filter(pk=attempt.pk).values_list(
+        'quiz__time_limit_minutes', 'quiz_assignment__end_time'
+    ).get()
+    deadline = attempt_deadline(attempt.started_at, time_limit_minutes, assignment_end_time)
+    completed_at = None
+    if timezone.now() > deadline:
+        answers_data, completed_at = [], deadline
+    if isinstance(answers_data, (list, tuple)):
+        answers_data = draft_answers(attempt.pk, key, deadline) + list(answers_data)
+    attempt = submit_attempt(attempt, answers_data, key=key, completed_at=completed_at)
+    clear_drafts([attempt.pk])
+    return attempt
+
+
+def _flush_batch(pending):
+    """Write the drafts of ``{attempt_id: (quiz_id, draft)}``; returns the attempts written."""
+    with transaction.atomic():
+        # Bir vaqtda topshirilayotgan urinish qulflangan bo'ladi: uni o'tkazib yuboramiz
+        open_ids = list(
+            QuizAttempt.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=pending, is_completed=False)
+            .values_list('pk', flat=True)
+        )
+        rows = []
+        for attempt_id in open_ids:
+            quiz_id, draft = pending[attempt_id]
+            key = get_answer_key(quiz_id).questions
+            rows.extend((attempt_id, *row) for row in draft_rows(key, draft))
+        upsert_answers(rows)
+    cache.set_many(
+        {_flushed_key(attempt_id): pending[attempt_id][1]['version'] for attempt_id in open_ids},
+        DRAFT_TIMEOUT,
+    )
+    return len(open_ids)
+
+
+def flush_drafts(batch_size=500):
+    """
+    Copy every draft changed since its last flush into UserAnswer.
+
+    Open attempts are walked by id; each batch costs one query for the ids,
+    one cache round trip for the drafts and their flush markers, and one
+    upsert for the answers of all changed attempts. Returns the number of
+    attempts flushed.
+    """
+    flushed, last_id = 0, 0
+    while True:
+        batch = list(
+            QuizAttempt.objects.filter(is_completed=False, pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'quiz_id')[:batch_size]
+        )
+        if not batch:
+            return flushed
+        last_id = batch[-1][0]
+
+        stored = cache.get_many([key for pk, _ in batch for key in (_draft_key(pk), _flushed_key(pk))])
+        pending = {}
+        for attempt_id, quiz_id in batch:
+            draft = stored.get(_draft_key(attempt_id))
+            if draft is not None and draft['version'] > stored.get(_flushed_key(attempt_id), 0):
+                pending[attempt_id] = (quiz_id, draft)
+        if pending:
+            flushed += _flush_batch(pending)
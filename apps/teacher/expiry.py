@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, DateTimeField, DurationField, ExpressionWrapper, F, FloatField, Q, Value, When
+from django.utils import timezone
+
+from apps.teacher import item_analysis
+from apps.teacher.answer_keys import get_answer_key
+from apps.teacher.autosave import clear_drafts, draft_rows, entries_until, get_drafts
+from apps.teacher.grading import attempt_deadline, score_for, upsert_answers
+from apps.teacher.models import QuizAttempt, UserAnswer
+from apps.teacher.student_quizzes import invalidate_available_quizzes
+
+# Tarmoq kechikishi bilan kelgan topshirishlar uchun qo'shimcha vaqt
+EXPIRY_GRACE = timedelta(minutes=2)
+
+
+def overdue_attempts(now, grace=EXPIRY_GRACE):
+    """
+    Open attempts whose deadline passed more than ``grace`` ago.
+
+    Served by the (is_completed, started_at) index, walked in started_at
+    order.
+    """
+    cutoff = now - grace
+    time_limit = ExpressionWrapper(F('quiz__time_limit_minutes') * timedelta(minutes=1), output_field=DurationField())
+    return (
+        QuizAttempt.objects.filter(is_completed=False, started_at__lt=cutoff)
+        .annotate(limit_ends_at=ExpressionWrapper(F('started_at') + time_limit, output_field=DateTimeField()))
+        .filter(Q(limit_ends_at__lt=cutoff) | Q(quiz_assignment__end_time__lt=cutoff))
+        .order_by('started_at', 'id')
+    )
+
+
+def _expire_batch(attempts):
+    """Grade and close ``attempts`` (value dicts) with their saved answers; returns how many were closed."""
+    with transaction.atomic():
+        # Shu payt topshirilayotgan urinishlar qulflangan: ularni o'tkazib yuboramiz
+        open_ids = set(
+            QuizAttempt.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=[attempt['id'] for attempt in attempts], is_completed=False)
+            .values_list('pk', flat=True)
+        )
+        attempts = [attempt for attempt in attempts if attempt['id'] in open_ids]
+        if not attempts:
+            return 0
+
+        saved = {attempt['id']: {} for attempt in attempts}
+        for attempt_id, question_id, selected_answer_id, written_answer in UserAnswer.objects.filter(
+            attempt_id__in=open_ids
+        ).values_list('attempt_id', 'question_id', 'selected_answer_id', 'written_answer'):
+            saved[attempt_id][question_id] = (0, selected_answer_id, written_answer, None)
+        drafts = get_drafts(open_ids)
+
+        rows, scores, deadlines = [], {}, {}
+        deltas = item_analysis.new_deltas()
+        for attempt in attempts:
+            attempt_id = attempt['id']
+            deadlines[attempt_id] = attempt_deadline(
+                attempt['started_at'], attempt['quiz__time_limit_minutes'], attempt['quiz_assignment__end_time']
+            )
+            answers = saved[attempt_id]
+            draft = drafts.get(attempt_id)
+            if draft is not None:
+                # Muddatdan keyin saqlangan javoblar (masalan, topshiriq muddati qisqartirilgan bo'lsa) olinmaydi
+                answers.update(entries_until(draft, deadlines[attempt_id]))
+            key = get_answer_key(attempt['quiz_id']).questions
+            graded = draft_rows(key, {'answers': answers})
+            rows.extend((attempt_id, *row) for row in graded)
+            scores[attempt_id] = score_for(sum(1 for row in graded if row[3]), len(key))
+            item_analysis.collect_attempt(deltas, key, graded, scores[attempt_id])
+
+        upsert_answers(rows)
+        invalidate_available_quizzes(attempt['student_id'] for attempt in attempts)
+        closed = QuizAttempt.objects.filter(pk__in=open_ids, is_completed=False).update(
+            is_completed=True,
+            score=Case(*[When(pk=pk, then=Value(score)) for pk, score in scores.items()], output_field=FloatField()),
+            completed_at=Case(
+                *[When(pk=pk, then=Value(deadline)) for pk, deadline in deadlines.items()],
+                output_field=DateTimeField(),
+            ),
+        )
+        item_analysis.apply_deltas(deltas)
+
+    clear_drafts(open_ids)
+    return closed
+
+
+def expire_attempts(now=None, grace=EXPIRY_GRACE, batch_size=200):
+    """
+    Auto-submit every overdue attempt with whatever answers it saved.
+
+    Saved UserAnswer rows and the autosave draft entries saved by the
+    deadline are merged (the draft is newer), graded against the cached
+    answer key and closed in batches: per batch one query for the
+    candidates, one for the saved answers, one upsert and one UPDATE.
+    ``completed_at`` is set to the deadline, not the sweep time. Returns the
+    number of attempts closed.
+    """
+    now = now or timezone.now()
+    candidates = overdue_attempts(now, grace).values(
+        'id', 'student_id', 'quiz_id', 'started_at', 'quiz__time_limit_minutes', 'quiz_assignment__end_time'
+    )
+    closed = 0
+    while True:
+        # Yopilganlar (yoki boshqa jarayon olganlar) keyingi so'rovda chiqmaydi
+        batch = list(candidates[:batch_size])
+        if not batch:
+            return closed
+        expired = _expire_batch(batch)
+        closed += expired
+        if not expired:
+            return closed
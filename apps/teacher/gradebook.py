@@ -0,0 +1,74 @@
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+from apps.student.models import StudentGroup
+from apps.teacher.models import QuizAssignment, QuizAttempt
+
+
+def group_gradebook(group_id, status=None):
+    """
+    Students × quiz assignments matrix of best scores for a group.
+
+    Three queries whatever the size of the group: the enrollments with their
+    StudentProgress average, the group's assignments, and the best completed
+    score per (student, assignment). The matrix is pivoted in memory; each
+    student's ``scores`` follow the order of ``assignments`` (None = no
+    completed attempt).
+    """
+    enrollments = StudentGroup.objects.filter(group_id=group_id)
+    if status:
+        enrollments = enrollments.filter(status=status)
+    enrollments = (
+        enrollments.values('student_id', 'student__user__first_name', 'student__user__last_name', 'status')
+        .annotate(progress_average=Avg('progress_records__grade'), progress_records=Count('progress_records'))
+        .order_by('student__user__first_name', 'student__user__last_name', 'student_id')
+    )
+
+    assignments = [
+        {
+            'id': assignment.id,
+            'quiz_id': assignment.quiz_id,
+            'quiz_title': assignment.quiz.title,
+            'start_time': assignment.start_time,
+            'end_time': assignment.end_time,
+        }
+        for assignment in QuizAssignment.objects.filter(group_id=group_id).select_related('quiz').order_by('start_time', 'id')
+    ]
+    columns = {assignment['id']: index for index, assignment in enumerate(assignments)}
+
+    best_scores = (
+        QuizAttempt.objects.filter(quiz_assignment__group_id=group_id, is_completed=True)
+        .values_list('student_id', 'quiz_assignment_id')
+        .annotate(best=Max('score'))
+        .order_by()
+    )
+    scores = {}
+    for student_id, assignment_id, best in best_scores:
+        scores.setdefault(student_id, [None] * len(assignments))[columns[assignment_id]] = best
+
+    students = []
+    for enrollment in enrollments:
+        average = enrollment['progress_average']
+        students.append({
+            'student_id': enrollment['student_id'],
+            'student_name': f"{enrollment['student__user__first_name']} {enrollment['student__user__last_name']}",
+            'status': enrollment['status'],
+            'progress_average': round(average, 2) if average is not None else None,
+            'progress_records': enrollment['progress_records'],
+            'scores': scores.get(enrollment['student_id'], [None] * len(assignments)),
+        })
+
+    return {'assignments': assignments, 'students': students}
+
+
+def gradebook_table(gradebook):
+    """``(header, rows)`` of a gradebook for exports."""
+    header = ["O'quvchi", "Holati", "O'rtacha baho"] + [
+        f"{assignment['quiz_title']} ({timezone.localtime(assignment['start_time']):%d.%m.%Y})" for assignment in gradebook['assignments']
+    ]
+    rows = (
+        [student['student_name'], student['status'], student['progress_average']]
+        + [round(score, 2) if score is not None else None for score in student['scores']]
+        for student in gradebook['students']
+    )
+    return header, rows
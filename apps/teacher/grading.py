@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.teacher import item_analysis
+from apps.teacher.answer_keys import get_answer_key
+from apps.teacher.models import QuizAttempt, UserAnswer
+from apps.teacher.student_quizzes import invalidate_available_quizzes
+
+
+class AttemptAlreadyCompleted(Exception):
+    pass
+
+
+class AttemptExpired(Exception):
+    pass
+
+
+def attempt_deadline(started_at, time_limit_minutes, assignment_end_time):
+    """When an attempt runs out: its time limit, or the assignment's end if that comes first."""
+    deadline = started_at + timedelta(minutes=time_limit_minutes)
+    if assignment_end_time is not None and assignment_end_time < deadline:
+        return assignment_end_time
+    return deadline
+
+
+def _as_id(value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return False
+
+
+def grade_answers(key, answers_data):
+    """
+    Validate submitted answers against the key and grade them in memory.
+
+    Returns ``(rows, correct_count)`` where rows are ``(question_id,
+    selected_answer_id, written_answer, is_correct)``. Every bad id is
+    reported at once as a ValidationError.
+    """
+    if not isinstance(answers_data, list):
+        raise ValidationError({"answers": "Must be a list"})
+
+    graded, errors = {}, []
+    for index, answer_data in enumerate(answers_data):
+        if not isinstance(answer_data, dict):
+            errors.append({"index": index, "error": "Must be an object"})
+            continue
+        question_id = _as_id(answer_data.get('question'))
+        selected_answer_id = _as_id(answer_data.get('selected_answer'))
+        written_answer = answer_data.get('written_answer')
+
+        if not question_id or question_id not in key:
+            errors.append({"index": index, "question": "Question does not belong to this quiz"})
+            continue
+        question = key[question_id]
+        if selected_answer_id is False or (selected_answer_id and selected_answer_id not in question.answer_ids):
+            errors.append({"index": index, "selected_answer": "Answer does not belong to this question"})
+            continue
+        if not selected_answer_id and not written_answer:
+            continue
+
+        is_correct = bool(selected_answer_id) and selected_answer_id in question.correct_ids
+        # Bir savolga ikki marta javob yuborilsa, oxirgisi hisobga olinadi
+        graded[question_id] = (question_id, selected_answer_id, written_answer, is_correct)
+
+    if errors:
+        raise ValidationError({"answers": errors})
+
+    rows = list(graded.values())
+    return rows, sum(1 for row in rows if row[3])
+
+
+def score_for(correct_count, total_questions):
+    if total_questions > 0:
+        return (correct_count / total_questions) * 100
+    return 0
+
+
+def upsert_answers(rows, batch_size=1000):
+    """
+    Insert or overwrite UserAnswer rows, one statement per batch.
+
+    ``rows`` are ``(attempt_id, question_id, selected_answer_id,
+    written_answer, is_correct)`` and may span several attempts.
+    """
+    UserAnswer.objects.bulk_create(
+        [
+            UserAnswer(
+                attempt_id=attempt_id,
+                question_id=question_id,
+                selected_answer_id=selected_answer_id,
+                written_answer=written_answer,
+                is_correct=is_correct,
+            )
+            for attempt_id, question_id, selected_answer_id, written_answer, is_correct in rows
+        ],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['attempt', 'question'],
+        update_fields=['selected_answer', 'written_answer', 'is_correct'],
+    )
+
+
+def submit_attempt(attempt, answers_data, key=None, completed_at=None):
+    """
+    Grade and finalize an attempt with a constant number of queries.
+
+    The answer key comes from the compiled key cache, answers are validated
+    in memory and upserted in one statement, and the attempt is closed with
+    a conditional UPDATE so that two concurrent submissions cannot both win.
+    ``completed_at`` defaults to now.
+    """
+    key = key if key is not None else get_answer_key(attempt.quiz_id).questions
+    rows, correct_count = grade_answers(key, answers_data)
+    score = score_for(correct_count, len(key))
+    completed_at = completed_at or timezone.now()
+
+    with transaction.atomic():
+        closed = QuizAttempt.objects.filter(pk=attempt.pk, is_completed=False).update(
+            score=score, completed_at=completed_at, is_completed=True
+        )
+        if not closed:
+            raise AttemptAlreadyCompleted()
+
+        upsert_answers((attempt.pk, *row) for row in rows)
+        item_analysis.apply_deltas(item_analysis.collect_attempt(item_analysis.new_deltas(), key, rows, score))
+        invalidate_available_quizzes([attempt.student_id])
+
+    attempt.score, attempt.completed_at, attempt.is_completed = score, completed_at, True
+    return attempt
@@ -0,0 +1,193 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Coalesce
+
+from apps.teacher.models import (
+    Answer, AnswerStats, Question, QuestionStats, Quiz, QuizAttempt, UserAnswer
+)
+
+QUESTION_STATS_FIELDS = ('responses', 'correct', 'score_sum', 'score_squares', 'correct_score_sum')
+
+
+def new_deltas():
+    """Empty ``(question_deltas, answer_deltas)`` for collect_attempt()."""
+    return defaultdict(lambda: defaultdict(float)), defaultdict(int)
+
+
+def collect_attempt(deltas, question_ids, rows, score):
+    """
+    Accumulate one completed attempt into ``deltas``.
+
+    ``question_ids`` are all questions of the quiz, ``rows`` the graded
+    ``(question_id, selected_answer_id, written_answer, is_correct)`` answers.
+    """
+    question_deltas, answer_deltas = deltas
+    correct = {row[0] for row in rows if row[3]}
+    for question_id in question_ids:
+        values = question_deltas[question_id]
+        values['responses'] += 1
+        values['score_sum'] += score
+        values['score_squares'] += score * score
+        if question_id in correct:
+            values['correct'] += 1
+            values['correct_score_sum'] += score
+    for row in rows:
+        if row[1]:
+            answer_deltas[row[1]] += 1
+    return deltas
+
+
+def apply_deltas(deltas, batch_size=1000):
+    """
+    Add collected deltas to the stats tables.
+
+    Missing rows are inserted first, then every row is shifted relative to
+    its stored value with a batched CASE UPDATE, so concurrent submissions
+    never overwrite each other. Four queries per batch.
+    """
+    question_deltas, answer_deltas = deltas
+    if question_deltas:
+        QuestionStats.objects.bulk_create(
+            [QuestionStats(question_id=question_id) for question_id in question_deltas],
+            ignore_conflicts=True,
+            batch_size=batch_size,
+        )
+        QuestionStats.objects.bulk_update(
+            [
+                QuestionStats(
+                    question_id=question_id,
+                    **{field: F(field) + values.get(field, 0) for field in QUESTION_STATS_FIELDS},
+                )
+                for question_id, values in question_deltas.items()
+            ],
+            QUESTION_STATS_FIELDS,
+            batch_size=batch_size,
+        )
+    if answer_deltas:
+        AnswerStats.objects.bulk_create(
+            [AnswerStats(answer_id=answer_id) for answer_id in answer_deltas],
+            ignore_conflicts=True,
+            batch_size=batch_size,
+        )
+        AnswerStats.objects.bulk_update(
+            [AnswerStats(answer_id=answer_id, selected=F('selected') + count) for answer_id, count in answer_deltas.items()],
+            ['selected'],
+            batch_size=batch_size,
+        )
+
+
+def rebuild_quiz_stats(quiz_ids, batch_size=1000):
+    """
+    Recompute the stats of ``quiz_ids`` from UserAnswer.
+
+    The sums are aggregated by the database over the whole answer matrix
+    (one grouped query per table) and the rows replaced in the same
+    transaction, with the old rows locked first.
+    """
+    with transaction.atomic():
+        # Avval statistika qatorlari qulflanadi: shu paytda topshirilgan urinishning
+        # apply_deltas() qo'shimchasi yo yig'indiga kiradi, yo yangi qatorlarga qo'shiladi
+        list(QuestionStats.objects.select_for_update().filter(question__quiz_id__in=quiz_ids).values_list('pk', flat=True))
+        list(AnswerStats.objects.select_for_update().filter(answer__question__quiz_id__in=quiz_ids).values_list('pk', flat=True))
+        attempts = {
+            row['quiz_id']: row
+            for row in QuizAttempt.objects.filter(quiz_id__in=quiz_ids, is_completed=True)
+            .values('quiz_id')
+            .annotate(
+                responses=Count('id'),
+                score_sum=Coalesce(Sum('score'), 0.0, output_field=FloatField()),
+                score_squares=Coalesce(Sum(F('score') * F('score')), 0.0, output_field=FloatField()),
+            )
+            .order_by()
+        }
+        correct = {
+            row['question_id']: row
+            for row in UserAnswer.objects.filter(
+                question__quiz_id__in=quiz_ids, attempt__is_completed=True, is_correct=True
+            )
+            .values('question_id')
+            .annotate(correct=Count('id'), correct_score_sum=Coalesce(Sum('attempt__score'), 0.0, output_field=FloatField()))
+            .order_by()
+        }
+        selected = dict(
+            UserAnswer.objects.filter(
+                question__quiz_id__in=quiz_ids, attempt__is_completed=True, selected_answer__isnull=False
+            )
+            .values_list('selected_answer_id')
+            .annotate(selected=Count('id'))
+            .order_by()
+        )
+
+        question_stats = []
+        for question_id, quiz_id in Question.objects.filter(quiz_id__in=quiz_ids).values_list('id', 'quiz_id'):
+            totals = attempts.get(quiz_id)
+            if totals is None:
+                continue
+            question_stats.append(QuestionStats(
+                question_id=question_id,
+                responses=totals['responses'],
+                score_sum=totals['score_sum'],
+                score_squares=totals['score_squares'],
+                correct=correct.get(question_id, {}).get('correct', 0),
+                correct_score_sum=correct.get(question_id, {}).get('correct_score_sum', 0),
+            ))
+        answer_ids = Answer.objects.filter(question__quiz_id__in=quiz_ids).values_list('id', flat=True)
+
+        QuestionStats.objects.filter(question__quiz_id__in=quiz_ids).delete()
+        AnswerStats.objects.filter(answer__question__quiz_id__in=quiz_ids).delete()
+        QuestionStats.objects.bulk_create(question_stats, batch_size=batch_size)
+        AnswerStats.objects.bulk_create(
+            [AnswerStats(answer_id=answer_id, selected=selected[answer_id]) for answer_id in answer_ids if answer_id in selected],
+            batch_size=batch_size,
+        )
+    return len(question_stats)
+
+
+def rebuild_stats(quiz_ids=None, chunk_size=100):
+    """rebuild_quiz_stats() over many quizzes, ``chunk_size`` quizzes at a time."""
+    if quiz_ids is None:
+        quiz_ids = list(Quiz.objects.order_by('id').values_list('id', flat=True))
+    rebuilt = 0
+    for start in range(0, len(quiz_ids), chunk_size):
+        rebuilt += rebuild_quiz_stats(quiz_ids[start:start + chunk_size])
+    return rebuilt
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def _answer_analysis(answer, responses):
+    selected = answer.stats.selected if hasattr(answer, 'stats') else 0
+    return {
+        'answer_id': answer.id,
+        'text': answer.text,
+        'is_correct': answer.is_correct,
+        'selected': selected,
+        'selection_rate': _rate(selected, responses),
+    }
+
+
+def quiz_item_analysis(quiz_id):
+    """Difficulty, discrimination and distractor selection rates of every question of a quiz."""
+    questions = (
+        Question.objects.filter(quiz_id=quiz_id)
+        .select_related('stats')
+        .prefetch_related('answers__stats')
+        .order_by('id')
+    )
+    result = []
+    for question in questions:
+        stats = question.stats if hasattr(question, 'stats') else QuestionStats(question=question)
+        discrimination = stats.discrimination
+        result.append({
+            'question_id': question.id,
+            'text': question.text,
+            'responses': stats.responses,
+            'p_value': _rate(stats.correct, stats.responses),
+            'discrimination': round(discrimination, 4) if discrimination is not None else None,
+            'answers': [_answer_analysis(answer, stats.responses) for answer in question.answers.all()],
+        })
+    return result
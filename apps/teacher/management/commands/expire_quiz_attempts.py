@@ -0,0 +1,27 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.teacher.expiry import EXPIRY_GRACE, expire_attempts
+
+
+class Command(BaseCommand):
+    help = "Vaqti tugagan test urinishlarini saqlangan javoblar bilan avtomatik yakunlaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--grace', type=int, default=int(EXPIRY_GRACE.total_seconds()),
+                            help="Muddatdan keyin kutiladigan qo'shimcha vaqt (soniya)")
+        parser.add_argument('--loop', action='store_true', help="To'xtamasdan har --sleep soniyada tekshirib turadi")
+        parser.add_argument('--sleep', type=float, default=30.0, help="--loop rejimida tekshirish oralig'i (soniya)")
+
+    def handle(self, *args, **options):
+        grace = timedelta(seconds=options['grace'])
+        while True:
+            closed = expire_attempts(grace=grace, batch_size=options['batch_size'])
+            if closed:
+                self.stdout.write(f"Closed {closed} overdue attempt(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.teacher.autosave import flush_drafts
+
+
+class Command(BaseCommand):
+    help = "Keshdagi avtomatik saqlangan test javoblarini UserAnswer jadvaliga yozadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help="To'xtamasdan har --sleep soniyada yozib turadi")
+        parser.add_argument('--sleep', type=float, default=10.0, help="--loop rejimida yozish oralig'i (soniya)")
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flush_drafts(batch_size=options['batch_size'])
+            if flushed:
+                self.stdout.write(f"Flushed {flushed} attempt(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.teacher.models import Category, Quiz, Teacher
+from apps.teacher.quiz_io import IMPORT_CHUNK_SIZE, QUESTION_FORMATS, detect_format, import_questions
+
+
+class Command(BaseCommand):
+    help = "Savollar bankini JSONL, GIFT yoki Moodle XML fayldan testga import qiladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Import qilinadigan fayl")
+        parser.add_argument('--format', choices=QUESTION_FORMATS, dest='file_format',
+                            help="Fayl formati (berilmasa kengaytmadan aniqlanadi)")
+        parser.add_argument('--quiz', type=int, help="Savollar qo'shiladigan mavjud test")
+        parser.add_argument('--title', help="Yangi test nomi (--quiz berilmaganda)")
+        parser.add_argument('--category', type=int, help="Yangi test kategoriyasi")
+        parser.add_argument('--teacher', type=int, help="Yangi test o'qituvchisi")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help="Bitta INSERT dagi savollar soni")
+        parser.add_argument('--dry-run', action='store_true', help="Faqat tekshiradi, bazaga yozmaydi")
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or detect_format(options['path'])
+        if file_format is None:
+            raise CommandError("Fayl formatini aniqlab bo'lmadi, --format bering")
+
+        if options['quiz']:
+            quiz = Quiz.objects.filter(pk=options['quiz']).first()
+            if quiz is None:
+                raise CommandError(f"Test #{options['quiz']} topilmadi")
+        elif options['title'] and options['category'] and options['teacher']:
+            try:
+                quiz = Quiz(
+                    title=options['title'],
+                    category=Category.objects.get(pk=options['category']),
+                    teacher=Teacher.objects.get(pk=options['teacher']),
+                )
+            except (Category.DoesNotExist, Teacher.DoesNotExist) as exc:
+                raise CommandError(str(exc))
+            if not options['dry_run']:
+                quiz.save()
+        else:
+            raise CommandError("--quiz yoki --title, --category va --teacher berilishi kerak")
+
+        with open(options['path'], 'rb') as stream:
+            report = import_questions(
+                quiz, stream, file_format, chunk_size=options['chunk_size'], dry_run=options['dry_run']
+            )
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Quiz {quiz.pk}: {report['rows']} row(s), {report['created']} question(s) "
+            f"and {report['answers']} answer(s) created, {len(report['errors'])} error(s)"
+        ))
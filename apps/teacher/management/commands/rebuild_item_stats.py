@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.teacher.item_analysis import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Savollar statistikasini (item analysis) UserAnswer jadvalidan qaytadan hisoblaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', dest='quiz_ids',
+                            help="Faqat shu test(lar) uchun (bir necha marta berish mumkin)")
+        parser.add_argument('--chunk-size', type=int, default=100, help="Bir tranzaksiyada hisoblanadigan testlar soni")
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_stats(options['quiz_ids'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats of {rebuilt} question(s)"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.teacher.near_duplicates import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Deyarli bir xil savollarni qidirish uchun MinHash/LSH indeksini qaytadan quradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', type=int, help="Faqat shu kategoriya savollari uchun")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Bir tranzaksiyada indekslanadigan savollar soni")
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(options['category'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} question(s)"))
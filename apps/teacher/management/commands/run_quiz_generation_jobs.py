@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.teacher.ai_generation import run_generation_jobs
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi AI test generatsiyasi ishlarini bajaradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, help="Bir vaqtda yuboriladigan so'rovlar soni (standart: AI_QUIZ_CONCURRENCY)")
+        parser.add_argument('--fake-latency', type=float, default=0.0, help="'fake' provayder javobining sun'iy kechikishi (soniya)")
+        parser.add_argument('--loop', action='store_true', help="Navbat bo'shaganda to'xtamasdan kutib turadi")
+        parser.add_argument('--sleep', type=float, default=5.0, help="--loop rejimida tekshirish oralig'i (soniya)")
+
+    def handle(self, *args, **options):
+        provider_options = {'fake': {'latency': options['fake_latency']}}
+        while True:
+            done, failed = run_generation_jobs(concurrency=options['concurrency'], provider_options=provider_options)
+            if done or failed:
+                self.stdout.write(f"Done: {done}, failed: {failed}")
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
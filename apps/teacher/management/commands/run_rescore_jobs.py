@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.teacher.rescoring import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Javob kaliti o'zgargan testlarning yakunlangan urinishlarini qayta baholaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Bir tranzaksiyada qayta baholanadigan urinishlar soni")
+        parser.add_argument('--loop', action='store_true', help="Navbat bo'shaganda to'xtamasdan kutib turadi")
+        parser.add_argument('--sleep', type=float, default=5.0, help="--loop rejimida tekshirish oralig'i (soniya)")
+
+    def handle(self, *args, **options):
+        while True:
+            done, failed = run_pending_jobs(chunk_size=options['chunk_size'])
+            if done or failed:
+                self.stdout.write(f"Done: {done}, failed: {failed}")
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
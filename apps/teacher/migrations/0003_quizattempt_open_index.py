@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0002_initial'),
+        ('teacher', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quiz',
+            name='difficulty',
+            field=models.CharField(choices=[('easy', 'Oson'), ('medium', 'Orta'), ('hard', 'Qiyin')], default='medium', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='quiz',
+            name='max_attempts',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name='quiz',
+            name='topic',
+            field=models.CharField(blank=True, help_text='Test uchun asosiy mavzu AI generatsiyasi ', max_length=255, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['is_completed', 'started_at'], name='teacher_qui_is_comp_52664c_idx'),
+        ),
+    ]
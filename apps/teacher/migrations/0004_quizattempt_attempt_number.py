@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:42
+
+from django.db import migrations, models
+
+
+def number_attempts(apps, schema_editor):
+    """Number existing attempts per (student, quiz) in the order they were started."""
+    QuizAttempt = apps.get_model('teacher', 'QuizAttempt')
+
+    attempts, last = [], {}
+    for attempt in QuizAttempt.objects.only('id', 'student_id', 'quiz_id').order_by('started_at', 'id').iterator():
+        pair = (attempt.student_id, attempt.quiz_id)
+        last[pair] = attempt.attempt_number = last.get(pair, 0) + 1
+        attempts.append(attempt)
+    QuizAttempt.objects.bulk_update(attempts, ['attempt_number'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0002_initial'),
+        ('teacher', '0003_quizattempt_open_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='attempt_number',
+            field=models.PositiveIntegerField(default=1, help_text="O'quvchining shu testdagi nechanchi urinishi"),
+        ),
+        migrations.RunPython(number_attempts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='quizattempt',
+            constraint=models.UniqueConstraint(fields=('student', 'quiz', 'attempt_number'), name='unique_quiz_attempt_number'),
+        ),
+    ]
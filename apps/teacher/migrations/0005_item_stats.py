@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0004_quizattempt_attempt_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerStats',
+            fields=[
+                ('answer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='teacher.answer')),
+                ('selected', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Javob statistikasi',
+                'verbose_name_plural': 'Javob statistikalari',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='teacher.question')),
+                ('responses', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_squares', models.FloatField(default=0)),
+                ('correct_score_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Savol statistikasi',
+                'verbose_name_plural': 'Savol statistikalari',
+            },
+        ),
+    ]
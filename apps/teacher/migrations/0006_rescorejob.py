@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0005_item_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RescoreJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Kutilmoqda'), ('running', 'Bajarilmoqda'), ('done', 'Tugadi'), ('failed', 'Xato')], default='pending', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rescore_jobs', to='teacher.quiz')),
+            ],
+            options={
+                'verbose_name': 'Qayta baholash',
+                'verbose_name_plural': 'Qayta baholashlar',
+                'indexes': [models.Index(fields=['status', 'id'], name='teacher_res_status_c627f6_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('quiz',), name='unique_pending_rescore_job')],
+            },
+        ),
+    ]
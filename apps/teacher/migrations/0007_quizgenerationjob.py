@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0006_rescorejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizGenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=255)),
+                ('difficulty', models.CharField(choices=[('easy', 'Oson'), ('medium', 'Orta'), ('hard', 'Qiyin')], default='medium', max_length=10)),
+                ('count', models.PositiveIntegerField(help_text="So'ralgan savollar soni")),
+                ('provider', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Kutilmoqda'), ('running', 'Bajarilmoqda'), ('done', 'Tugadi'), ('failed', 'Xato')], default='pending', max_length=20)),
+                ('questions_created', models.PositiveIntegerField(default=0)),
+                ('cached_batches', models.PositiveIntegerField(default=0, help_text="Keshdan olingan so'rovlar soni")),
+                ('error', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to='teacher.quiz')),
+            ],
+            options={
+                'verbose_name': 'AI generatsiya',
+                'verbose_name_plural': 'AI generatsiyalar',
+                'indexes': [models.Index(fields=['status', 'id'], name='teacher_qui_status_aa51b9_idx')],
+            },
+        ),
+    ]
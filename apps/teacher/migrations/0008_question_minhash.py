@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0007_quizgenerationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSignature',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='teacher.question')),
+                ('signature', models.BinaryField()),
+            ],
+            options={
+                'verbose_name': 'Savol imzosi',
+                'verbose_name_plural': 'Savol imzolari',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='teacher.question')),
+            ],
+            options={
+                'verbose_name': "Savol LSH bo'lagi",
+                'verbose_name_plural': "Savol LSH bo'laklari",
+                'indexes': [models.Index(fields=['band', 'bucket'], name='teacher_que_band_3ef2b9_idx')],
+            },
+        ),
+    ]
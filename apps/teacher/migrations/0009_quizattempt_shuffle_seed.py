@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:59
+
+import apps.teacher.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0008_question_minhash'),
+    ]
+
+    operations = [
+        # Mavjud urinishlar NULL bo'lib qoladi (savollar asl tartibda), faqat yangilari aralashtiriladi
+        migrations.AddField(
+            model_name='quizattempt',
+            name='shuffle_seed',
+            field=models.PositiveIntegerField(blank=True, help_text="Savollar va javoblar tartibini aralashtirish uchun (bo'sh bo'lsa asl tartib)", null=True),
+        ),
+        migrations.AlterField(
+            model_name='quizattempt',
+            name='shuffle_seed',
+            field=models.PositiveIntegerField(blank=True, default=apps.teacher.models.new_shuffle_seed, help_text="Savollar va javoblar tartibini aralashtirish uchun (bo'sh bo'lsa asl tartib)", null=True),
+        ),
+    ]
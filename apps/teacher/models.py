@@ -1,6 +1,9 @@
 
+import secrets
+
 from django.utils import timezone
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from apps.users.models import User, Status
 from apps.student.models import Student
 
@@ -197,6 +200,14 @@ class QuizAssignment(models.Model):
         verbose_name_plural = "Test tayinlashlar"
 
 
+class AttemptStartConflict(Exception):
+    pass
+
+
+def new_shuffle_seed():
+    return secrets.randbits(31)
+
+
 class QuizAttempt(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="attempts")
@@ -205,6 +216,13 @@ class QuizAttempt(models.Model):
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
+    attempt_number = models.PositiveIntegerField(default=1, help_text="O'quvchining shu testdagi nechanchi urinishi")
+    shuffle_seed = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        default=new_shuffle_seed,
+        help_text="Savollar va javoblar tartibini aralashtirish uchun (bo'sh bo'lsa asl tartib)"
+    )
     
     @property
     def time_taken(self):
@@ -224,6 +242,12 @@ class QuizAttempt(models.Model):
     class Meta:
         verbose_name = "Test urinishi"
         verbose_name_plural = "Test urinishlari"
+        indexes = [
+            models.Index(fields=['is_completed', 'started_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'quiz', 'attempt_number'], name='unique_quiz_attempt_number'),
+        ]
 
     def duration(self):
         if self.completed_at:
@@ -234,15 +258,49 @@ class QuizAttempt(models.Model):
             return timezone.now() - self.started_at
 
     def score_percentage(self):
-        total_questions = self.user_answers.count()
+        if 'user_answers' in getattr(self, '_prefetched_objects_cache', {}):
+            # Javoblar oldindan yuklangan bo'lsa, bazaga qayta murojaat qilinmaydi
+            user_answers = self.user_answers.all()
+            total_questions = len(user_answers)
+            correct_answers = sum(1 for user_answer in user_answers if user_answer.is_correct)
+        else:
+            total_questions = self.user_answers.count()
+            correct_answers = self.user_answers.filter(is_correct=True).count() if total_questions else 0
         if total_questions > 0:
-            correct_answers = self.user_answers.filter(is_correct=True).count()
             return round((correct_answers / total_questions) * 100)
         return 0
     
     @classmethod
     def get_attempts_count(cls, student, quiz):
         return cls.objects.filter(student=student, quiz=quiz).count()
+    
+    @classmethod
+    def start(cls, student, quiz, quiz_assignment_id=None, retries=3):
+        """
+        Create the student's next attempt, or return None if max_attempts is used up.
+
+        The next number is read and checked against the limit inside the
+        transaction. The unique (student, quiz, attempt_number) constraint
+        settles double clicks: the loser gets an IntegrityError and tries again
+        with a fresh number. Raises AttemptStartConflict if every retry loses.
+        """
+        for _ in range(retries):
+            try:
+                with transaction.atomic():
+                    next_number = cls.objects.filter(student=student, quiz=quiz).aggregate(
+                        last=Coalesce(models.Max('attempt_number'), 0)
+                    )['last'] + 1
+                    if next_number > quiz.max_attempts:
+                        return None
+                    return cls.objects.create(
+                        student=student,
+                        quiz=quiz,
+                        quiz_assignment_id=quiz_assignment_id,
+                        attempt_number=next_number,
+                    )
+            except IntegrityError:
+                continue
+        raise AttemptStartConflict()
 
 
 class UserAnswer(models.Model):
@@ -260,4 +318,148 @@ class UserAnswer(models.Model):
     class Meta:
         verbose_name = "Foydalanuvchi javobi"
         verbose_name_plural = "Foydalanuvchi javoblari"
-        unique_together = ['attempt', 'question']
\ No newline at end of file
+        unique_together = ['attempt', 'question']
+
+
+class RescoreStatus(models.TextChoices):
+    PENDING = 'pending', 'Kutilmoqda'
+    RUNNING = 'running', 'Bajarilmoqda'
+    DONE = 'done', 'Tugadi'
+    FAILED = 'failed', 'Xato'
+
+
+class RescoreJob(models.Model):
+    """Re-grades a quiz's completed attempts after its answer key changed."""
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="rescore_jobs")
+    status = models.CharField(max_length=20, choices=RescoreStatus.choices, default=RescoreStatus.PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.get_status_display()} ({self.processed}/{self.total})"
+
+    class Meta:
+        verbose_name = "Qayta baholash"
+        verbose_name_plural = "Qayta baholashlar"
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+        constraints = [
+            # Bir test uchun navbatda faqat bitta ish turadi
+            models.UniqueConstraint(
+                fields=['quiz'], condition=models.Q(status='pending'), name='unique_pending_rescore_job'
+            ),
+        ]
+
+
+class GenerationStatus(models.TextChoices):
+    PENDING = 'pending', 'Kutilmoqda'
+    RUNNING = 'running', 'Bajarilmoqda'
+    DONE = 'done', 'Tugadi'
+    FAILED = 'failed', 'Xato'
+
+
+class QuizGenerationJob(models.Model):
+    """Adds AI-generated questions on ``topic`` to a quiz."""
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="generation_jobs")
+    topic = models.CharField(max_length=255)
+    difficulty = models.CharField(max_length=10, choices=Quiz.DIFFICULTY_CHOICES, default='medium')
+    count = models.PositiveIntegerField(help_text="So'ralgan savollar soni")
+    provider = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, choices=GenerationStatus.choices, default=GenerationStatus.PENDING)
+    questions_created = models.PositiveIntegerField(default=0)
+    cached_batches = models.PositiveIntegerField(default=0, help_text="Keshdan olingan so'rovlar soni")
+    error = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.topic} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "AI generatsiya"
+        verbose_name_plural = "AI generatsiyalar"
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+
+class QuestionStats(models.Model):
+    """
+    Running sums for item analysis of a question over completed attempts.
+
+    Every completed attempt of the quiz is one response (unanswered counts
+    as incorrect); ``score_*`` are sums of the attempt scores, so difficulty
+    and the point-biserial discrimination can be derived without reading
+    UserAnswer.
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    responses = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    score_squares = models.FloatField(default=0)
+    correct_score_sum = models.FloatField(default=0)
+
+    @property
+    def p_value(self):
+        """Qiyinlik darajasi: to'g'ri javob berganlar ulushi."""
+        if not self.responses:
+            return None
+        return self.correct / self.responses
+
+    @property
+    def discrimination(self):
+        """Point-biserial correlation between answering correctly and the attempt score."""
+        n, x, y = self.responses, self.correct, self.score_sum
+        spread = (n * x - x * x) * (n * self.score_squares - y * y)
+        if spread <= 0:
+            return None
+        return (n * self.correct_score_sum - x * y) / spread ** 0.5
+
+    def __str__(self):
+        return f"{self.question} ({self.responses})"
+
+    class Meta:
+        verbose_name = "Savol statistikasi"
+        verbose_name_plural = "Savol statistikalari"
+
+
+class AnswerStats(models.Model):
+    answer = models.OneToOneField(Answer, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    selected = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.answer} ({self.selected})"
+
+    class Meta:
+        verbose_name = "Javob statistikasi"
+        verbose_name_plural = "Javob statistikalari"
+
+
+class QuestionSignature(models.Model):
+    """MinHash signature of a question's text and answers (near-duplicate search)."""
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name="signature")
+    signature = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Savol imzosi"
+        verbose_name_plural = "Savol imzolari"
+
+
+class QuestionBand(models.Model):
+    """One LSH bucket of a question; questions sharing a bucket are duplicate candidates."""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="bands")
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        verbose_name = "Savol LSH bo'lagi"
+        verbose_name_plural = "Savol LSH bo'laklari"
+        indexes = [
+            models.Index(fields=['band', 'bucket']),
+        ]
@@ -0,0 +1,227 @@
+import hashlib
+import re
+from array import array
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from apps.teacher.models import Answer, Question, QuestionBand, QuestionSignature
+
+# 64 ta MinHash qiymati 16 ta bo'lakka (har biri 4 qiymat) bo'linadi: o'xshashligi
+# ~0.5 dan yuqori juftliklar kamida bitta bo'lakda deyarli har doim uchrashadi
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SIMILAR_THRESHOLD = 0.5
+DUPLICATE_THRESHOLD = 0.8
+
+_WORD = re.compile(r'\w+')
+
+
+def shingles(text, answer_texts=()):
+    """Word bigrams of the question and its answers (answer order does not matter)."""
+    words = _WORD.findall(' '.join([text, *sorted(answer_texts)]).lower())
+    if len(words) < 2:
+        return set(words)
+    return {f'{first} {second}' for first, second in zip(words, words[1:])}
+
+
+def minhash(shingle_set):
+    """
+    NUM_PERM-value MinHash signature of a non-empty shingle set.
+
+    One SHAKE-128 digest per shingle gives NUM_PERM independent 64-bit
+    hashes at once; the column-wise minimum is taken in C by map/zip.
+    """
+    columns = [array('Q', hashlib.shake_128(shingle.encode()).digest(NUM_PERM * 8)) for shingle in shingle_set]
+    return array('Q', map(min, zip(*columns)))
+
+
+def band_buckets(signature):
+    """``(band, bucket)`` LSH keys of a signature; buckets fit a signed BigIntegerField."""
+    return [
+        (band, int.from_bytes(
+            hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+            'little', signed=True,
+        ))
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_PERM
+
+
+def _unpack(data):
+    signature = array('Q')
+    signature.frombytes(bytes(data))
+    return signature
+
+
+def index_questions(question_ids, batch_size=1000):
+    """
+    (Re)build the signatures and LSH buckets of ``question_ids``.
+
+    Texts are read with two queries and the old rows replaced with two
+    bulk INSERTs, whatever the number of questions; deleted questions simply
+    drop out of the index.
+    """
+    question_ids = list(question_ids)
+    if not question_ids:
+        return 0
+    texts = dict(Question.objects.filter(pk__in=question_ids).values_list('id', 'text'))
+    answers = {}
+    for question_id, answer_text in Answer.objects.filter(question_id__in=texts).values_list('question_id', 'text'):
+        answers.setdefault(question_id, []).append(answer_text)
+
+    signatures, bands = [], []
+    for question_id, text in texts.items():
+        shingle_set = shingles(text, answers.get(question_id, ()))
+        if not shingle_set:
+            continue
+        signature = minhash(shingle_set)
+        signatures.append(QuestionSignature(question_id=question_id, signature=signature.tobytes()))
+        bands.extend(
+            QuestionBand(question_id=question_id, band=band, bucket=bucket)
+            for band, bucket in band_buckets(signature)
+        )
+
+    with transaction.atomic():
+        QuestionSignature.objects.filter(question_id__in=question_ids).delete()
+        QuestionBand.objects.filter(question_id__in=question_ids).delete()
+        QuestionSignature.objects.bulk_create(signatures, batch_size=batch_size)
+        QuestionBand.objects.bulk_create(bands, batch_size=batch_size)
+    return len(signatures)
+
+
+def request_index(question_id):
+    """index_questions() for one question once the current transaction commits."""
+    transaction.on_commit(lambda: index_questions([question_id]))
+
+
+def rebuild_index(category_id=None, chunk_size=1000):
+    """Index every question (of one category), ``chunk_size`` at a time."""
+    questions = Question.objects.order_by('pk')
+    if category_id:
+        questions = questions.filter(quiz__category_id=category_id)
+    question_ids = list(questions.values_list('pk', flat=True))
+    indexed = 0
+    for start in range(0, len(question_ids), chunk_size):
+        indexed += index_questions(question_ids[start:start + chunk_size])
+    return indexed
+
+
+def _signatures(question_ids):
+    return {
+        question_id: _unpack(data)
+        for question_id, data in QuestionSignature.objects.filter(question_id__in=question_ids).values_list(
+            'question_id', 'signature'
+        )
+    }
+
+
+def _question_info(question_ids):
+    return {
+        question.pk: {
+            'question_id': question.pk,
+            'quiz_id': question.quiz_id,
+            'quiz_title': question.quiz.title,
+            'text': question.text,
+        }
+        for question in Question.objects.filter(pk__in=question_ids).select_related('quiz')
+    }
+
+
+def similar_questions(question, threshold=SIMILAR_THRESHOLD, limit=20):
+    """
+    Questions of the whole bank that look like ``question``, most similar first.
+
+    Only questions sharing at least one LSH bucket are compared, so the
+    cost depends on the number of candidates, not on the size of the bank.
+    """
+    signature = _signatures([question.pk]).get(question.pk)
+    if signature is None:
+        index_questions([question.pk])
+        signature = _signatures([question.pk]).get(question.pk)
+        if signature is None:
+            return []
+
+    buckets = reduce(or_, (Q(band=band, bucket=bucket) for band, bucket in band_buckets(signature)))
+    candidate_ids = set(
+        QuestionBand.objects.filter(buckets).exclude(question_id=question.pk).values_list('question_id', flat=True)
+    )
+    scored = sorted(
+        (
+            (round(similarity(signature, candidate), 4), candidate_id)
+            for candidate_id, candidate in _signatures(candidate_ids).items()
+        ),
+        reverse=True,
+    )
+    scored = [(score, candidate_id) for score, candidate_id in scored if score >= threshold][:limit]
+    info = _question_info([candidate_id for _, candidate_id in scored])
+    return [{**info[candidate_id], 'similarity': score} for score, candidate_id in scored if candidate_id in info]
+
+
+def category_duplicates(category_id, threshold=DUPLICATE_THRESHOLD):
+    """
+    Groups of near-duplicate questions among the quizzes of a category.
+
+    The database returns only the bucket rows shared by two or more questions
+    (served by the (band, bucket) index). Candidate pairs come from those
+    buckets and are confirmed with their signatures. Confirmed pairs are
+    merged into groups with union-find. Biggest groups come first.
+    """
+    category_bands = QuestionBand.objects.filter(question__quiz__category_id=category_id)
+    shared = category_bands.filter(
+        Exists(
+            category_bands.filter(band=OuterRef('band'), bucket=OuterRef('bucket')).exclude(
+                question_id=OuterRef('question_id')
+            )
+        )
+    ).values_list('band', 'bucket', 'question_id')
+
+    buckets = {}
+    for band, bucket, question_id in shared:
+        buckets.setdefault((band, bucket), set()).add(question_id)
+    pairs = set()
+    for members in buckets.values():
+        members = sorted(members)
+        pairs.update((first, second) for index, first in enumerate(members) for second in members[index + 1:])
+
+    signatures = _signatures({question_id for pair in pairs for question_id in pair})
+    parents, best = {}, {}
+
+    def find(question_id):
+        parents.setdefault(question_id, question_id)
+        while parents[question_id] != question_id:
+            parents[question_id] = parents[parents[question_id]]
+            question_id = parents[question_id]
+        return question_id
+
+    for first, second in pairs:
+        score = similarity(signatures[first], signatures[second])
+        if score < threshold:
+            continue
+        root_first, root_second = find(first), find(second)
+        if root_first != root_second:
+            parents[root_second] = root_first
+        best[first] = max(best.get(first, 0), score)
+        best[second] = max(best.get(second, 0), score)
+
+    groups = {}
+    for question_id in best:
+        groups.setdefault(find(question_id), []).append(question_id)
+    info = _question_info(best)
+    report = [
+        {
+            'size': len(members),
+            'similarity': round(max(best[question_id] for question_id in members), 4),
+            'questions': [info[question_id] for question_id in sorted(members) if question_id in info],
+        }
+        for members in groups.values()
+    ]
+    report.sort(key=lambda group: (-group['size'], -group['similarity']))
+    return report
@@ -0,0 +1,349 @@
+import html
+import json
+import re
+from xml.etree.ElementTree import ParseError, iterparse
+from xml.sax.saxutils import escape, quoteattr
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.html import strip_tags
+
+from apps.teacher.answer_keys import invalidate_answer_key
+from apps.teacher.models import Answer, Question
+from apps.teacher.near_duplicates import index_questions
+
+QUESTION_FORMATS = ('jsonl', 'gift', 'xml')
+IMPORT_CHUNK_SIZE = 1000
+EXPORT_CHUNK_SIZE = 500
+
+_EXTENSIONS = {'jsonl': 'jsonl', 'json': 'jsonl', 'gift': 'gift', 'txt': 'gift', 'xml': 'xml'}
+_CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'gift': 'text/plain; charset=utf-8',
+    'xml': 'application/xml; charset=utf-8',
+}
+_ANSWER_MAX_LENGTH = Answer._meta.get_field('text').max_length
+
+
+def detect_format(filename):
+    """Question file format from the file extension, None when unknown."""
+    return _EXTENSIONS.get(filename.rsplit('.', 1)[-1].lower()) if '.' in filename else None
+
+
+def _text_lines(stream):
+    """Decoded lines of a binary file (uploaded or opened with 'rb'), without the BOM."""
+    for number, line in enumerate(stream, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if number == 1:
+            line = line.lstrip('\ufeff')
+        yield number, line.rstrip('\r\n')
+
+
+def clean_question(data):
+    """Validate one parsed question; returns the normalised dict or raises ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError("Savol obyekt ko'rinishida bo'lishi kerak")
+    text = data.get('text')
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("Savol matni bo'sh")
+    points = data.get('points', 1)
+    if isinstance(points, bool) or not isinstance(points, int) or points < 1:
+        raise ValueError("Ball musbat butun son bo'lishi kerak")
+    explanation = data.get('explanation') or ''
+    if not isinstance(explanation, str):
+        raise ValueError("Tushuntirish matn bo'lishi kerak")
+
+    answers = data.get('answers')
+    if not isinstance(answers, list) or not answers:
+        raise ValueError("Kamida bitta javob bo'lishi kerak")
+    cleaned = []
+    for index, answer in enumerate(answers, 1):
+        answer_text = answer.get('text') if isinstance(answer, dict) else None
+        if not isinstance(answer_text, str) or not answer_text.strip():
+            raise ValueError(f"{index}-javob matni bo'sh")
+        if len(answer_text.strip()) > _ANSWER_MAX_LENGTH:
+            raise ValueError(f"{index}-javob {_ANSWER_MAX_LENGTH} belgidan uzun")
+        cleaned.append({'text': answer_text.strip(), 'is_correct': bool(answer.get('is_correct', False))})
+    if not any(answer['is_correct'] for answer in cleaned):
+        raise ValueError("Kamida bitta to'g'ri javob bo'lishi kerak")
+
+    return {'text': text.strip(), 'points': points, 'explanation': explanation.strip(), 'answers': cleaned}
+
+
+# JSON Lines: har bir qatorda bitta savol
+
+def parse_jsonl(stream):
+    """Yield ``(line, question_dict, error)`` for every non-empty line."""
+    lines = _text_lines(stream)
+    while True:
+        try:
+            number, line = next(lines)
+        except StopIteration:
+            return
+        except UnicodeDecodeError:
+            yield None, None, "Fayl UTF-8 kodlashda emas"
+            return
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line), None
+        except ValueError as exc:
+            yield number, None, f"JSON xatosi: {exc}"
+
+
+def iter_jsonl(questions):
+    for question in questions:
+        yield json.dumps({
+            'text': question.text,
+            'points': question.points,
+            'explanation': question.explanation,
+            'answers': [{'text': answer.text, 'is_correct': answer.is_correct} for answer in question.answers.all()],
+        }, ensure_ascii=False) + '\n'
+
+
+# GIFT (Moodle): savollar bo'sh qator bilan ajratiladi, "matn {=to'g'ri ~noto'g'ri}"
+
+_GIFT_SPECIAL = '~=#{}:\\'
+_GIFT_PLACEHOLDERS = {char: chr(0xE000 + index) for index, char in enumerate(_GIFT_SPECIAL)}
+_GIFT_RESTORE = {ord(placeholder): char for char, placeholder in _GIFT_PLACEHOLDERS.items()}
+_GIFT_ESCAPED = re.compile(r'\\([~=#{}:\\n])')
+_GIFT_WEIGHT = re.compile(r'^%(-?\d+(?:\.\d+)?)%')
+_GIFT_TRUE = {'T': True, 'TRUE': True, 'F': False, 'FALSE': False}
+
+
+def _gift_protect(text):
+    return _GIFT_ESCAPED.sub(lambda match: '\n' if match.group(1) == 'n' else _GIFT_PLACEHOLDERS[match.group(1)], text)
+
+
+def _gift_restore(text):
+    return text.translate(_GIFT_RESTORE).strip()
+
+
+def _gift_escape(text):
+    return ''.join('\\' + char if char in _GIFT_SPECIAL else char for char in text).replace('\n', '\\n')
+
+
+def _parse_gift_block(block):
+    block = _gift_protect(block)
+    if block.startswith('::'):
+        _, _, block = block[2:].partition('::')
+    block = re.sub(r'^\s*\[(html|moodle|plain|markdown)\]', '', block)
+    start, end = block.find('{'), block.rfind('}')
+    if start == -1 or end < start:
+        raise ValueError("Javoblar bloki {...} topilmadi")
+    text = block[:start] + ' ' + block[end + 1:]
+    body, _, explanation = block[start + 1:end].partition('####')
+    body = body.strip()
+
+    answers = []
+    if body.upper().partition('#')[0].strip() in _GIFT_TRUE:
+        is_true = _GIFT_TRUE[body.upper().partition('#')[0].strip()]
+        answers = [{'text': "To'g'ri", 'is_correct': is_true}, {'text': "Noto'g'ri", 'is_correct': not is_true}]
+    elif not body or body.startswith('#') or '->' in body:
+        raise ValueError("Faqat test va to'g'ri/noto'g'ri savollar qo'llab-quvvatlanadi")
+    else:
+        tokens = re.split(r'([=~])', body)
+        if tokens[0].strip():
+            raise ValueError("Javob '=' yoki '~' bilan boshlanishi kerak")
+        # Faqat '=' bilan yozilgan javoblar qisqa javobli savol, uni test sifatida saqlab bo'lmaydi
+        if '~' not in tokens[1::2]:
+            raise ValueError("Qisqa javobli savollar qo'llab-quvvatlanmaydi")
+        for marker, answer_text in zip(tokens[1::2], tokens[2::2]):
+            answer_text = answer_text.partition('#')[0].strip()
+            weight = _GIFT_WEIGHT.match(answer_text)
+            if weight:
+                answer_text = answer_text[weight.end():]
+            is_correct = marker == '=' or (weight is not None and float(weight.group(1)) > 0)
+            answers.append({'text': _gift_restore(answer_text), 'is_correct': is_correct})
+
+    return {'text': _gift_restore(' '.join(text.split())), 'explanation': _gift_restore(explanation), 'answers': answers}
+
+
+def parse_gift(stream):
+    """Yield ``(first_line, question_dict, error)`` for every GIFT question."""
+    block, first_line = [], None
+    lines = _text_lines(stream)
+    while True:
+        try:
+            number, line = next(lines)
+        except StopIteration:
+            line = None
+        except UnicodeDecodeError:
+            yield None, None, "Fayl UTF-8 kodlashda emas"
+            return
+
+        stripped = line.strip() if line is not None else ''
+        if stripped.startswith('//') or stripped.startswith('$CATEGORY:'):
+            continue
+        if stripped:
+            if not block:
+                first_line = number
+            block.append(line)
+            continue
+        if block:
+            try:
+                yield first_line, _parse_gift_block('\n'.join(block)), None
+            except ValueError as exc:
+                yield first_line, None, str(exc)
+            block = []
+        if line is None:
+            return
+
+
+def iter_gift(questions):
+    for question in questions:
+        lines = [f'::Q{question.pk}:: {_gift_escape(question.text)} {{']
+        for answer in question.answers.all():
+            lines.append(f"\t{'=' if answer.is_correct else '~'}{_gift_escape(answer.text)}")
+        if question.explanation:
+            lines.append(f'\t####{_gift_escape(question.explanation)}')
+        lines.append('}')
+        yield '\n'.join(lines) + '\n\n'
+
+
+# Moodle XML: <quiz><question type="multichoice">...</question></quiz>
+
+_XML_TYPES = ('multichoice', 'truefalse')
+
+
+def _xml_text(element, path):
+    value = element.findtext(path) or ''
+    return ' '.join(html.unescape(strip_tags(value)).split())
+
+
+def _parse_xml_question(element):
+    question_type = element.get('type')
+    if question_type not in _XML_TYPES:
+        raise ValueError(f"'{question_type}' turidagi savollar qo'llab-quvvatlanmaydi")
+    try:
+        points = max(1, round(float(element.findtext('defaultgrade') or 1)))
+        answers = [
+            {'text': _xml_text(answer, 'text'), 'is_correct': float(answer.get('fraction', 0)) > 0}
+            for answer in element.iter('answer')
+        ]
+    except ValueError:
+        raise ValueError("defaultgrade yoki fraction son emas")
+    return {
+        'text': _xml_text(element, 'questiontext/text'),
+        'points': points,
+        'explanation': _xml_text(element, 'generalfeedback/text'),
+        'answers': answers,
+    }
+
+
+def parse_moodle_xml(stream):
+    """
+    Yield ``(question_number, question_dict, error)`` for every Moodle XML question.
+
+    Parsed with iterparse and every finished <question> is cleared, so memory
+    stays flat however large the file is.
+    """
+    number = 0
+    try:
+        for _, element in iterparse(stream, events=('end',)):
+            if element.tag != 'question':
+                continue
+            if element.get('type') != 'category':
+                number += 1
+                try:
+                    yield number, _parse_xml_question(element), None
+                except ValueError as exc:
+                    yield number, None, str(exc)
+            element.clear()
+    except ParseError as exc:
+        yield number + 1, None, f"XML xatosi: {exc}"
+
+
+def iter_moodle_xml(questions):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<quiz>\n'
+    for question in questions:
+        answers = list(question.answers.all())
+        correct = sum(1 for answer in answers if answer.is_correct) or 1
+        parts = [
+            '  <question type="multichoice">\n',
+            f'    <name><text>Q{question.pk}</text></name>\n',
+            f'    <questiontext format="plain_text"><text>{escape(question.text)}</text></questiontext>\n',
+            f'    <generalfeedback format="plain_text"><text>{escape(question.explanation)}</text></generalfeedback>\n',
+            f'    <defaultgrade>{question.points}</defaultgrade>\n',
+            f'    <single>{"true" if correct == 1 else "false"}</single>\n',
+        ]
+        for answer in answers:
+            fraction = quoteattr(f'{100 / correct:g}' if answer.is_correct else '0')
+            parts.append(f'    <answer fraction={fraction} format="plain_text"><text>{escape(answer.text)}</text></answer>\n')
+        parts.append('  </question>\n')
+        yield ''.join(parts)
+    yield '</quiz>\n'
+
+
+PARSERS = {'jsonl': parse_jsonl, 'gift': parse_gift, 'xml': parse_moodle_xml}
+WRITERS = {'jsonl': iter_jsonl, 'gift': iter_gift, 'xml': iter_moodle_xml}
+
+
+def insert_questions(quiz, questions):
+    """Bulk-insert cleaned questions with their answers and index them; returns ``(questions, answers)`` counts."""
+    created = Question.objects.bulk_create([
+        Question(quiz=quiz, text=data['text'], points=data['points'], explanation=data['explanation'])
+        for data in questions
+    ])
+    answers = Answer.objects.bulk_create([
+        Answer(question=question, text=answer['text'], is_correct=answer['is_correct'])
+        for question, data in zip(created, questions)
+        for answer in data['answers']
+    ])
+    index_questions([question.pk for question in created])
+    return len(created), len(answers)
+
+
+def import_questions(quiz, stream, file_format, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False):
+    """
+    Add the questions of a JSONL, GIFT or Moodle XML file to ``quiz``.
+
+    The file is parsed as a stream and validated row by row; valid questions
+    are inserted ``chunk_size`` at a time with two bulk INSERTs (questions,
+    then their answers), invalid ones are listed in the report with their
+    line (GIFT, JSONL) or question number (XML). Everything runs in one
+    transaction; ``dry_run`` only validates.
+    """
+    report = {'quiz': quiz.pk, 'format': file_format, 'rows': 0, 'created': 0, 'answers': 0, 'errors': []}
+    pending = []
+
+    def flush():
+        if pending and not dry_run:
+            questions, answers = insert_questions(quiz, pending)
+            report['created'] += questions
+            report['answers'] += answers
+        pending.clear()
+
+    with transaction.atomic():
+        for row, data, error in PARSERS[file_format](stream):
+            report['rows'] += 1
+            if error is None:
+                try:
+                    pending.append(clean_question(data))
+                except ValueError as exc:
+                    error = str(exc)
+            if error is not None:
+                report['errors'].append({'row': row, 'error': error})
+            elif len(pending) >= chunk_size:
+                flush()
+        flush()
+
+        # bulk_create signal yubormaydi: kalit keshini o'zimiz yangilaymiz
+        if report['created']:
+            invalidate_answer_key(quiz.pk)
+    return report
+
+
+def export_questions(quiz, file_format):
+    """Stream the questions of ``quiz`` with their answers in one of QUESTION_FORMATS."""
+    questions = (
+        Question.objects.filter(quiz=quiz)
+        .prefetch_related('answers')
+        .order_by('id')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    extension = 'gift.txt' if file_format == 'gift' else file_format
+    response = StreamingHttpResponse(WRITERS[file_format](questions), content_type=_CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="quiz_{quiz.pk}_questions.{extension}"'
+    return response
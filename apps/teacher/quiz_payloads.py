@@ -0,0 +1,115 @@
+import json
+import random
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.teacher.answer_keys import answer_key_version
+from apps.teacher.models import Question
+from apps.teacher.v1.serializers.serializers import StudentQuestionSerializer
+
+PAYLOAD_TIMEOUT = 60 * 60 * 24
+# Payload tuzilishi o'zgarsa oshiring
+PAYLOAD_VERSION = 2
+BUILD_LOCK_TIMEOUT = 30
+BUILD_WAIT_SECONDS = 5
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+
+
+def render_student_payload(quiz_id):
+    """
+    Questions of a quiz without correctness flags or explanations, as JSON fragments.
+
+    Each question is ``(head, answers)``: the question object up to its
+    ``"answers"`` list and one encoded object per answer, so any order of
+    questions and answers can be assembled by joining bytes.
+    """
+    questions = Question.objects.filter(quiz_id=quiz_id).prefetch_related('answers')
+    fragments = []
+    for question in StudentQuestionSerializer(questions, many=True).data:
+        answers = question.pop('answers')
+        head = _dumps(question)[:-1] + b', "answers": ['
+        fragments.append((head, [_dumps(answer) for answer in answers]))
+    return fragments
+
+
+def shuffle_order(seed, fragments):
+    """
+    Question order and per-question answer orders derived from ``seed``.
+
+    The same seed always gives the same order, so nothing per attempt has to
+    be stored besides the seed itself.
+    """
+    rng = random.Random(seed)
+    question_order = list(range(len(fragments)))
+    rng.shuffle(question_order)
+    answer_orders = []
+    for _, answers in fragments:
+        order = list(range(len(answers)))
+        rng.shuffle(order)
+        answer_orders.append(order)
+    return question_order, answer_orders
+
+
+def assemble_payload(fragments, seed=None):
+    """JSON list of the questions, in the order of ``seed`` (original order without one)."""
+    if seed is None:
+        parts = (head + b', '.join(answers) + b']}' for head, answers in fragments)
+    else:
+        question_order, answer_orders = shuffle_order(seed, fragments)
+        parts = (
+            fragments[index][0] + b', '.join(fragments[index][1][position] for position in answer_orders[index]) + b']}'
+            for index in question_order
+        )
+    return b'[' + b', '.join(parts) + b']'
+
+
+def payload_fragments(quiz_id):
+    """
+    ``(version, fragments)`` of the student-facing questions of a quiz.
+
+    The fragments are rendered once per version of the quiz (the answer key
+    stamp, bumped by every Question/Answer edit) and shared through the
+    cache. While one request renders them the others wait for its result
+    instead of rendering the same thing again.
+    """
+    version = answer_key_version(quiz_id)
+    key = f'quiz:{quiz_id}:student-payload:{PAYLOAD_VERSION}:{version}'
+
+    fragments = cache.get(key)
+    if fragments is not None:
+        return version, fragments
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, BUILD_LOCK_TIMEOUT):
+        try:
+            fragments = render_student_payload(quiz_id)
+            cache.set(key, fragments, PAYLOAD_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return version, fragments
+
+    deadline = time.monotonic() + BUILD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        fragments = cache.get(key)
+        if fragments is not None:
+            return version, fragments
+    return version, render_student_payload(quiz_id)
+
+
+def student_payload(quiz_id, seed=None):
+    """
+    ``(etag, body)`` of the questions of a quiz as one attempt sees them.
+
+    The shared cached fragments are put in the order of the attempt's
+    ``seed``; the shuffle is applied at response time, so shuffling needs no
+    per-attempt copy and no query.
+    """
+    version, fragments = payload_fragments(quiz_id)
+    etag = f'"{quiz_id}-{PAYLOAD_VERSION}-{version}-{seed}"'
+    return etag, assemble_payload(fragments, seed)
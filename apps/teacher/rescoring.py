@@ -0,0 +1,115 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Exists, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from apps.teacher.item_analysis import rebuild_quiz_stats
+from apps.teacher.models import Answer, Question, QuizAttempt, RescoreJob, RescoreStatus, UserAnswer
+from apps.teacher.student_quizzes import invalidate_available_quizzes
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_rescore(quiz_id):
+    """
+    Queue a rescore of the quiz unless one is already waiting.
+
+    Quizzes nobody has completed yet are skipped. The partial unique
+    constraint on pending jobs makes concurrent calls collapse into one row.
+    """
+    if not QuizAttempt.objects.filter(quiz_id=quiz_id, is_completed=True).exists():
+        return
+    RescoreJob.objects.bulk_create([RescoreJob(quiz_id=quiz_id)], ignore_conflicts=True)
+
+
+def request_rescore(quiz_id):
+    """enqueue_rescore() once the current transaction (the answer key edit) commits."""
+    transaction.on_commit(lambda: enqueue_rescore(quiz_id))
+
+
+def claim_job():
+    """Take the oldest pending job and mark it running; None when the queue is empty."""
+    with transaction.atomic():
+        job = (
+            RescoreJob.objects.select_for_update(skip_locked=True)
+            .filter(status=RescoreStatus.PENDING)
+            .order_by('id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = RescoreStatus.RUNNING
+        job.started_at = timezone.now()
+        job.total = QuizAttempt.objects.filter(quiz_id=job.quiz_id, is_completed=True).count()
+        job.save(update_fields=['status', 'started_at', 'total'])
+    return job
+
+
+def rescore_quiz(job, chunk_size=500):
+    """
+    Re-grade the completed attempts of ``job.quiz`` against the current key.
+
+    Works through the attempts by id, ``chunk_size`` at a time, each chunk in
+    its own short transaction: one UPDATE recomputes UserAnswer.is_correct
+    from Answer.is_correct, one recomputes the attempt scores from those
+    flags (same formula as submitting), and the job's progress is bumped.
+    Item statistics of the quiz are rebuilt at the end.
+    """
+    total_questions = Question.objects.filter(quiz_id=job.quiz_id).count()
+    is_correct = Exists(Answer.objects.filter(pk=OuterRef('selected_answer_id'), is_correct=True))
+    correct_count = Coalesce(
+        Subquery(
+            UserAnswer.objects.filter(attempt=OuterRef('pk'), is_correct=True)
+            .order_by()
+            .values('attempt')
+            .annotate(total=Count('id'))
+            .values('total')
+        ),
+        0,
+    )
+    if total_questions:
+        score = ExpressionWrapper(Cast(correct_count, FloatField()) / total_questions * 100, output_field=FloatField())
+    else:
+        score = Value(0.0)
+
+    last_id = 0
+    while True:
+        chunk = list(
+            QuizAttempt.objects.filter(quiz_id=job.quiz_id, is_completed=True, pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'student_id')[:chunk_size]
+        )
+        if not chunk:
+            break
+        attempt_ids = [attempt_id for attempt_id, _ in chunk]
+        last_id = attempt_ids[-1]
+        with transaction.atomic():
+            UserAnswer.objects.filter(attempt_id__in=attempt_ids).update(is_correct=is_correct)
+            QuizAttempt.objects.filter(pk__in=attempt_ids).update(score=score)
+            RescoreJob.objects.filter(pk=job.pk).update(processed=F('processed') + len(attempt_ids))
+            invalidate_available_quizzes(student_id for _, student_id in chunk)
+
+    rebuild_quiz_stats([job.quiz_id])
+
+
+def run_pending_jobs(chunk_size=500, max_jobs=None):
+    """Run queued jobs one after another; returns ``(done, failed)`` counts."""
+    done = failed = 0
+    while max_jobs is None or done + failed < max_jobs:
+        job = claim_job()
+        if job is None:
+            break
+        try:
+            rescore_quiz(job, chunk_size=chunk_size)
+        except Exception as exc:
+            logger.exception("Rescore job %s failed", job.pk)
+            RescoreJob.objects.filter(pk=job.pk).update(
+                status=RescoreStatus.FAILED, error=str(exc)[:255], finished_at=timezone.now()
+            )
+            failed += 1
+        else:
+            RescoreJob.objects.filter(pk=job.pk).update(status=RescoreStatus.DONE, finished_at=timezone.now())
+            done += 1
+    return done, failed
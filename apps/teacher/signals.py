@@ -0,0 +1,68 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.teacher.answer_keys import invalidate_answer_key
+from apps.teacher.models import Answer, Question, QuizAttempt
+from apps.teacher.near_duplicates import request_index
+from apps.teacher.rescoring import request_rescore
+from apps.teacher.student_quizzes import invalidate_available_quizzes
+
+
+def _answer_quiz_id(answer):
+    if Answer.question.is_cached(answer):
+        return answer.question.quiz_id
+    return Question.objects.filter(pk=answer.question_id).values_list('quiz_id', flat=True).first()
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_answer_key(instance.quiz_id)
+    request_index(instance.pk)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance=None, **kwargs):
+    invalidate_answer_key(instance.quiz_id)
+    request_rescore(instance.quiz_id)
+
+
+@receiver(pre_save, sender=Answer)
+def remember_answer_correctness(sender, instance=None, raw=False, **kwargs):
+    instance._previous_is_correct = None
+    if not raw and not instance._state.adding:
+        instance._previous_is_correct = Answer.objects.filter(pk=instance.pk).values_list('is_correct', flat=True).first()
+
+
+@receiver(post_save, sender=Answer)
+def answer_saved(sender, instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    quiz_id = _answer_quiz_id(instance)
+    if quiz_id is None:
+        return
+    invalidate_answer_key(quiz_id)
+    request_index(instance.question_id)
+    # Yangi javobni hali hech kim tanlamagan: faqat mavjud javobning to'g'riligi o'zgarsa
+    previous = instance._previous_is_correct
+    if previous is not None and previous != instance.is_correct:
+        request_rescore(quiz_id)
+
+
+@receiver(post_delete, sender=Answer)
+def answer_deleted(sender, instance=None, **kwargs):
+    quiz_id = _answer_quiz_id(instance)
+    if quiz_id is None:
+        return
+    invalidate_answer_key(quiz_id)
+    request_index(instance.question_id)
+    if instance.is_correct:
+        request_rescore(quiz_id)
+
+
+@receiver(post_save, sender=QuizAttempt)
+@receiver(post_delete, sender=QuizAttempt)
+def invalidate_student_quizzes(sender, instance=None, raw=False, **kwargs):
+    if not raw:
+        invalidate_available_quizzes([instance.student_id])
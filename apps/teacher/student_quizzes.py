@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.teacher.models import QuizAssignment, QuizAttempt
+from apps.users.models import Status
+
+AVAILABLE_QUIZZES_TIMEOUT = 60
+
+
+def _cache_key(student_id):
+    return f'student:{student_id}:available-quizzes'
+
+
+def available_quizzes(student, now=None):
+    """
+    Open assignments of the student's active groups with their attempt state.
+
+    Two queries whatever the number of assignments: the assignments with
+    quiz, category and group joined plus attempt count and latest attempt
+    subqueries, then the latest attempts themselves.
+    """
+    from apps.teacher.v1.serializers.serializers import StudentQuizSerializer
+
+    now = now or timezone.now()
+    student_attempts = QuizAttempt.objects.filter(student=student, quiz=OuterRef('quiz'))
+    assignments = list(
+        QuizAssignment.objects.filter(
+            group__enrollments__student=student,
+            group__enrollments__status=Status.ACTIVE,
+            start_time__lte=now,
+            end_time__gte=now,
+            is_active=True,
+        )
+        .select_related('quiz__category', 'group')
+        .annotate(
+            attempts_count=Coalesce(
+                Subquery(
+                    student_attempts.order_by().values('quiz').annotate(total=Count('id')).values('total'),
+                    output_field=IntegerField(),
+                ),
+                0,
+            ),
+            latest_attempt_id=Subquery(
+                student_attempts.filter(quiz_assignment=OuterRef('pk')).order_by('-started_at', '-id').values('id')[:1]
+            ),
+        )
+        .order_by('end_time', 'id')
+    )
+
+    latest_ids = [assignment.latest_attempt_id for assignment in assignments if assignment.latest_attempt_id]
+    latest_attempts = {
+        attempt.pk: StudentQuizSerializer(attempt).data
+        for attempt in QuizAttempt.objects.filter(pk__in=latest_ids).select_related('quiz')
+    } if latest_ids else {}
+
+    response_data = []
+    for assignment in assignments:
+        quiz = assignment.quiz
+        response_data.append({
+            'quiz_assignment': {
+                'id': assignment.id,
+                'start_time': assignment.start_time,
+                'end_time': assignment.end_time,
+            },
+            'quiz': {
+                'id': quiz.id,
+                'title': quiz.title,
+                'category': quiz.category.name,
+                'difficulty': quiz.difficulty,
+                'time_limit_minutes': quiz.time_limit_minutes,
+                'passing_score': quiz.passing_score,
+            },
+            'group': {
+                'id': assignment.group.id,
+                'title': assignment.group.title,
+            },
+            'attempts_count': assignment.attempts_count,
+            'max_attempts': quiz.max_attempts,
+            'can_attempt': assignment.attempts_count < quiz.max_attempts,
+            'latest_attempt': latest_attempts.get(assignment.latest_attempt_id),
+        })
+    return response_data
+
+
+def get_available_quizzes(student):
+    """available_quizzes() cached for a short while per student."""
+    return cache.get_or_set(_cache_key(student.pk), lambda: available_quizzes(student), AVAILABLE_QUIZZES_TIMEOUT)
+
+
+def invalidate_available_quizzes(student_ids):
+    """Drop the cached lists of these students once the current transaction commits."""
+    keys = [_cache_key(student_id) for student_id in set(student_ids)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,3 +1,104 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import IntegrityError
 from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+
+from apps.teacher.grading import AttemptAlreadyCompleted, submit_attempt
+from apps.teacher.models import Answer, AttemptStartConflict, Category, Question, Quiz, QuizAttempt, UserAnswer
+from apps.users.models import User
+
+
+class QuizTestCase(TestCase):
+    def setUp(self):
+        # Javob kalitlari keshda saqlanadi, testlar orasida id lar takrorlanishi mumkin
+        cache.clear()
+        teacher = User.objects.create(username='teacher', phone_number='1', user_role='teacher').teacher
+        self.student = User.objects.create(username='student', phone_number='2', user_role='student').student
+        self.quiz = Quiz.objects.create(title='Test', category=Category.objects.create(name='Kategoriya'), teacher=teacher)
+        self.questions = []
+        for number in range(4):
+            question = Question.objects.create(quiz=self.quiz, text=f'{number + 1}-savol')
+            answers = [Answer.objects.create(question=question, text=f'{option}', is_correct=option == 0) for option in range(3)]
+            self.questions.append((question, answers))
+
+    def answer(self, index, correct=True):
+        question, answers = self.questions[index]
+        return {'question': question.pk, 'selected_answer': answers[0 if correct else 1].pk}
+
+
+class SubmitAttemptTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.attempt = QuizAttempt.start(self.student, self.quiz)
+
+    def test_score_counts_unanswered_as_incorrect(self):
+        submit_attempt(self.attempt, [self.answer(0), self.answer(1), self.answer(2, correct=False)])
+
+        self.attempt.refresh_from_db()
+        self.assertTrue(self.attempt.is_completed)
+        self.assertEqual(self.attempt.score, 50)
+        self.assertEqual(UserAnswer.objects.filter(attempt=self.attempt).count(), 3)
+        self.assertEqual(UserAnswer.objects.filter(attempt=self.attempt, is_correct=True).count(), 2)
+
+    def test_unknown_ids_are_rejected(self):
+        other = Question.objects.create(quiz=Quiz.objects.create(
+            title='Boshqa', category=self.quiz.category, teacher=self.quiz.teacher
+        ), text='Boshqa savol')
+        foreign_answer = Answer.objects.create(question=other, text='x', is_correct=True)
+        question, _ = self.questions[0]
+
+        for answers in (
+            [{'question': other.pk, 'selected_answer': foreign_answer.pk}],
+            [{'question': question.pk, 'selected_answer': foreign_answer.pk}],
+            [{'question': 'abc'}],
+        ):
+            with self.assertRaises(ValidationError):
+                submit_attempt(self.attempt, answers)
+
+        self.attempt.refresh_from_db()
+        self.assertFalse(self.attempt.is_completed)
+        self.assertFalse(UserAnswer.objects.exists())
+
+    def test_double_submit_raises(self):
+        stale = QuizAttempt.objects.get(pk=self.attempt.pk)
+        submit_attempt(self.attempt, [self.answer(0)])
+
+        with self.assertRaises(AttemptAlreadyCompleted):
+            submit_attempt(stale, [self.answer(0), self.answer(1)])
+        self.assertEqual(QuizAttempt.objects.get(pk=self.attempt.pk).score, 25)
+
+    def test_resubmitted_answer_is_updated_in_place(self):
+        question, answers = self.questions[0]
+        saved = UserAnswer.objects.create(
+            attempt=self.attempt, question=question, selected_answer=answers[1], is_correct=False
+        )
+
+        submit_attempt(self.attempt, [self.answer(0)])
+
+        self.assertEqual(UserAnswer.objects.filter(attempt=self.attempt, question=question).count(), 1)
+        saved.refresh_from_db()
+        self.assertEqual(saved.selected_answer_id, answers[0].pk)
+        self.assertTrue(saved.is_correct)
+
+
+class StartAttemptTests(QuizTestCase):
+    def test_attempts_are_numbered_up_to_the_limit(self):
+        self.quiz.max_attempts = 2
+        self.quiz.save()
+
+        numbers = [QuizAttempt.start(self.student, self.quiz).attempt_number for _ in range(2)]
+        self.assertEqual(numbers, [1, 2])
+        self.assertIsNone(QuizAttempt.start(self.student, self.quiz))
+        self.assertEqual(QuizAttempt.objects.filter(student=self.student, quiz=self.quiz).count(), 2)
+
+    def test_lost_races_are_not_reported_as_the_limit(self):
+        self.quiz.max_attempts = 3
+        self.quiz.save()
+        QuizAttempt.start(self.student, self.quiz)
 
-# Create your tests here.
+        with mock.patch.object(QuizAttempt.objects, 'create', side_effect=IntegrityError):
+            with self.assertRaises(AttemptStartConflict):
+                QuizAttempt.start(self.student, self.quiz)
+        self.assertEqual(QuizAttempt.start(self.student, self.quiz).attempt_number, 2)
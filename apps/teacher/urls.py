@@ -34,16 +34,26 @@ urlpatterns = [
     path('groups/<int:pk>/materials/', GroupViewSet.as_view({'get': 'materials'}), name='group-materials'),
     path('groups/<int:pk>/students/', GroupViewSet.as_view({'get': 'students'}), name='group-students'),
     path('groups/<int:pk>/assignments/', GroupViewSet.as_view({'get': 'assignments'}), name='group-assignments'),
+    path('groups/<int:pk>/gradebook/', GroupViewSet.as_view({'get': 'gradebook'}), name='group-gradebook'),
+    path('groups/<int:pk>/gradebook/export/', GroupViewSet.as_view({'get': 'gradebook_export'}), name='group-gradebook-export'),
     
     path('quizzes/<int:pk>/questions/', QuizViewSet.as_view({'get': 'questions'}), name='quiz-questions'),
     path('quizzes/<int:pk>/assignments/', QuizViewSet.as_view({'get': 'assignments'}), name='quiz-assignments'),
     path('quizzes/<int:pk>/attempts/', QuizViewSet.as_view({'get': 'attempts'}), name='quiz-attempts'),
+    path('quizzes/<int:pk>/rescore/', QuizViewSet.as_view({'get': 'rescore', 'post': 'rescore'}), name='quiz-rescore'),
+    path('quizzes/<int:pk>/generate/', QuizViewSet.as_view({'get': 'generate', 'post': 'generate'}), name='quiz-generate'),
+    path('quizzes/<int:pk>/item-analysis/', QuizViewSet.as_view({'get': 'item_analysis'}), name='quiz-item-analysis'),
+    path('quizzes/<int:pk>/import/', QuizViewSet.as_view({'post': 'import_questions'}), name='quiz-import-questions'),
+    path('quizzes/<int:pk>/export/', QuizViewSet.as_view({'get': 'export_questions'}), name='quiz-export-questions'),
+    path('questions/<int:pk>/similar/', QuestionViewSet.as_view({'get': 'similar'}), name='question-similar'),
+    path('categories/<int:pk>/duplicates/', CategoryViewSet.as_view({'get': 'duplicates'}), name='category-duplicates'),
     
 
     path('assignments/<int:pk>/attempts/', QuizAssignmentViewSet.as_view({'get': 'attempts'}), name='assignment-attempts'),
     
  
     path('attempts/<int:pk>/submit-answers/', QuizAttemptViewSet.as_view({'post': 'submit_answers'}), name='attempt-submit-answers'),
+    path('attempts/<int:pk>/autosave/', QuizAttemptViewSet.as_view({'post': 'autosave'}), name='attempt-autosave'),
     path('attempts/<int:pk>/questions/', QuizAttemptViewSet.as_view({'get': 'questions'}), name='attempt-questions'),
     path('attempts/<int:pk>/answers/', QuizAttemptViewSet.as_view({'get': 'answers'}), name='attempt-answers'),
     
@@ -1,10 +1,13 @@
 from rest_framework import serializers
+from django.db import transaction
 from django.db.models import Avg, Count
 from apps.teacher.models import (
     Teacher, Sciences, Group, Schedule, LessonMaterial, 
     Category, Quiz, Question, Answer, QuizAssignment, 
-    QuizAttempt, UserAnswer
+    QuizAttempt, UserAnswer, RescoreJob, QuizGenerationJob
 )
+from apps.teacher.ai_generation import MAX_QUESTIONS as MAX_GENERATED_QUESTIONS
+from apps.teacher.rescoring import request_rescore
 from apps.users.models import User
 from apps.student.models import Student
 from apps.users.v1.serializers.serializers import UserSerializer, BranchSerializer
@@ -155,40 +158,110 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ['id', 'text', 'points', 'explanation', 'answers', 'created_at']
 
 
+class StudentAnswerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Answer
+        fields = ['id', 'text']
+
+
+class StudentQuestionSerializer(serializers.ModelSerializer):
+    """Test yechayotgan o'quvchi uchun: to'g'ri javob va tushuntirishsiz."""
+    answers = StudentAnswerSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Question
+        fields = ['id', 'text', 'points', 'answers']
+
+
+class AnswerWriteSerializer(AnswerSerializer):
+    # Tahrirlashda mavjud javobni id orqali aniqlash uchun
+    id = serializers.IntegerField(required=False)
+
+
 class QuestionCreateUpdateSerializer(serializers.ModelSerializer):
-    answers = AnswerSerializer(many=True)
+    answers = AnswerWriteSerializer(many=True)
     
     class Meta:
         model = Question
         fields = ['id', 'quiz', 'text', 'points', 'explanation', 'answers']
     
+    def validate_answers(self, value):
+        answer_ids = [answer_data['id'] for answer_data in value if answer_data.get('id') is not None]
+        if len(answer_ids) != len(set(answer_ids)):
+            raise serializers.ValidationError("Javob id lari takrorlanmasligi kerak")
+        return value
+    
     def create(self, validated_data):
         answers_data = validated_data.pop('answers')
-        question = Question.objects.create(**validated_data)
-        
-        for answer_data in answers_data:
-            Answer.objects.create(question=question, **answer_data)
+        with transaction.atomic():
+            question = Question.objects.create(**validated_data)
+            Answer.objects.bulk_create([
+                Answer(question=question, text=answer_data['text'], is_correct=answer_data.get('is_correct', False))
+                for answer_data in answers_data
+            ])
         
         return question
     
     def update(self, instance, validated_data):
         answers_data = validated_data.pop('answers', None)
         
-        # Update question fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Update answers if provided
-        if answers_data is not None:
-            # Delete existing answers
-            instance.answers.all().delete()
+        with transaction.atomic():
+            # Update question fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
             
-            # Create new answers
-            for answer_data in answers_data:
-                Answer.objects.create(question=instance, **answer_data)
+            if answers_data is not None:
+                self._sync_answers(instance, answers_data)
         
         return instance
+    
+    def _sync_answers(self, question, answers_data):
+        """
+        Match the submitted answers to the stored ones by id.
+
+        Only changed rows are bulk-updated, answers without an id are
+        bulk-created and the ones left out are deleted, so unchanged answers
+        keep their ids (and UserAnswer.selected_answer / AnswerStats rows
+        pointing at them). A constant number of queries per edit.
+        """
+        existing = {answer.pk: answer for answer in question.answers.all()}
+        unknown = [
+            answer_data['id'] for answer_data in answers_data
+            if answer_data.get('id') is not None and answer_data['id'] not in existing
+        ]
+        if unknown:
+            raise serializers.ValidationError({'answers': [f"Bu savolga tegishli bo'lmagan javoblar: {unknown}"]})
+        
+        changed, created, key_changed = [], [], False
+        for answer_data in answers_data:
+            answer = existing.pop(answer_data.get('id'), None)
+            if answer is None:
+                if not answer_data.get('text'):
+                    raise serializers.ValidationError({'answers': ["Yangi javob uchun matn kiritilishi shart"]})
+                created.append(Answer(
+                    question=question, text=answer_data['text'], is_correct=answer_data.get('is_correct', False)
+                ))
+                continue
+            text = answer_data.get('text', answer.text)
+            is_correct = answer_data.get('is_correct', answer.is_correct)
+            if answer.text == text and answer.is_correct == is_correct:
+                continue
+            key_changed = key_changed or answer.is_correct != is_correct
+            answer.text = text
+            answer.is_correct = is_correct
+            changed.append(answer)
+        
+        if changed:
+            Answer.objects.bulk_update(changed, ['text', 'is_correct'])
+        if created:
+            Answer.objects.bulk_create(created)
+        if existing:
+            # Signallar (kalitni yangilash, o'chirilgan to'g'ri javob uchun qayta baholash) shu yerda ishlaydi
+            question.answers.filter(pk__in=existing).delete()
+        # bulk_update signal yubormaydi: to'g'ri javob o'zgargan bo'lsa qayta baholashni o'zimiz so'raymiz
+        if key_changed:
+            request_rescore(question.quiz_id)
 
 
 class QuizListSerializer(serializers.ModelSerializer):
@@ -270,7 +343,7 @@ class QuizAttemptListSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizAttempt
         fields = ['id', 'student', 'student_name', 'quiz', 'quiz_title', 
-                 'quiz_assignment', 'score', 'started_at', 'completed_at', 
+                 'quiz_assignment', 'attempt_number', 'score', 'started_at', 'completed_at', 
                  'is_completed', 'time_taken_minutes', 'passed']
     
     def get_student_name(self, obj):
@@ -290,7 +363,7 @@ class QuizAttemptDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizAttempt
         fields = ['id', 'student', 'student_name', 'quiz', 'quiz_assignment', 
-                 'score', 'score_percentage', 'started_at', 'completed_at', 
+                 'attempt_number', 'score', 'score_percentage', 'started_at', 'completed_at', 
                  'is_completed', 'time_taken_minutes', 'passed', 'user_answers']
     
     def get_student_name(self, obj):
@@ -306,7 +379,7 @@ class QuizAttemptDetailSerializer(serializers.ModelSerializer):
 class StudentQuizSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizAttempt
-        fields = ['id', 'quiz', 'started_at', 'completed_at', 'is_completed', 'score', 'passed']
+        fields = ['id', 'quiz', 'attempt_number', 'started_at', 'completed_at', 'is_completed', 'score', 'passed']
 
 
 class StudentQuizDetailSerializer(serializers.ModelSerializer):
@@ -335,3 +408,25 @@ class UserAnswerCreateSerializer(serializers.ModelSerializer):
         
         return data
 
+
+class RescoreJobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = RescoreJob
+        fields = ['id', 'quiz', 'status', 'status_display', 'total', 'processed',
+                 'error', 'created_at', 'started_at', 'finished_at']
+
+
+class QuizGenerationJobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    topic = serializers.CharField(max_length=255, required=False)
+    difficulty = serializers.ChoiceField(choices=Quiz.DIFFICULTY_CHOICES, required=False)
+    count = serializers.IntegerField(min_value=1, max_value=MAX_GENERATED_QUESTIONS)
+    
+    class Meta:
+        model = QuizGenerationJob
+        fields = ['id', 'quiz', 'topic', 'difficulty', 'count', 'provider', 'status', 'status_display',
+                 'questions_created', 'cached_batches', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = ['quiz', 'provider', 'status', 'questions_created', 'cached_batches',
+                           'error', 'created_at', 'started_at', 'finished_at']
@@ -5,13 +5,27 @@ from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from django.utils import timezone
 from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 
 
+from apps.teacher.ai_generation import enqueue_generation
+from apps.teacher.autosave import save_draft, submit_with_draft
+from apps.teacher.gradebook import gradebook_table, group_gradebook
+from apps.teacher.grading import AttemptAlreadyCompleted, AttemptExpired, attempt_deadline
+from apps.teacher.item_analysis import quiz_item_analysis
+from apps.teacher.near_duplicates import (
+    DUPLICATE_THRESHOLD, SIMILAR_THRESHOLD, category_duplicates, similar_questions
+)
+from apps.teacher import quiz_io
+from apps.teacher.quiz_payloads import student_payload
+from apps.teacher.rescoring import enqueue_rescore
+from apps.teacher.student_quizzes import get_available_quizzes
 from apps.teacher.models import (
     Teacher, Sciences, Group, Schedule, LessonMaterial,
-    Category, Quiz, Question, Answer, QuizAssignment,
-    QuizAttempt, UserAnswer
+    Category, Quiz, Question, QuizAssignment,
+    QuizAttempt, AttemptStartConflict, UserAnswer, RescoreJob, QuizGenerationJob
 )
 from apps.teacher.v1.serializers.serializers import (
     TeacherSerializer, TeacherCreateUpdateSerializer,
@@ -21,12 +35,14 @@ from apps.teacher.v1.serializers.serializers import (
     QuizCreateUpdateSerializer, QuestionSerializer, QuestionCreateUpdateSerializer,
     QuizAssignmentSerializer, QuizAttemptListSerializer, QuizAttemptDetailSerializer,
     UserAnswerSerializer, UserAnswerCreateSerializer,
-    StudentQuizSerializer, StudentQuizDetailSerializer
+    StudentQuizSerializer, StudentQuizDetailSerializer, RescoreJobSerializer,
+    QuizGenerationJobSerializer
 )
 from apps.users.permissions import (
     IsAdmin, IsTeacher, IsOwnerTeacher, IsStudent, IsAdminOrTeacher
 )
 from apps.student.models import Student
+from apps.finance.exports import EXPORT_FORMATS, streaming_export
 
 
 class TeacherViewSet(viewsets.ModelViewSet):
@@ -139,6 +155,25 @@ class GroupViewSet(viewsets.ModelViewSet):
         serializer = LessonMaterialSerializer(materials, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def gradebook(self, request, pk=None):
+        """O'quvchilar × test topshiriqlari bo'yicha eng yaxshi natijalar jadvali"""
+        group = self.get_object()
+        status_filter = self.request.query_params.get('status', None)
+        return Response(group_gradebook(group.pk, status=status_filter))
+    
+    @action(detail=True, methods=['get'], url_path='gradebook/export')
+    def gradebook_export(self, request, pk=None):
+        """Stream the gradebook as CSV or XLSX (?file_format=csv|xlsx)"""
+        group = self.get_object()
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError({"file_format": f"Must be one of: {', '.join(EXPORT_FORMATS)}"})
+        
+        status_filter = self.request.query_params.get('status', None)
+        header, rows = gradebook_table(group_gradebook(group.pk, status=status_filter))
+        return streaming_export(file_format, f'gradebook_group_{group.pk}', header, rows)
+    
     @action(detail=True, methods=['get'])
     def students(self, request, pk=None):
         group = self.get_object()
@@ -215,6 +250,19 @@ class LessonMaterialViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
+def _threshold_param(request, default):
+    threshold = request.query_params.get('threshold', None)
+    if not threshold:
+        return default
+    try:
+        threshold = float(threshold)
+    except ValueError:
+        threshold = None
+    if threshold is None or not 0 < threshold <= 1:
+        raise ValidationError({"threshold": "0 va 1 oralig'idagi son bo'lishi kerak"})
+    return threshold
+
+
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -228,6 +276,17 @@ class CategoryViewSet(viewsets.ModelViewSet):
         else:
             permission_classes = [IsAdmin]
         return [permission() for permission in permission_classes]
+    
+    @action(detail=True, methods=['get'])
+    def duplicates(self, request, pk=None):
+        """Kategoriya testlaridagi deyarli bir xil savollar guruhlari (?threshold=0.8)"""
+        category = self.get_object()
+        threshold = _threshold_param(request, DUPLICATE_THRESHOLD)
+        return Response({
+            'category': category.pk,
+            'threshold': threshold,
+            'groups': category_duplicates(category.pk, threshold=threshold),
+        })
 
 
 class QuizViewSet(viewsets.ModelViewSet):
@@ -297,6 +356,65 @@ class QuizViewSet(viewsets.ModelViewSet):
         attempts = QuizAttempt.objects.filter(quiz=quiz).order_by('-started_at')
         serializer = QuizAttemptListSerializer(attempts, many=True)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get', 'post'])
+    def rescore(self, request, pk=None):
+        """GET: oxirgi qayta baholash ishlari va ularning holati; POST: qayta baholashni navbatga qo'yish"""
+        quiz = self.get_object()
+        if request.method == 'POST':
+            enqueue_rescore(quiz.pk)
+        jobs = RescoreJob.objects.filter(quiz=quiz).order_by('-id')[:10]
+        serializer = RescoreJobSerializer(jobs, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get', 'post'])
+    def generate(self, request, pk=None):
+        """GET: AI generatsiya ishlari; POST: mavzu bo'yicha savollar generatsiyasini navbatga qo'yish (topic, difficulty, count)"""
+        quiz = self.get_object()
+        if request.method == 'POST':
+            serializer = QuizGenerationJobSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            topic = serializer.validated_data.get('topic') or quiz.topic
+            if not topic:
+                raise ValidationError({"topic": "Mavzu kiritilmagan va testning o'zida ham mavzu yo'q"})
+            job = enqueue_generation(
+                quiz, topic, serializer.validated_data.get('difficulty', quiz.difficulty), serializer.validated_data['count']
+            )
+            return Response(QuizGenerationJobSerializer(job).data, status=status.HTTP_201_CREATED)
+        
+        jobs = QuizGenerationJob.objects.filter(quiz=quiz).order_by('-id')[:10]
+        return Response(QuizGenerationJobSerializer(jobs, many=True).data)
+    
+    @action(detail=True, methods=['get'], url_path='item-analysis')
+    def item_analysis(self, request, pk=None):
+        """Savollar tahlili: qiyinlik (p-value), farqlash indeksi va javoblar tanlanish ulushi."""
+        quiz = self.get_object()
+        return Response(quiz_item_analysis(quiz.pk))
+    
+    @action(detail=True, methods=['post'], url_path='import')
+    def import_questions(self, request, pk=None):
+        """Savollarni JSONL, GIFT yoki Moodle XML fayldan qo'shish (file, ?file_format=, ?dry_run=1)"""
+        quiz = self.get_object()
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({"file": "Fayl yuklanmadi"})
+        
+        file_format = request.query_params.get('file_format', None) or quiz_io.detect_format(upload.name)
+        if file_format not in quiz_io.QUESTION_FORMATS:
+            raise ValidationError({"file_format": f"Must be one of: {', '.join(quiz_io.QUESTION_FORMATS)}"})
+        
+        dry_run = request.query_params.get('dry_run', None) in ('1', 'true')
+        report = quiz_io.import_questions(quiz, upload, file_format, dry_run=dry_run)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['get'], url_path='export')
+    def export_questions(self, request, pk=None):
+        """Savollarni JSONL, GIFT yoki Moodle XML ko'rinishida yuklab olish (?file_format=jsonl|gift|xml)"""
+        quiz = self.get_object()
+        file_format = request.query_params.get('file_format', 'jsonl')
+        if file_format not in quiz_io.QUESTION_FORMATS:
+            raise ValidationError({"file_format": f"Must be one of: {', '.join(quiz_io.QUESTION_FORMATS)}"})
+        return quiz_io.export_questions(quiz, file_format)
 
 
 class QuestionViewSet(viewsets.ModelViewSet):
@@ -324,6 +442,13 @@ class QuestionViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(quiz_id=quiz_id)
         
         return queryset
+    
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Savollar bankidagi shu savolga o'xshash savollar (?threshold=0.5)"""
+        question = self.get_object()
+        threshold = _threshold_param(request, SIMILAR_THRESHOLD)
+        return Response(similar_questions(question, threshold=threshold))
 
 
 class QuizAssignmentViewSet(viewsets.ModelViewSet):
@@ -374,6 +499,8 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
     queryset = QuizAttempt.objects.all()
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['started_at', 'completed_at', 'score']
+    detail_select_related = ['student__user', 'quiz__category', 'quiz__teacher__user']
+    detail_prefetch_related = ['user_answers__question', 'user_answers__selected_answer']
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -381,9 +508,9 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
         return QuizAttemptListSerializer
     
     def get_permissions(self):
-        if self.action in ['create', 'submit_answers']:
+        if self.action in ['create', 'submit_answers', 'autosave', 'questions']:
             permission_classes = [IsStudent]
-        elif self.action in ['list', 'retrieve']:
+        elif self.action in ['list', 'retrieve', 'answers']:
             permission_classes = [permissions.IsAuthenticated]
         else:
             permission_classes = [IsAdminOrTeacher]
@@ -391,6 +518,8 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = QuizAttempt.objects.all()
+        if self.action == 'retrieve':
+            queryset = queryset.select_related(*self.detail_select_related).prefetch_related(*self.detail_prefetch_related)
         
         if self.request.user.user_role == 'student':
             student = get_object_or_404(Student, user=self.request.user)
@@ -436,13 +565,6 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
         quiz = get_object_or_404(Quiz, id=quiz_id)
         assignment_id = request.data.get('quiz_assignment')
         
-        attempts_count = QuizAttempt.get_attempts_count(student, quiz)
-        if attempts_count >= quiz.max_attempts:
-            return Response(
-                {"error": "Maximum number of attempts reached"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         if assignment_id:
             assignment = get_object_or_404(QuizAssignment, id=assignment_id)
             now = timezone.now()
@@ -452,11 +574,18 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        attempt = QuizAttempt.objects.create(
-            student=student,
-            quiz=quiz,
-            quiz_assignment_id=assignment_id if assignment_id else None
-        )
+        try:
+            attempt = QuizAttempt.start(student, quiz, quiz_assignment_id=assignment_id if assignment_id else None)
+        except AttemptStartConflict:
+            return Response(
+                {"error": "Another attempt is being started, please try again"},
+                status=status.HTTP_409_CONFLICT
+            )
+        if attempt is None:
+            return Response(
+                {"error": "Maximum number of attempts reached"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         serializer = QuizAttemptDetailSerializer(attempt)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -478,53 +607,57 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        answers_data = request.data.get('answers', [])
-        correct_count = 0
-        total_points = 0
-        
-        for answer_data in answers_data:
-            question_id = answer_data.get('question')
-            question = get_object_or_404(Question, id=question_id, quiz=attempt.quiz)
-            selected_answer_id = answer_data.get('selected_answer')
-            written_answer = answer_data.get('written_answer')
-            
-            if not selected_answer_id and not written_answer:
-                continue
-            
-            selected_answer = None
-            is_correct = False
-            if selected_answer_id:
-                selected_answer = get_object_or_404(Answer, id=selected_answer_id, question=question)
-                is_correct = selected_answer.is_correct
-            
-            user_answer, created = UserAnswer.objects.update_or_create(
-                attempt=attempt,
-                question=question,
-                defaults={
-                    'selected_answer': selected_answer,
-                    'written_answer': written_answer,
-                    'is_correct': is_correct
-                }
+        try:
+            attempt = submit_with_draft(attempt, request.data.get('answers', []))
+        except AttemptAlreadyCompleted:
+            return Response(
+                {"error": "This quiz attempt has already been completed"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            if is_correct:
-                correct_count += 1
-                total_points += question.points
-        
-        total_questions = attempt.quiz.questions.count()
-        if total_questions > 0:
-            score = (correct_count / total_questions) * 100
-        else:
-            score = 0
-        
-        attempt.score = score
-        attempt.completed_at = timezone.now()
-        attempt.is_completed = True
-        attempt.save()
         
+        attempt = (
+            QuizAttempt.objects
+            .select_related(*self.detail_select_related)
+            .prefetch_related(*self.detail_prefetch_related)
+            .get(pk=attempt.pk)
+        )
         serializer = QuizAttemptDetailSerializer(attempt)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['post'], permission_classes=[IsStudent])
+    def autosave(self, request, pk=None):
+        """Javoblarni vaqtincha saqlaydi (har bir necha soniyada chaqirish mumkin)."""
+        attempt = QuizAttempt.objects.filter(pk=pk, student__user=request.user).values(
+            'quiz_id', 'is_completed', 'started_at', 'quiz__time_limit_minutes', 'quiz_assignment__end_time'
+        ).first()
+        if attempt is None:
+            return Response({"error": "Quiz attempt not found"}, status=status.HTTP_404_NOT_FOUND)
+        if attempt['is_completed']:
+            return Response(
+                {"error": "This quiz attempt has already been completed"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        seq = request.data.get('seq', None)
+        if seq is None:
+            raise ValidationError({"seq": "This field is required"})
+        try:
+            seq = int(seq)
+        except (TypeError, ValueError):
+            raise ValidationError({"seq": "Must be an integer"})
+        
+        deadline = attempt_deadline(
+            attempt['started_at'], attempt['quiz__time_limit_minutes'], attempt['quiz_assignment__end_time']
+        )
+        try:
+            version = save_draft(pk, attempt['quiz_id'], request.data.get('answers', []), seq, deadline)
+        except AttemptExpired:
+            return Response(
+                {"error": "Time for this quiz attempt is over"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"version": version})
+    
     @action(detail=True, methods=['get'], permission_classes=[IsStudent])
     def questions(self, request, pk=None):
         attempt = self.get_object()
@@ -536,9 +669,14 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        questions = attempt.quiz.questions.all()
-        serializer = QuestionSerializer(questions, many=True)
-        return Response(serializer.data)
+        etag, body = student_payload(attempt.quiz_id, attempt.shuffle_seed)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
     
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def answers(self, request, pk=None):
@@ -559,7 +697,7 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
         
-        user_answers = UserAnswer.objects.filter(attempt=attempt)
+        user_answers = UserAnswer.objects.filter(attempt=attempt).select_related('question', 'selected_answer')
         serializer = UserAnswerSerializer(user_answers, many=True)
         return Response(serializer.data)
 
@@ -595,58 +733,4 @@ class StudentQuizViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def available_quizzes(self, request):
         student = get_object_or_404(Student, user=request.user)
-        
-        student_groups = student.groups.all()
-        
-        now = timezone.now()
-        active_assignments = QuizAssignment.objects.filter(
-            group__in=student_groups,
-            start_time__lte=now,
-            end_time__gte=now,
-            is_active=True
-        )
-        
-        response_data = []
-        for assignment in active_assignments:
-            quiz = assignment.quiz
-            
-            attempts_count = QuizAttempt.get_attempts_count(student, quiz)
-            can_attempt = attempts_count < quiz.max_attempts
-            
-            latest_attempt = None
-            attempts = QuizAttempt.objects.filter(
-                student=student,
-                quiz=quiz,
-                quiz_assignment=assignment
-            ).order_by('-started_at')
-            
-            if attempts.exists():
-                latest_attempt = StudentQuizSerializer(attempts.first()).data
-            
-            response_data.append({
-                'quiz_assignment': {
-                    'id': assignment.id,
-                    'start_time': assignment.start_time,
-                    'end_time': assignment.end_time,
-                },
-                'quiz': {
-                    'id': quiz.id,
-                    'title': quiz.title,
-                    'category': quiz.category.name,
-                    'difficulty': quiz.difficulty,
-                    'time_limit_minutes': quiz.time_limit_minutes,
-                    'passing_score': quiz.passing_score,
-                },
-                'group': {
-                    'id': assignment.group.id,
-                    'title': assignment.group.title,
-                },
-                'attempts_count': attempts_count,
-                'max_attempts': quiz.max_attempts,
-                'can_attempt': can_attempt,
-                'latest_attempt': latest_attempt
-            })
-        
-        return Response(response_data)
-
-
+        return Response(get_available_quizzes(student))
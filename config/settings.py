@@ -290,4 +290,37 @@ JAZZMIN_SETTINGS = {
 
 SWAGGER_SETTINGS = {
     'DEFAULT_AUTO_SCHEMA_CLASS': 'config.inspectors.CustomAutoSchema',
-}
\ No newline at end of file
+}
+# To'lov tizimlari webhooklari: provayder nomi -> HMAC kaliti (kalitsiz provayder o'chirilgan)
+PAYMENT_WEBHOOK_SECRETS = {
+    'payme': os.getenv('PAYME_WEBHOOK_SECRET'),
+    'click': os.getenv('CLICK_WEBHOOK_SECRET'),
+    'fake': os.getenv('FAKE_WEBHOOK_SECRET'),
+}
+# Webhook orqali kelgan to'lovlarda "received_by" sifatida yoziladigan foydalanuvchi (username)
+PAYMENT_WEBHOOK_USER = os.getenv('PAYMENT_WEBHOOK_USER')
+
+# Chek PDF'larini chizadigan jarayonlar soni (0 = shu jarayonning o'zida)
+RECEIPT_WORKERS = int(os.getenv('RECEIPT_WORKERS', 2))
+
+# AI test generatsiyasi: provayder (openai | fake), model va bir vaqtda yuboriladigan so'rovlar soni
+AI_QUIZ_PROVIDER = os.getenv('AI_QUIZ_PROVIDER', 'openai')
+AI_QUIZ_MODEL = os.getenv('AI_QUIZ_MODEL', 'gpt-4o-mini')
+AI_QUIZ_CONCURRENCY = int(os.getenv('AI_QUIZ_CONCURRENCY', 4))
+
+# Umumiy kesh: REDIS_URL berilsa barcha jarayonlar Redis'dan foydalanadi,
+# aks holda har bir jarayonning o'z xotirasi
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }